@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Streaming Batch Analysis
+========================
+Analyzes many locations and streams each result as soon as it is ready,
+as NDJSON events on stdout:
+
+    {"event": "start", "total": 250, "workers": 4}
+    {"event": "result", "index": 17, "name": "...", "success": true, "result": {...}}
+    {"event": "progress", "completed": 1, "failed": 0, "total": 250, "eta_seconds": 61.5, ...}
+    ...
+    {"event": "done", ...}  or  {"event": "cancelled", ...}
+
+Locations are analyzed by a pool of worker threads, so the first result
+arrives after one analysis no matter how large the job is. SIGTERM or
+SIGINT cancels the job: queued locations are dropped, in-flight ones get
+a short grace period, and the process then exits, which aborts any
+upstream call still waiting on the network.
+
+Usage:
+    python analysis_stream.py '{"locations": [{"lat": 14.0, "lon": 75.5, "name": "Site 1"}], "workers": 4}'
+    cat job.json | python analysis_stream.py
+
+Author: Habitat Canopy Team
+Version: 1.0.0
+"""
+
+import json
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, Optional, Sequence
+
+
+DEFAULT_WORKERS = 4
+MAX_WORKERS = 16
+
+# Seconds in-flight analyses may still finish after a cancel
+CANCEL_GRACE_SECONDS = 0.5
+
+# Exit status after a cancelled job
+CANCELLED_EXIT_CODE = 130
+
+Emit = Callable[[Dict[str, Any]], None]
+
+
+def ndjson_emitter(stream=None) -> Emit:
+    """Thread-safe writer of one JSON event per line, flushed immediately."""
+    stream = stream or sys.stdout
+    lock = threading.Lock()
+
+    def emit(event: Dict[str, Any]):
+        line = json.dumps(event, separators=(',', ':'))
+        with lock:
+            stream.write(line + '\n')
+            stream.flush()
+
+    return emit
+
+
+def analyze_location(lat: float, lon: float) -> Dict[str, Any]:
+    """Full API-backed analysis of one location."""
+    from site_analyzer_with_apis import analyze_site_from_location
+    return json.loads(analyze_site_from_location(lat, lon))
+
+
+def stream_analyses(
+    locations: Sequence[Dict[str, Any]],
+    emit: Emit,
+    analyze: Callable[[float, float], Dict[str, Any]] = analyze_location,
+    workers: int = DEFAULT_WORKERS,
+    cancel: Optional[threading.Event] = None,
+    grace_seconds: float = CANCEL_GRACE_SECONDS
+) -> Dict[str, Any]:
+    """
+    Analyze locations concurrently, emitting events as results complete.
+
+    Args:
+        locations: Dicts with lat, lon and optional name
+        emit: Receives every event
+        analyze: Analysis function called as analyze(lat, lon)
+        workers: Number of worker threads
+        cancel: Event that stops the job when set
+        grace_seconds: How long in-flight analyses may finish after a cancel
+
+    Returns:
+        The final "done" or "cancelled" event
+    """
+    cancel = cancel or threading.Event()
+    total = len(locations)
+    workers = max(1, min(workers, MAX_WORKERS, total or 1))
+    started = time.monotonic()
+    completed = failed = 0
+
+    emit({'event': 'start', 'total': total, 'workers': workers})
+
+    # Finished events arrive on a queue, so the loop costs O(1) per result
+    finished: 'queue.Queue[Dict[str, Any]]' = queue.Queue()
+    running = [0]
+    running_lock = threading.Lock()
+
+    def run(index: int):
+        location = locations[index]
+        event = {'event': 'result', 'index': index, 'name': location.get('name')}
+        if cancel.is_set():
+            return
+        with running_lock:
+            running[0] += 1
+        try:
+            result = analyze(float(location['lat']), float(location['lon']))
+            finished.put({**event, 'success': bool(result.get('success', True)), 'result': result})
+        except Exception as e:
+            finished.put({**event, 'success': False, 'error': str(e)})
+        finally:
+            with running_lock:
+                running[0] -= 1
+
+    def record(event: Dict[str, Any]):
+        nonlocal completed, failed
+        completed += 1
+        failed += not event['success']
+        emit(event)
+
+        elapsed = time.monotonic() - started
+        emit({
+            'event': 'progress',
+            'completed': completed,
+            'failed': failed,
+            'total': total,
+            'elapsed_seconds': round(elapsed, 2),
+            'eta_seconds': round(elapsed / completed * (total - completed), 2)
+        })
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        for index in range(total):
+            executor.submit(run, index)
+        while completed < total and not cancel.is_set():
+            try:
+                record(finished.get(timeout=0.2))
+            except queue.Empty:
+                continue
+    finally:
+        # Drop queued work; running analyses are not awaited past the grace period
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    deadline = time.monotonic() + grace_seconds
+    while completed < total and time.monotonic() < deadline and (running[0] or not finished.empty()):
+        try:
+            record(finished.get(timeout=0.05))
+        except queue.Empty:
+            continue
+
+    final = {
+        'event': 'cancelled' if cancel.is_set() and completed < total else 'done',
+        'completed': completed,
+        'failed': failed,
+        'total': total,
+        'elapsed_seconds': round(time.monotonic() - started, 2)
+    }
+    emit(final)
+    return final
+
+
+def install_cancel_handlers(cancel: threading.Event):
+    """Set the cancel event on SIGTERM and SIGINT."""
+    def handler(signum, frame):
+        cancel.set()
+
+    signal.signal(signal.SIGTERM, handler)
+    signal.signal(signal.SIGINT, handler)
+
+
+def main():
+    """
+    Main entry point for command-line usage.
+    Reads {"locations": [...], "workers": N} (or a bare list of locations)
+    from the command line or stdin and streams NDJSON events to stdout.
+    """
+    json_input = sys.argv[1] if len(sys.argv) > 1 else sys.stdin.read()
+    emit = ndjson_emitter()
+
+    try:
+        request = json.loads(json_input)
+        locations = request['locations'] if isinstance(request, dict) else request
+        workers = int(request.get('workers', DEFAULT_WORKERS)) if isinstance(request, dict) else DEFAULT_WORKERS
+        if not isinstance(locations, list):
+            raise TypeError("locations must be a list")
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+        emit({'event': 'error', 'success': False, 'error': f"Invalid stream request: {str(e)}"})
+        sys.exit(1)
+
+    cancel = threading.Event()
+    install_cancel_handlers(cancel)
+    final = stream_analyses(locations, emit, workers=workers, cancel=cancel)
+
+    if final['event'] == 'cancelled':
+        # Exit without joining the worker threads, so upstream requests
+        # still waiting on the network are aborted with the process
+        sys.stdout.flush()
+        os._exit(CANCELLED_EXIT_CODE)
+
+
+if __name__ == "__main__":
+    main()
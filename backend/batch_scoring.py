@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Column-Wise Batch Scoring
+=========================
+Scores many input rows at once with the same rules as site_analyzer.py.
+
+The band rules are expressed as tables of edges: a value's band level is
+the number of edges it lies outside of, and every level maps to a fixed
+score. Whole input columns are then scored with a single map over flat
+floats, without building the per-site result dictionaries.
+
+Results match site_analyzer.calculate_site_suitability exactly,
+including rounding.
+
+Author: Habitat Canopy Team
+Version: 1.0.0
+"""
+
+from typing import List, Sequence, Tuple
+
+
+# (edges below the optimal band, edges above it), outermost last.
+# Lower edges are inclusive (6.0 is optimal), upper edges too (7.5 is optimal).
+PH_EDGES = ((6.0, 5.5, 5.0), (7.5, 8.0, 8.5))
+MOISTURE_EDGES = ((50, 40, 30), (70, 80, 90))
+TEMPERATURE_EDGES = ((20, 15, 10), (30, 35, 40))
+RAINFALL_EDGES = ((100, 50, 20), (200, 300, 400))
+
+# Score per band level (0 = optimal ... 3 = poor / high stress)
+SOIL_POINTS = (50, 35, 20, 10)
+STRESS_POINTS = (0, 15, 30, 50)
+
+RISK_LEVELS = ("LOW", "MEDIUM", "HIGH")
+
+
+def band_level(value: float, edges: Tuple[Sequence[float], Sequence[float]]) -> int:
+    """Number of band edges a value lies outside of (0 = optimal band)."""
+    lows, highs = edges
+    return (
+        (value < lows[0]) + (value < lows[1]) + (value < lows[2])
+        + (value > highs[0]) + (value > highs[1]) + (value > highs[2])
+    )
+
+
+def vegetation_score(ndvi: float) -> float:
+    """Vegetation health score, as calculate_vegetation_health_score."""
+    ndvi = max(0.0, min(1.0, ndvi))
+    if ndvi > 0.6:
+        return round(80 + (ndvi - 0.6) * 50, 2)
+    if ndvi >= 0.3:
+        return round(40 + (ndvi - 0.3) * 133.33, 2)
+    return round(ndvi * 133.33, 2)
+
+
+def soil_score(ph: float, moisture: float) -> float:
+    """Soil suitability score, as calculate_soil_suitability_score."""
+    return SOIL_POINTS[band_level(ph, PH_EDGES)] + SOIL_POINTS[band_level(moisture, MOISTURE_EDGES)]
+
+
+def climate_stress(temperature: float, rainfall: float) -> float:
+    """Climate stress score, as calculate_climate_stress_score."""
+    temp_level = band_level(temperature, TEMPERATURE_EDGES)
+    rain_level = band_level(rainfall, RAINFALL_EDGES)
+    stress = STRESS_POINTS[temp_level] + STRESS_POINTS[rain_level]
+    # Three risk factors (temperature, rainfall, drought) add a 20 point penalty
+    if temp_level >= 2 and rain_level >= 2 and temperature > 35 and rainfall < 50:
+        stress += 20
+    return min(100, stress)
+
+
+def final_score(ndvi: float, ph: float, moisture: float, temperature: float, rainfall: float) -> float:
+    """Final suitability score for one row of inputs."""
+    return round(
+        vegetation_score(ndvi) * 0.30
+        + soil_score(ph, moisture) * 0.40
+        + (100 - climate_stress(temperature, rainfall)) * 0.30,
+        2
+    )
+
+
+def risk_level(score: float) -> str:
+    """Risk level calculate_site_suitability assigns to a final score."""
+    if score >= 70:
+        return "LOW"
+    if score >= 50:
+        return "MEDIUM"
+    return "HIGH"
+
+
+def component_columns(
+    ndvi: Sequence[float],
+    ph: Sequence[float],
+    moisture: Sequence[float],
+    temperature: Sequence[float],
+    rainfall: Sequence[float]
+) -> Tuple[List[float], List[float], List[float]]:
+    """
+    Component scores for whole input columns.
+
+    Returns:
+        Tuple of (vegetation, soil, climate) columns, where climate is the
+        inverted stress (100 - stress) that enters the weighted sum
+    """
+    vegetation = list(map(vegetation_score, ndvi))
+    soil = list(map(soil_score, ph, moisture))
+    climate = [100 - stress for stress in map(climate_stress, temperature, rainfall)]
+    return vegetation, soil, climate
+
+
+def final_score_column(
+    ndvi: Sequence[float],
+    ph: Sequence[float],
+    moisture: Sequence[float],
+    temperature: Sequence[float],
+    rainfall: Sequence[float]
+) -> List[float]:
+    """Final suitability scores for whole input columns."""
+    return list(map(final_score, ndvi, ph, moisture, temperature, rainfall))
+
@@ -0,0 +1,565 @@
+#!/usr/bin/env python3
+"""
+Sharded Bulk Analysis
+=====================
+Splits a site list or region into fixed shards that any number of worker
+processes, on one machine or many sharing a directory, analyze
+independently. A merge step then builds the final ranking and summary.
+
+A job is a directory:
+    manifest.json         job parameters, candidate source and shard table
+    shards/<id>.json      sites of each shard (site-list jobs)
+    claims/<id>.claim     shard currently being processed, with a lease
+    results/<id>.json     finished shard: its top K sites and summary
+    result.json           merged ranking and summary
+
+Shards are contiguous ranges of candidates in input order, so a job's
+shards are the same wherever and however often it is planned. Workers
+claim a shard by creating its claim file exclusively and renew the lease
+while they work; a claim whose lease has run out (crashed worker) can be
+taken over. Results are written atomically, and a shard with a result is
+never processed again, so an interrupted job is resumed by starting the
+workers again.
+
+Sites carrying all five analyzer inputs are scored offline. Sites with
+only a location are analyzed with analyze_site_from_location.
+
+Usage:
+    python bulk_jobs.py plan jobs/india --bbox 8 68 37 97 --step 0.1 --shard-size 5000 --k 100
+    python bulk_jobs.py plan jobs/sites --sites sites.json --shard-size 1000
+    python bulk_jobs.py work jobs/india            # on every node, as often as needed
+    python bulk_jobs.py status jobs/india
+    python bulk_jobs.py merge jobs/india
+
+Author: Habitat Canopy Team
+Version: 1.0.0
+"""
+
+import argparse
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import socket
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Optional, Sequence
+
+from site_analyzer import score_site_inputs
+from site_ranking import INPUT_FIELDS, grid_candidates, ranking_key
+
+
+FORMAT_VERSION = 1
+DEFAULT_SHARD_SIZE = 1000
+DEFAULT_K = 100
+
+# Seconds a claim stays valid without renewal
+DEFAULT_LEASE_SECONDS = 300
+
+RISK_LEVELS = ("LOW", "MEDIUM", "HIGH")
+
+# Upper edges of the score histogram buckets in job summaries
+HISTOGRAM_EDGES = tuple(range(10, 101, 10))
+
+Analyze = Callable[[float, float], Dict[str, Any]]
+
+
+def _write_json(path: Path, data: Dict[str, Any]):
+    """Write JSON atomically (temporary file, then rename)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{socket.gethostname()}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def analyze_location(lat: float, lon: float) -> Dict[str, Any]:
+    """Full API-backed analysis of one location."""
+    from site_analyzer_with_apis import analyze_site_from_location
+    return json.loads(analyze_site_from_location(lat, lon))
+
+
+def score_candidate(candidate: Dict[str, Any], analyze: Analyze) -> Dict[str, Any]:
+    """
+    Ranking record of one candidate.
+
+    Args:
+        candidate: Dict with lat/lon, optionally name and the analyzer inputs
+        analyze: Analysis function for candidates without inputs
+
+    Returns:
+        Record with final_score, risk_level, priority and input_data
+    """
+    if all(field in candidate for field in INPUT_FIELDS):
+        inputs = {field: float(candidate[field]) for field in INPUT_FIELDS}
+        suitability = score_site_inputs(inputs)["site_suitability"]
+    else:
+        result = analyze(float(candidate["lat"]), float(candidate["lon"]))
+        if not result.get("success", False):
+            raise RuntimeError(result.get("error", "analysis failed"))
+        inputs = result["input_data"]
+        suitability = result["analysis"]["site_suitability"]
+    return {
+        "name": candidate.get("name"),
+        "lat": candidate.get("lat"),
+        "lon": candidate.get("lon"),
+        "final_score": suitability["final_score"],
+        "risk_level": suitability["risk_level"],
+        "priority": suitability["priority"],
+        "input_data": inputs
+    }
+
+
+def empty_summary() -> Dict[str, Any]:
+    return {
+        "candidates": 0,
+        "scored": 0,
+        "failed": 0,
+        "score_sum": 0.0,
+        "min_score": None,
+        "max_score": None,
+        "risk_levels": dict.fromkeys(RISK_LEVELS, 0),
+        "histogram": [0] * len(HISTOGRAM_EDGES)
+    }
+
+
+def merge_summaries(summaries: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine shard summaries (counts and sums add up)."""
+    merged = empty_summary()
+    for summary in summaries:
+        for field in ("candidates", "scored", "failed", "score_sum"):
+            merged[field] += summary[field]
+        for level, count in summary["risk_levels"].items():
+            merged["risk_levels"][level] += count
+        merged["histogram"] = [a + b for a, b in zip(merged["histogram"], summary["histogram"])]
+        for field, pick in (("min_score", min), ("max_score", max)):
+            if summary[field] is not None:
+                merged[field] = summary[field] if merged[field] is None else pick(merged[field], summary[field])
+    merged["score_sum"] = round(merged["score_sum"], 4)
+    return merged
+
+
+class BulkJob:
+    """A sharded bulk analysis job in a shared directory."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._manifest: Optional[Dict[str, Any]] = None
+
+    @property
+    def manifest(self) -> Dict[str, Any]:
+        if self._manifest is None:
+            manifest = _read_json(self.root / 'manifest.json')
+            if manifest is None:
+                raise FileNotFoundError(f"No job manifest in {self.root}")
+            self._manifest = manifest
+        return self._manifest
+
+    def _shard_name(self, shard: int) -> str:
+        return f"{shard:05d}.json"
+
+    def _result_path(self, shard: int) -> Path:
+        return self.root / 'results' / self._shard_name(shard)
+
+    def _claim_path(self, shard: int) -> Path:
+        return self.root / 'claims' / f"{shard:05d}.claim"
+
+    @classmethod
+    def plan(
+        cls,
+        root: Path,
+        sites: Optional[Sequence[Dict[str, Any]]] = None,
+        bbox: Optional[Sequence[float]] = None,
+        step: float = 0.1,
+        shard_size: int = DEFAULT_SHARD_SIZE,
+        k: int = DEFAULT_K,
+        by: str = "final_score"
+    ) -> 'BulkJob':
+        """
+        Create a job directory, or reopen it if it was planned identically.
+
+        Args:
+            root: Job directory
+            sites: Site list (dicts with lat/lon, optionally name and inputs)
+            bbox: Region (min_lat, min_lon, max_lat, max_lon), instead of sites
+            step: Grid spacing of a region in degrees
+            shard_size: Candidates per shard
+            k: Number of sites kept in the ranking
+            by: "final_score" or "priority"
+
+        Returns:
+            The job
+        """
+        if (sites is None) == (bbox is None):
+            raise ValueError("Plan a job from either a site list or a bbox")
+        if shard_size <= 0 or k <= 0:
+            raise ValueError("shard_size and k must be positive")
+        if by not in ("final_score", "priority"):
+            raise ValueError(f"Unknown ranking field: {by}")
+
+        if sites is not None:
+            sites = list(sites)
+            total = len(sites)
+            source = {"type": "sites", "sha256": hashlib.sha256(
+                json.dumps(sites, sort_keys=True).encode()).hexdigest()}
+        else:
+            total = sum(1 for _ in grid_candidates(*bbox, step))
+            source = {"type": "bbox", "bbox": list(bbox), "step": step}
+
+        params = {"source": source, "total": total, "shard_size": shard_size, "k": k, "by": by}
+        job_id = hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+
+        job = cls(root)
+        existing = _read_json(job.root / 'manifest.json')
+        if existing is not None:
+            if existing["job_id"] != job_id:
+                raise ValueError(f"{job.root} already holds a different job ({existing['job_id']})")
+            job._manifest = existing
+            return job
+
+        shards = [
+            {"id": shard, "start": start, "stop": min(start + shard_size, total)}
+            for shard, start in enumerate(range(0, total, shard_size))
+        ]
+        if sites is not None:
+            for shard in shards:
+                _write_json(job.root / 'shards' / job._shard_name(shard["id"]),
+                            {"sites": sites[shard["start"]:shard["stop"]]})
+        manifest = {
+            "version": FORMAT_VERSION,
+            "job_id": job_id,
+            "created_at": datetime.now().isoformat(),
+            **params,
+            "shards": shards
+        }
+        # The manifest is written last: a job without one is incomplete
+        _write_json(job.root / 'manifest.json', manifest)
+        job._manifest = manifest
+        return job
+
+    def candidates(self, shard: int) -> Iterator[Dict[str, Any]]:
+        """Candidates of one shard, in input order."""
+        manifest = self.manifest
+        entry = manifest["shards"][shard]
+        if manifest["source"]["type"] == "sites":
+            yield from _read_json(self.root / 'shards' / self._shard_name(shard))["sites"]
+            return
+        source = manifest["source"]
+        grid = grid_candidates(*source["bbox"], source["step"])
+        yield from itertools.islice(grid, entry["start"], entry["stop"])
+
+    def result(self, shard: int) -> Optional[Dict[str, Any]]:
+        """Result of a finished shard, or None."""
+        result = _read_json(self._result_path(shard))
+        if result is None or result.get("job_id") != self.manifest["job_id"]:
+            return None
+        return result
+
+    def claim(self, shard: int, worker: str, lease: float = DEFAULT_LEASE_SECONDS) -> bool:
+        """
+        Claim a shard for a worker.
+
+        Returns:
+            True if the shard was unclaimed, or its previous lease had expired
+        """
+        path = self._claim_path(shard)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            if path.stat().st_mtime < time.time():
+                # Two workers may both take over an expired claim; results are
+                # deterministic and written atomically, so this only costs time
+                path.unlink()
+        except FileNotFoundError:
+            pass
+
+        # Link a complete claim file into place, so it never appears
+        # without its expiry time
+        tmp_path = path.with_name(f"{path.name}.{socket.gethostname()}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({"worker": worker, "claimed_at": time.time()}, f)
+        expires = time.time() + lease
+        os.utime(tmp_path, (expires, expires))
+        try:
+            os.link(tmp_path, path)
+        except FileExistsError:
+            return False
+        finally:
+            tmp_path.unlink()
+        return True
+
+    def claim_owner(self, shard: int) -> Optional[str]:
+        """Worker holding a shard's claim, or None if it is unclaimed."""
+        try:
+            with open(self._claim_path(shard)) as f:
+                return json.load(f).get("worker")
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def renew(self, shard: int, worker: str, lease: float = DEFAULT_LEASE_SECONDS) -> bool:
+        """
+        Extend a worker's claim: the claim file's mtime is its expiry time.
+
+        Returns:
+            False if the claim was lost (taken over after its lease expired)
+        """
+        if self.claim_owner(shard) != worker:
+            return False
+        expires = time.time() + lease
+        try:
+            os.utime(self._claim_path(shard), (expires, expires))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def release(self, shard: int, worker: str):
+        """Remove a worker's claim, leaving a claim taken over by another worker."""
+        if self.claim_owner(shard) != worker:
+            return
+        try:
+            self._claim_path(shard).unlink()
+        except FileNotFoundError:
+            pass
+
+    def process(
+        self,
+        shard: int,
+        worker: str,
+        analyze: Analyze = analyze_location,
+        lease: float = DEFAULT_LEASE_SECONDS
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Analyze one claimed shard and write its result.
+
+        Keeps the shard's top K sites (ties go to the earlier candidate) and
+        a summary that merges by addition.
+
+        Returns:
+            Shard result, or None if the claim was lost while processing
+            (the worker that took it over writes the result)
+        """
+        manifest = self.manifest
+        k, by = manifest["k"], manifest["by"]
+        start = manifest["shards"][shard]["start"]
+        summary = empty_summary()
+        heap: List[tuple] = []
+        errors: List[Dict[str, Any]] = []
+        renewed = time.monotonic()
+
+        for index, candidate in enumerate(self.candidates(shard), start=start):
+            summary["candidates"] += 1
+            try:
+                record = score_candidate(candidate, analyze)
+            except Exception as e:
+                summary["failed"] += 1
+                if len(errors) < 20:
+                    errors.append({"index": index, "name": candidate.get("name"), "error": str(e)})
+                continue
+
+            score = record["final_score"]
+            summary["scored"] += 1
+            summary["score_sum"] += score
+            summary["min_score"] = score if summary["min_score"] is None else min(summary["min_score"], score)
+            summary["max_score"] = score if summary["max_score"] is None else max(summary["max_score"], score)
+            summary["risk_levels"][record["risk_level"]] += 1
+            bucket = next(i for i, edge in enumerate(HISTOGRAM_EDGES) if score < edge or edge == 100)
+            summary["histogram"][bucket] += 1
+
+            record["index"] = index
+            entry = (ranking_key(score, by), -index, record)
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+
+            if time.monotonic() - renewed > lease / 3:
+                if not self.renew(shard, worker, lease):
+                    return None
+                renewed = time.monotonic()
+
+        result = {
+            "job_id": manifest["job_id"],
+            "shard": shard,
+            "worker": worker,
+            "finished_at": datetime.now().isoformat(),
+            "summary": summary,
+            "top": [entry[2] for entry in sorted(heap, key=lambda e: e[:2], reverse=True)],
+            "errors": errors
+        }
+        _write_json(self._result_path(shard), result)
+        return result
+
+    def work(
+        self,
+        worker: Optional[str] = None,
+        analyze: Analyze = analyze_location,
+        lease: float = DEFAULT_LEASE_SECONDS,
+        max_shards: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Process unfinished, unclaimed shards until none are left.
+
+        Workers start at different shards to keep claim contention low.
+
+        Returns:
+            Summary with the shards this worker processed and skipped
+        """
+        worker = worker or f"{socket.gethostname()}-{os.getpid()}"
+        shards = len(self.manifest["shards"])
+        offset = int(hashlib.sha256(worker.encode()).hexdigest(), 16) % max(shards, 1)
+        processed, finished, busy, lost = [], 0, 0, []
+
+        for shard in [(offset + i) % shards for i in range(shards)]:
+            if max_shards is not None and len(processed) >= max_shards:
+                break
+            if self.result(shard) is not None:
+                finished += 1
+                continue
+            if not self.claim(shard, worker, lease):
+                busy += 1
+                continue
+            try:
+                # Another worker may have finished it between our check and claim
+                if self.result(shard) is not None:
+                    finished += 1
+                elif self.process(shard, worker, analyze, lease) is not None:
+                    processed.append(shard)
+                else:
+                    lost.append(shard)
+            finally:
+                self.release(shard, worker)
+
+        return {
+            "success": True,
+            "worker": worker,
+            "processed": sorted(processed),
+            "already_finished": finished,
+            "claimed_elsewhere": busy,
+            "lost_claims": sorted(lost)
+        }
+
+    def status(self) -> Dict[str, Any]:
+        """Finished, running and pending shard counts."""
+        shards = range(len(self.manifest["shards"]))
+        finished = {shard for shard in shards if self.result(shard) is not None}
+        running = [shard for shard in shards
+                   if shard not in finished and self._claim_path(shard).exists()]
+        return {
+            "job_id": self.manifest["job_id"],
+            "total_candidates": self.manifest["total"],
+            "shards": len(shards),
+            "finished": len(finished),
+            "running": len(running),
+            "pending": len(shards) - len(finished) - len(running)
+        }
+
+    def merge(self, partial: bool = False) -> Dict[str, Any]:
+        """
+        Build the final ranking and summary from the shard results.
+
+        The global top K is the top K of the shards' top K lists.
+
+        Args:
+            partial: Merge the finished shards even if others are missing
+
+        Returns:
+            Merged result, also written to result.json when complete
+        """
+        manifest = self.manifest
+        k, by = manifest["k"], manifest["by"]
+        results, missing = [], []
+        for shard in range(len(manifest["shards"])):
+            result = self.result(shard)
+            (results if result is not None else missing).append(result if result is not None else shard)
+        if missing and not partial:
+            raise RuntimeError(f"{len(missing)} shards are not finished (first: {missing[0]})")
+
+        records = [record for result in results for record in result["top"]]
+        ranked = heapq.nlargest(k, records, key=lambda r: (ranking_key(r["final_score"], by), -r["index"]))
+        for rank, record in enumerate(ranked, start=1):
+            record["rank"] = rank
+
+        summary = merge_summaries(result["summary"] for result in results)
+        summary["mean_score"] = round(summary["score_sum"] / summary["scored"], 2) if summary["scored"] else None
+        merged = {
+            "success": True,
+            "job_id": manifest["job_id"],
+            "complete": not missing,
+            "missing_shards": missing,
+            "ranked_by": by,
+            "k": k,
+            "total_candidates": manifest["total"],
+            "summary": summary,
+            "errors": [error for result in results for error in result["errors"]][:100],
+            "results": ranked
+        }
+        if not missing:
+            _write_json(self.root / 'result.json', merged)
+        return merged
+
+
+def main():
+    """Main entry point for command-line usage."""
+    parser = argparse.ArgumentParser(description="Sharded bulk site analysis")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    plan = commands.add_parser('plan', help="Create a job manifest")
+    plan.add_argument('job')
+    source = plan.add_mutually_exclusive_group(required=True)
+    source.add_argument('--sites', help="JSON site list (or {\"sites\": [...]})")
+    source.add_argument('--bbox', nargs=4, type=float, metavar=('MIN_LAT', 'MIN_LON', 'MAX_LAT', 'MAX_LON'))
+    plan.add_argument('--step', type=float, default=0.1)
+    plan.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE)
+    plan.add_argument('--k', type=int, default=DEFAULT_K)
+    plan.add_argument('--by', choices=('final_score', 'priority'), default='final_score')
+
+    work = commands.add_parser('work', help="Process unfinished shards")
+    work.add_argument('job')
+    work.add_argument('--worker', help="Worker name (default: host-pid)")
+    work.add_argument('--lease', type=float, default=DEFAULT_LEASE_SECONDS)
+    work.add_argument('--max-shards', type=int)
+
+    status = commands.add_parser('status', help="Show shard progress")
+    status.add_argument('job')
+
+    merge = commands.add_parser('merge', help="Merge shard results into result.json")
+    merge.add_argument('job')
+    merge.add_argument('--partial', action='store_true', help="Merge even if shards are missing")
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'plan':
+            sites = None
+            if args.sites:
+                with open(args.sites) as f:
+                    sites = json.load(f)
+                sites = sites['sites'] if isinstance(sites, dict) else sites
+            job = BulkJob.plan(Path(args.job), sites=sites, bbox=args.bbox, step=args.step,
+                               shard_size=args.shard_size, k=args.k, by=args.by)
+            result = {"success": True, **job.status()}
+        elif args.command == 'work':
+            result = BulkJob(Path(args.job)).work(args.worker, lease=args.lease, max_shards=args.max_shards)
+        elif args.command == 'status':
+            result = {"success": True, **BulkJob(Path(args.job)).status()}
+        else:
+            result = BulkJob(Path(args.job)).merge(partial=args.partial)
+    except (OSError, ValueError, RuntimeError, KeyError) as e:
+        print(json.dumps({"success": False, "error": str(e)}, indent=2))
+        sys.exit(1)
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
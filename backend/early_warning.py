@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+"""
+Incremental Early Warning
+=========================
+Keeps rolling statistics of every monitored site's scores and raises an
+alert as soon as a site's trajectory turns bad, without reloading or
+re-analyzing any history.
+
+For each site and metric (final score and the three component scores) a
+SQLite row holds an exponentially weighted baseline mean and variance, a
+faster "recent" mean, and the last value. A new analysis updates each row
+in O(1) and is checked against three rules:
+
+    sudden change  the value lies more than Z_THRESHOLD baseline standard
+                   deviations on the bad side of the baseline
+    drift          the recent mean has moved DRIFT_POINTS or more to the
+                   bad side of the baseline (raised once per episode)
+    threshold      the value crossed a risk boundary, e.g. the final score
+                   falling below 70 (MEDIUM) or 50 (HIGH)
+
+Alerts are stored with the statistics and can be listed and acknowledged.
+Re-reading an unchanged analysis (a cached result or an identical page
+view) is not a new observation: each site keeps the fingerprint of its
+last observed inputs and repeats of it are skipped, so they cannot
+collapse the baseline variance.
+
+Usage:
+    python analysis_stream.py job.json | python early_warning.py observe
+    python early_warning.py observe observations.ndjson
+    python early_warning.py alerts [--site 14.0000,75.5000] [--open]
+    python early_warning.py stats 14.0000,75.5000
+    python early_warning.py ack <alert_id>
+
+Author: Habitat Canopy Team
+Version: 1.0.0
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+
+DEFAULT_DB_PATH = Path(__file__).parent / 'data' / 'early_warning' / 'early_warning.sqlite'
+
+# Metric name -> (path in an analysis result, +1 if higher is better)
+METRICS = {
+    'final_score': (('site_suitability', 'final_score'), +1),
+    'vegetation': (('vegetation_health', 'score'), +1),
+    'soil': (('soil_suitability', 'score'), +1),
+    'climate_stress': (('climate_stress', 'stress_score'), -1)
+}
+
+# Smoothing factors: the baseline remembers roughly the last 10 analyses,
+# the recent mean roughly the last 2
+BASELINE_ALPHA = 0.1
+RECENT_ALPHA = 0.5
+
+# Analyses a site needs before the statistical rules apply
+MIN_OBSERVATIONS = 8
+
+Z_THRESHOLD = 3.0
+
+# Standard deviation floor, so near-constant sites do not alert on noise
+MIN_STD = 1.0
+
+# Points the recent mean may move to the bad side before a drift alert
+DRIFT_POINTS = {'final_score': 8.0, 'vegetation': 10.0, 'soil': 15.0, 'climate_stress': 15.0}
+
+# Risk boundaries per metric: (value, severity, description)
+THRESHOLDS = {
+    'final_score': ((70.0, 'warning', 'MEDIUM risk'), (50.0, 'critical', 'HIGH risk')),
+    'climate_stress': ((60.0, 'warning', 'high climate stress'),)
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS site_stats (
+    site_id TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    baseline REAL NOT NULL,
+    variance REAL NOT NULL,
+    recent REAL NOT NULL,
+    last REAL NOT NULL,
+    drifting INTEGER NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (site_id, metric)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY,
+    site_id TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    rule TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    value REAL NOT NULL,
+    baseline REAL,
+    z_score REAL,
+    message TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    acknowledged INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS alerts_by_site ON alerts (site_id, created_at);
+CREATE TABLE IF NOT EXISTS site_inputs (
+    site_id TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+Stats = Dict[str, Any]
+
+
+def site_key(lat: float, lon: float) -> str:
+    """Site id of a location (rounded like the result store's location refs)."""
+    return f"{lat:.4f},{lon:.4f}"
+
+
+def scores_from_analysis(analysis: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Metric values of an analysis.
+
+    Args:
+        analysis: The "analysis" block of an analyzer result
+
+    Returns:
+        Dictionary of metric name to value
+    """
+    scores = {}
+    for metric, ((component, field), _) in METRICS.items():
+        value = analysis.get(component, {}).get(field)
+        if value is not None:
+            scores[metric] = float(value)
+    return scores
+
+
+def input_fingerprint(result: Dict[str, Any]) -> Optional[str]:
+    """
+    Fingerprint of the inputs behind an analyzer result.
+
+    Uses the result store's record_key when present, otherwise a hash of
+    the input data.
+
+    Returns:
+        Fingerprint, or None if the result carries neither
+    """
+    if result.get('record_key'):
+        return result['record_key']
+    if result.get('input_data') is None:
+        return None
+    canonical = json.dumps(result['input_data'], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def update_stats(stats: Optional[Stats], value: float) -> Tuple[Stats, Optional[float]]:
+    """
+    Fold one value into a metric's rolling statistics.
+
+    Uses the incremental exponentially weighted mean and variance, so no
+    earlier values are needed.
+
+    Args:
+        stats: Current statistics, or None for the first value
+        value: New value
+
+    Returns:
+        Tuple of (new statistics, z-score of the value against the previous
+        baseline or None while the baseline is too young)
+    """
+    if stats is None:
+        return {'count': 1, 'baseline': value, 'variance': 0.0, 'recent': value,
+                'last': value, 'drifting': False}, None
+
+    z_score = None
+    if stats['count'] >= MIN_OBSERVATIONS:
+        # The variance starts at zero; undo that bias for young baselines
+        variance = stats['variance'] / (1 - (1 - BASELINE_ALPHA) ** (stats['count'] - 1))
+        z_score = (value - stats['baseline']) / max(math.sqrt(variance), MIN_STD)
+
+    diff = value - stats['baseline']
+    increment = BASELINE_ALPHA * diff
+    return {
+        'count': stats['count'] + 1,
+        'baseline': stats['baseline'] + increment,
+        'variance': (1 - BASELINE_ALPHA) * (stats['variance'] + diff * increment),
+        'recent': stats['recent'] + RECENT_ALPHA * (value - stats['recent']),
+        'last': value,
+        'drifting': stats['drifting']
+    }, z_score
+
+
+def check_rules(
+    metric: str,
+    previous: Optional[Stats],
+    stats: Stats,
+    value: float,
+    z_score: Optional[float]
+) -> List[Dict[str, Any]]:
+    """
+    Alerts raised by one metric update (the drift state of stats is updated).
+
+    Returns:
+        Alerts with rule, severity, value, baseline, z_score and message
+    """
+    direction = METRICS[metric][1]
+    alerts = []
+
+    def alert(rule: str, severity: str, message: str):
+        alerts.append({
+            'metric': metric,
+            'rule': rule,
+            'severity': severity,
+            'value': value,
+            'baseline': round(previous['baseline'], 2) if previous else None,
+            'z_score': round(z_score, 2) if z_score is not None else None,
+            'message': message
+        })
+
+    if z_score is not None and direction * z_score <= -Z_THRESHOLD:
+        alert('sudden_change', 'warning',
+              f"{metric} {value:g} is {abs(z_score):.1f} standard deviations "
+              f"{'below' if direction > 0 else 'above'} its baseline {previous['baseline']:.1f}")
+
+    if stats['count'] > MIN_OBSERVATIONS:
+        drift = direction * (stats['recent'] - stats['baseline'])
+        limit = DRIFT_POINTS[metric]
+        if drift <= -limit and not stats['drifting']:
+            stats['drifting'] = True
+            alert('drift', 'warning',
+                  f"{metric} is trending {'down' if direction > 0 else 'up'}: recent average "
+                  f"{stats['recent']:.1f} vs baseline {stats['baseline']:.1f}")
+        elif drift > -limit / 2:
+            # Hysteresis: a new drift alert needs the site to recover first
+            stats['drifting'] = False
+
+    if previous is not None:
+        for boundary, severity, description in THRESHOLDS.get(metric, ()):
+            if direction > 0:
+                crossed = previous['last'] >= boundary > value
+            else:
+                crossed = previous['last'] < boundary <= value
+            if crossed:
+                alert('threshold', severity,
+                      f"{metric} {'fell below' if direction > 0 else 'rose to'} {boundary:g} "
+                      f"({description}): {previous['last']:g} -> {value:g}")
+    return alerts
+
+
+class EarlyWarning:
+    """Per-site rolling score statistics and alerts in SQLite."""
+
+    def __init__(self, path: Path = DEFAULT_DB_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.path), timeout=30)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _load(self, site_id: str) -> Dict[str, Stats]:
+        rows = self.connection.execute(
+            "SELECT metric, count, baseline, variance, recent, last, drifting"
+            " FROM site_stats WHERE site_id = ?", (site_id,)
+        )
+        return {
+            row['metric']: {
+                'count': row['count'], 'baseline': row['baseline'], 'variance': row['variance'],
+                'recent': row['recent'], 'last': row['last'], 'drifting': bool(row['drifting'])
+            }
+            for row in rows
+        }
+
+    def _observe(
+        self,
+        site_id: str,
+        scores: Dict[str, float],
+        at: str,
+        fingerprint: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        if fingerprint is not None:
+            row = self.connection.execute(
+                "SELECT fingerprint FROM site_inputs WHERE site_id = ?", (site_id,)
+            ).fetchone()
+            if row is not None and row['fingerprint'] == fingerprint:
+                return []
+            self.connection.execute(
+                "INSERT OR REPLACE INTO site_inputs VALUES (?, ?, ?)", (site_id, fingerprint, at)
+            )
+
+        current = self._load(site_id)
+        rows, alerts = [], []
+        for metric, value in scores.items():
+            if metric not in METRICS:
+                continue
+            previous = current.get(metric)
+            stats, z_score = update_stats(previous, float(value))
+            for alert in check_rules(metric, previous, stats, float(value), z_score):
+                alerts.append({'site_id': site_id, 'created_at': at, **alert})
+            rows.append((site_id, metric, stats['count'], stats['baseline'], stats['variance'],
+                         stats['recent'], stats['last'], int(stats['drifting']), at))
+
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO site_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+        )
+        for alert in alerts:
+            cursor = self.connection.execute(
+                "INSERT INTO alerts (site_id, metric, rule, severity, value, baseline, z_score, message, created_at)"
+                " VALUES (:site_id, :metric, :rule, :severity, :value, :baseline, :z_score, :message, :created_at)",
+                alert
+            )
+            alert['id'] = cursor.lastrowid
+        return alerts
+
+    def observe(
+        self,
+        site_id: str,
+        scores: Dict[str, float],
+        at: Optional[str] = None,
+        fingerprint: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Record one analysis of a site.
+
+        Args:
+            site_id: Site id (see site_key)
+            scores: Metric values (see scores_from_analysis)
+            at: ISO timestamp of the analysis (default now)
+            fingerprint: Optional input fingerprint (see input_fingerprint);
+                         an analysis with the site's last fingerprint is a
+                         repeat and is skipped
+
+        Returns:
+            Alerts raised by this analysis
+        """
+        return self.observe_many([(site_id, scores, at, fingerprint)])
+
+    def observe_many(self, observations: Iterable[Tuple[Any, ...]]) -> List[Dict[str, Any]]:
+        """
+        Record many analyses in one transaction; returns all raised alerts.
+
+        Observations are (site_id, scores, at) or (site_id, scores, at,
+        fingerprint) tuples.
+        """
+        alerts = []
+        with self.connection:
+            for site_id, scores, at, *fingerprint in observations:
+                alerts.extend(self._observe(site_id, scores, at or datetime.now().isoformat(),
+                                            fingerprint[0] if fingerprint else None))
+        return alerts
+
+    def stats(self, site_id: str) -> Dict[str, Stats]:
+        """Rolling statistics of a site, with the baseline standard deviation."""
+        stats = self._load(site_id)
+        for values in stats.values():
+            values['std'] = math.sqrt(values['variance'])
+        return stats
+
+    def alerts(
+        self,
+        site_id: Optional[str] = None,
+        open_only: bool = False,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Most recent alerts, optionally for one site or unacknowledged only."""
+        query = "SELECT * FROM alerts WHERE 1 = 1"
+        params: List[Any] = []
+        if site_id is not None:
+            query += " AND site_id = ?"
+            params.append(site_id)
+        if open_only:
+            query += " AND acknowledged = 0"
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        return [dict(row) for row in self.connection.execute(query, params)]
+
+    def acknowledge(self, alert_id: int) -> bool:
+        """Mark an alert as handled. Returns False if it does not exist."""
+        with self.connection:
+            cursor = self.connection.execute("UPDATE alerts SET acknowledged = 1 WHERE id = ?", (alert_id,))
+        return cursor.rowcount > 0
+
+
+def default_detector() -> Optional[EarlyWarning]:
+    """
+    Detector configured through EARLY_WARNING_DB (or the default location).
+
+    Returns:
+        EarlyWarning, or None if the database directory has not been created
+    """
+    path = Path(os.getenv('EARLY_WARNING_DB', str(DEFAULT_DB_PATH)))
+    if not path.parent.is_dir():
+        return None
+    return EarlyWarning(path)
+
+
+def parse_observation(entry: Dict[str, Any]) -> Optional[Tuple[str, Dict[str, float], Optional[str], Optional[str]]]:
+    """
+    Observation from one input line.
+
+    Accepts analyzer results, analysis_stream result events, and
+    {"site_id": ..., "scores": {...}} records.
+
+    Returns:
+        (site_id, scores, timestamp, input fingerprint), or None for lines
+        without scores
+    """
+    if entry.get('event') not in (None, 'result') or entry.get('success') is False:
+        return None
+    result = entry.get('result', entry)
+    if 'scores' in entry:
+        scores = entry['scores']
+    elif 'analysis' in result:
+        scores = scores_from_analysis(result['analysis'])
+    else:
+        return None
+    site_id = entry.get('site_id')
+    if site_id is None and 'location' in result:
+        site_id = site_key(result['location']['lat'], result['location']['lon'])
+    if site_id is None:
+        site_id = entry.get('name')
+    if site_id is None:
+        return None
+    return site_id, scores, entry.get('at') or result.get('timestamp'), input_fingerprint(result)
+
+
+def main():
+    """Main entry point for command-line usage."""
+    parser = argparse.ArgumentParser(description="Incremental early warning over site score history")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    observe = commands.add_parser('observe', help="Record analyses (NDJSON) and print raised alerts")
+    observe.add_argument('path', nargs='?', help="NDJSON file (default: stdin)")
+
+    alerts = commands.add_parser('alerts', help="List recent alerts")
+    alerts.add_argument('--site')
+    alerts.add_argument('--open', action='store_true', help="Unacknowledged alerts only")
+    alerts.add_argument('--limit', type=int, default=100)
+
+    stats = commands.add_parser('stats', help="Show a site's rolling statistics")
+    stats.add_argument('site')
+
+    ack = commands.add_parser('ack', help="Acknowledge an alert")
+    ack.add_argument('alert_id', type=int)
+
+    args = parser.parse_args()
+
+    with EarlyWarning(Path(os.getenv('EARLY_WARNING_DB', str(DEFAULT_DB_PATH)))) as detector:
+        if args.command == 'observe':
+            stream = open(args.path) if args.path else sys.stdin
+            observations, skipped = [], 0
+            try:
+                for line in stream:
+                    if not line.strip():
+                        continue
+                    try:
+                        observation = parse_observation(json.loads(line))
+                    except (json.JSONDecodeError, KeyError, TypeError, AttributeError):
+                        observation = None
+                    if observation is None:
+                        skipped += 1
+                    else:
+                        observations.append(observation)
+            finally:
+                if args.path:
+                    stream.close()
+            raised = detector.observe_many(observations)
+            result = {'success': True, 'observed': len(observations), 'skipped': skipped, 'alerts': raised}
+        elif args.command == 'alerts':
+            result = {'success': True, 'alerts': detector.alerts(args.site, args.open, args.limit)}
+        elif args.command == 'stats':
+            site_stats = detector.stats(args.site)
+            result = {'success': bool(site_stats), 'site_id': args.site, 'stats': site_stats}
+        else:
+            result = {'success': detector.acknowledge(args.alert_id), 'alert_id': args.alert_id}
+
+    print(json.dumps(result, indent=2))
+    if not result['success']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
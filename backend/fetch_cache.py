@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Upstream Fetch Cache
+====================
+Stale-while-revalidate and negative caching for the weather and soil APIs.
+
+The last good response of every provider and grid cell is kept on disk.
+Within its fresh TTL it is returned as is. Past the fresh TTL (but within
+the stale limit) it is returned immediately, marked with its age, and a
+background refresh replaces it. Failed calls are remembered per provider
+and cell for a short time, so requests for a failing cell fall back at
+once instead of waiting out the API timeout again.
+
+Background refreshes run in a thread, or in a detached process so that
+short-lived CLI runs can exit without waiting for them.
+
+Layout:
+    <provider>/<row>_<col>.json             last good value and last failure
+    <provider>/<row>_<col>.json.refreshing  refresh in progress
+
+Usage:
+    python fetch_cache.py show <provider> <lat> <lon>
+    python fetch_cache.py refresh <provider> <lat> <lon>
+
+Author: Habitat Canopy Team
+Version: 1.0.0
+"""
+
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional
+
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / 'data' / 'fetch_cache'
+
+# Grid cell size (degrees) per provider; soil varies on a finer scale
+CELL_RESOLUTION = {'weather': 0.1, 'soil': 0.01}
+
+# Seconds a value is served without a refresh
+FRESH_TTL = {'weather': 3600, 'soil': 30 * 86400}
+
+# Seconds a value may be served while it is being refreshed
+MAX_STALE = {'weather': 2 * 86400, 'soil': 365 * 86400}
+
+# Seconds a failed call is remembered
+NEGATIVE_TTL = 120
+
+# Seconds after which an unfinished refresh is assumed dead
+REFRESH_TIMEOUT = 60
+
+Request = Callable[[float, float], Dict[str, Any]]
+Fallback = Callable[[str], Dict[str, Any]]
+
+
+class FetchCache:
+    """Last-known-good values and recent failures per provider and cell."""
+
+    def __init__(self, root: Path = DEFAULT_CACHE_DIR, background: str = 'thread'):
+        """
+        Args:
+            root: Cache directory
+            background: 'thread', 'process' or 'none' (refresh only on demand)
+        """
+        if background not in ('thread', 'process', 'none'):
+            raise ValueError(f"Unknown background refresh mode: {background}")
+        self.root = Path(root)
+        self.background = background
+        self._threads: List[threading.Thread] = []
+
+    def _path(self, provider: str, lat: float, lon: float) -> Path:
+        resolution = CELL_RESOLUTION.get(provider, 0.1)
+        row = math.floor(round(lat / resolution, 6))
+        col = math.floor(round(lon / resolution, 6))
+        return self.root / provider / f"{row}_{col}.json"
+
+    def entry(self, provider: str, lat: float, lon: float) -> Dict[str, Any]:
+        """Stored entry of a cell ({} if there is none)."""
+        try:
+            with open(self._path(provider, lat, lon)) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _update(self, provider: str, lat: float, lon: float, **fields):
+        path = self._path(provider, lat, lon)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {**self.entry(provider, lat, lon), **fields}
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def is_cached(self, provider: str, lat: float, lon: float) -> bool:
+        """Whether a cell has a value that can be served without a live call."""
+        value_age = self._value_age(self.entry(provider, lat, lon), time.time())
+        return value_age is not None and value_age <= MAX_STALE.get(provider, 0)
+
+    @staticmethod
+    def _value_age(entry: Dict[str, Any], now: float) -> Optional[float]:
+        if 'value' not in entry:
+            return None
+        return now - entry['fetched_at']
+
+    @staticmethod
+    def _recent_failure(entry: Dict[str, Any], now: float) -> Optional[float]:
+        failed_at = entry.get('failed_at')
+        if failed_at is None or failed_at < entry.get('fetched_at', 0):
+            return None
+        age = now - failed_at
+        return age if age < NEGATIVE_TTL else None
+
+    def fetch(
+        self,
+        provider: str,
+        lat: float,
+        lon: float,
+        request: Request,
+        fallback: Fallback
+    ) -> Dict[str, Any]:
+        """
+        Provider data for a location, served from the cache where possible.
+
+        Args:
+            provider: Provider name ('weather', 'soil')
+            lat: Latitude
+            lon: Longitude
+            request: Live call, raising on failure
+            fallback: Builds the mock result from an error message
+
+        Returns:
+            Provider data with a "cache" block giving the status
+            (fresh, stale, miss or negative) and the value's age in seconds
+        """
+        now = time.time()
+        entry = self.entry(provider, lat, lon)
+        value_age = self._value_age(entry, now)
+        failure_age = self._recent_failure(entry, now)
+
+        if value_age is not None and value_age <= MAX_STALE.get(provider, 0):
+            stale = value_age > FRESH_TTL.get(provider, 0)
+            if stale and failure_age is None:
+                self._start_refresh(provider, lat, lon, request)
+            return {
+                **entry['value'],
+                'cache': {'status': 'stale' if stale else 'fresh', 'age_seconds': round(value_age)}
+            }
+
+        if failure_age is not None:
+            result = fallback(f"{entry.get('error')} (cached failure)")
+            result['cache'] = {'status': 'negative', 'failed_seconds_ago': round(failure_age)}
+            return result
+
+        try:
+            value = self.refresh(provider, lat, lon, request)
+        except Exception as e:
+            print(f"Warning: {provider} API failed - {str(e)}", file=sys.stderr)
+            result = fallback(str(e))
+            result['cache'] = {'status': 'miss'}
+            return result
+        return {**value, 'cache': {'status': 'miss', 'age_seconds': 0}}
+
+    def refresh(self, provider: str, lat: float, lon: float, request: Request) -> Dict[str, Any]:
+        """
+        Call the provider and store the result (or the failure).
+
+        Returns:
+            The new value; the provider's exception is re-raised on failure
+        """
+        try:
+            value = request(lat, lon)
+        except Exception as e:
+            self._update(provider, lat, lon, failed_at=time.time(), error=str(e))
+            raise
+        self._update(provider, lat, lon, value=value, fetched_at=time.time())
+        return value
+
+    def _claim_refresh(self, provider: str, lat: float, lon: float) -> bool:
+        lock = self._path(provider, lat, lon).with_suffix('.json.refreshing')
+        try:
+            if time.time() - lock.stat().st_mtime > REFRESH_TIMEOUT:
+                lock.unlink()
+        except FileNotFoundError:
+            pass
+        try:
+            os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return False
+        return True
+
+    def _release_refresh(self, provider: str, lat: float, lon: float):
+        try:
+            self._path(provider, lat, lon).with_suffix('.json.refreshing').unlink()
+        except FileNotFoundError:
+            pass
+
+    def refresh_claimed(self, provider: str, lat: float, lon: float, request: Request):
+        """Run a claimed background refresh, recording failures quietly."""
+        try:
+            self.refresh(provider, lat, lon, request)
+        except Exception as e:
+            print(f"Warning: {provider} background refresh failed - {str(e)}", file=sys.stderr)
+        finally:
+            self._release_refresh(provider, lat, lon)
+
+    def _start_refresh(self, provider: str, lat: float, lon: float, request: Request):
+        if self.background == 'none' or not self._claim_refresh(provider, lat, lon):
+            return
+        if self.background == 'thread':
+            thread = threading.Thread(
+                target=self.refresh_claimed, args=(provider, lat, lon, request), daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+            return
+        try:
+            subprocess.Popen(
+                [sys.executable, str(Path(__file__).resolve()), 'refresh', provider,
+                 repr(lat), repr(lon), '--claimed'],
+                env={**os.environ, 'FETCH_CACHE_DIR': str(self.root)},
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                start_new_session=True
+            )
+        except OSError as e:
+            print(f"Warning: Could not start {provider} refresh - {str(e)}", file=sys.stderr)
+            self._release_refresh(provider, lat, lon)
+
+    def wait(self, timeout: Optional[float] = None):
+        """Wait for background refresh threads started by this instance."""
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+
+
+def default_cache() -> Optional[FetchCache]:
+    """
+    Cache configured through FETCH_CACHE_DIR (or the default location).
+    FETCH_CACHE_REFRESH selects the background mode (default 'process').
+
+    Returns:
+        FetchCache, or None if the cache directory has not been created
+    """
+    root = Path(os.getenv('FETCH_CACHE_DIR', str(DEFAULT_CACHE_DIR)))
+    if not root.is_dir():
+        return None
+    return FetchCache(root, os.getenv('FETCH_CACHE_REFRESH', 'process'))
+
+
+def main():
+    """Main entry point for command-line usage."""
+    parser = argparse.ArgumentParser(description="Upstream fetch cache")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    show = commands.add_parser('show', help="Print the cached entry of a location")
+    refresh = commands.add_parser('refresh', help="Refresh a location from the provider")
+    refresh.add_argument('--claimed', action='store_true', help=argparse.SUPPRESS)
+    for command in (show, refresh):
+        command.add_argument('provider', choices=sorted(CELL_RESOLUTION))
+        command.add_argument('lat', type=float)
+        command.add_argument('lon', type=float)
+
+    args = parser.parse_args()
+    cache = FetchCache(Path(os.getenv('FETCH_CACHE_DIR', str(DEFAULT_CACHE_DIR))), background='none')
+
+    if args.command == 'show':
+        entry = cache.entry(args.provider, args.lat, args.lon)
+        print(json.dumps({'success': bool(entry), 'entry': entry}, indent=2))
+        return
+
+    from site_analyzer_with_apis import UPSTREAM_REQUESTS
+    request = UPSTREAM_REQUESTS[args.provider]
+    if args.claimed:
+        cache.refresh_claimed(args.provider, args.lat, args.lon, request)
+        return
+    try:
+        value = cache.refresh(args.provider, args.lat, args.lon, request)
+    except Exception as e:
+        print(json.dumps({'success': False, 'error': str(e)}, indent=2))
+        sys.exit(1)
+    print(json.dumps({'success': True, 'value': value}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
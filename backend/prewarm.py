@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Scheduled Cache Pre-Warming
+===========================
+Refreshes the upstream inputs of active project sites before the morning
+dashboard peak, so the first views of the day read warm data.
+
+Sites are warmed in order of recent dashboard views (exponentially
+decayed, so this week's favourites come first). Every weather and soil
+value that would no longer be fresh at peak time is refreshed through the
+fetch cache. Calls are paced by a token bucket per provider to stay within
+the provider's rate limit, and warming stops at the peak. Sites covered by
+the local soil mirror need no soil call. NDVI is estimated locally and
+needs no warming; when the result store is enabled, each warmed site is
+also analyzed so the stored dashboard result is current.
+
+Views are recorded by the analyzer CLI in an append-only log.
+
+Usage:
+    python prewarm.py run --sites sites.json [--until 08:00]
+    python prewarm.py run --catalog catalog.bin --project "Western Ghats"
+    python prewarm.py schedule --sites sites.json --peak 08:00 --lead-minutes 30
+    python prewarm.py views [--top 20]
+
+Author: Habitat Canopy Team
+Version: 1.0.0
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple
+
+import fetch_cache
+import soil_mirror
+
+
+DEFAULT_PREWARM_DIR = Path(__file__).parent / 'data' / 'prewarm'
+
+# Views older than the window are dropped; weight halves every half-life
+VIEW_WINDOW_DAYS = 14
+VIEW_HALF_LIFE_DAYS = 3.0
+
+# (requests per second, burst) each provider allows. OpenWeatherMap's
+# free tier allows 60 calls per minute; SoilGrids asks for at most 5.
+RATE_LIMITS = {
+    'weather': (1.0, 10),
+    'soil': (5 / 60, 2)
+}
+
+# Upstream HTTP requests made by one refresh
+PROVIDER_CALLS = {'weather': 1, 'soil': 2}
+
+DEFAULT_PEAK = "08:00"
+DEFAULT_LEAD_MINUTES = 30  # weather stays fresh (1 h) well into the peak
+
+
+class TokenBucket:
+    """Token bucket rate limiter with an injectable clock."""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens: float = 1, deadline: Optional[float] = None) -> bool:
+        """
+        Wait until enough tokens are available and take them.
+
+        Args:
+            tokens: Tokens needed
+            deadline: Clock time after which to give up instead of waiting
+
+        Returns:
+            True if the tokens were taken, False if the wait would pass the deadline
+        """
+        self._refill()
+        while self.tokens < tokens:
+            wait = (tokens - self.tokens) / self.rate
+            if deadline is not None and self.clock() + wait > deadline:
+                return False
+            self.sleep(wait)
+            self._refill()
+        self.tokens -= tokens
+        return True
+
+
+def location_key(lat: float, lon: float) -> Tuple[float, float]:
+    """Key under which views of a location are counted."""
+    return (round(lat, 4), round(lon, 4))
+
+
+class ViewLog:
+    """Append-only log of dashboard views ("timestamp lat lon" per line)."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def record(self, lat: float, lon: float, now: Optional[float] = None):
+        """Append one view of a location."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a') as f:
+            f.write(f"{now if now is not None else time.time():.0f} {lat:.4f} {lon:.4f}\n")
+
+    def _views(self) -> Iterable[Tuple[float, float, float]]:
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) == 3:
+                        yield float(parts[0]), float(parts[1]), float(parts[2])
+        except FileNotFoundError:
+            return
+
+    def scores(self, now: Optional[float] = None) -> Dict[Tuple[float, float], float]:
+        """Decayed view count per location over the view window."""
+        now = now if now is not None else time.time()
+        cutoff = now - VIEW_WINDOW_DAYS * 86400
+        half_life = VIEW_HALF_LIFE_DAYS * 86400
+        scores: Dict[Tuple[float, float], float] = {}
+        for timestamp, lat, lon in self._views():
+            if timestamp >= cutoff:
+                key = location_key(lat, lon)
+                scores[key] = scores.get(key, 0.0) + 0.5 ** ((now - timestamp) / half_life)
+        return scores
+
+    def compact(self, now: Optional[float] = None) -> int:
+        """
+        Drop views older than the window. Views appended while compacting
+        may be lost, which only slightly skews the counts.
+
+        Returns:
+            Number of views kept
+        """
+        now = now if now is not None else time.time()
+        cutoff = now - VIEW_WINDOW_DAYS * 86400
+        kept = [view for view in self._views() if view[0] >= cutoff]
+        if not self.path.exists():
+            return 0
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            for timestamp, lat, lon in kept:
+                f.write(f"{timestamp:.0f} {lat:.4f} {lon:.4f}\n")
+        os.replace(tmp_path, self.path)
+        return len(kept)
+
+
+def default_view_log() -> Optional[ViewLog]:
+    """
+    View log configured through PREWARM_DIR (or the default location).
+
+    Returns:
+        ViewLog, or None if pre-warming has not been set up
+    """
+    root = Path(os.getenv('PREWARM_DIR', str(DEFAULT_PREWARM_DIR)))
+    if not root.is_dir():
+        return None
+    return ViewLog(root / 'views.log')
+
+
+def prioritize(sites: Iterable[Dict[str, Any]], scores: Dict[Tuple[float, float], float]) -> List[Dict[str, Any]]:
+    """Sites ordered by decayed view count, most viewed first (stable)."""
+    return sorted(
+        sites,
+        key=lambda site: -scores.get(location_key(float(site['lat']), float(site['lon'])), 0.0)
+    )
+
+
+def needs_refresh(cache: fetch_cache.FetchCache, provider: str, lat: float, lon: float, at_time: float) -> bool:
+    """Whether a cached value will no longer be fresh at the given time."""
+    entry = cache.entry(provider, lat, lon)
+    if 'value' not in entry:
+        return True
+    return at_time - entry['fetched_at'] > fetch_cache.FRESH_TTL[provider]
+
+
+def prewarm(
+    sites: Iterable[Dict[str, Any]],
+    cache: fetch_cache.FetchCache,
+    requests: Dict[str, Callable[[float, float], Dict[str, Any]]],
+    view_scores: Optional[Dict[Tuple[float, float], float]] = None,
+    buckets: Optional[Dict[str, TokenBucket]] = None,
+    peak: Optional[float] = None,
+    deadline: Optional[float] = None,
+    analyze: Optional[Callable[[float, float], Any]] = None,
+    covered_by_mirror: Optional[Callable[[float, float], bool]] = None
+) -> Dict[str, Any]:
+    """
+    Refresh the cached inputs of sites, most viewed first.
+
+    Args:
+        sites: Dicts with lat, lon and optional name
+        cache: Fetch cache to warm
+        requests: Live provider calls keyed by provider name
+        view_scores: Decayed view counts per location_key
+        buckets: Rate limiter per provider (defaults to RATE_LIMITS)
+        peak: Wall-clock time the values must still be fresh at
+              (defaults to now)
+        deadline: Bucket-clock time at which warming stops
+        analyze: Optional callback run after a site's inputs are warm
+        covered_by_mirror: Optional predicate for sites the soil mirror serves
+
+    Returns:
+        Summary with per-provider call counts and per-site outcomes
+    """
+    if buckets is None:
+        buckets = {name: TokenBucket(rate, burst) for name, (rate, burst) in RATE_LIMITS.items()}
+    peak = peak if peak is not None else time.time()
+
+    summary: Dict[str, Any] = {
+        'warmed': 0, 'already_warm': 0, 'failed': 0, 'skipped': 0,
+        'calls': dict.fromkeys(requests, 0), 'sites': []
+    }
+    stopped = False
+
+    for site in prioritize(sites, view_scores or {}):
+        lat, lon = float(site['lat']), float(site['lon'])
+        outcome = {'name': site.get('name'), 'lat': lat, 'lon': lon, 'refreshed': [], 'failed': []}
+
+        if stopped:
+            summary['skipped'] += 1
+            outcome['status'] = 'skipped'
+            summary['sites'].append(outcome)
+            continue
+
+        for provider, request in requests.items():
+            if provider == 'soil' and covered_by_mirror and covered_by_mirror(lat, lon):
+                continue
+            if not needs_refresh(cache, provider, lat, lon, peak):
+                continue
+            bucket = buckets[provider]
+            if not bucket.acquire(PROVIDER_CALLS.get(provider, 1), deadline):
+                stopped = True
+                break
+            summary['calls'][provider] += PROVIDER_CALLS.get(provider, 1)
+            try:
+                cache.refresh(provider, lat, lon, request)
+                outcome['refreshed'].append(provider)
+            except Exception as e:
+                print(f"Warning: Pre-warm {provider} failed for {lat}, {lon} - {str(e)}", file=sys.stderr)
+                outcome['failed'].append(provider)
+
+        if stopped and not outcome['refreshed']:
+            outcome['status'] = 'skipped'
+        elif outcome['failed']:
+            outcome['status'] = 'failed'
+        elif outcome['refreshed']:
+            outcome['status'] = 'warmed'
+        else:
+            outcome['status'] = 'already_warm'
+
+        # One failing re-analysis must not stop the remaining sites
+        if analyze is not None and outcome['status'] != 'skipped':
+            try:
+                analyze(lat, lon)
+            except Exception as e:
+                print(f"Warning: Pre-warm analysis failed for {lat}, {lon} - {str(e)}", file=sys.stderr)
+                outcome['failed'].append('analysis')
+                outcome['status'] = 'failed'
+
+        summary[outcome['status']] += 1
+        summary['sites'].append(outcome)
+
+    return summary
+
+
+def next_run(peak: str, lead_minutes: float, now: datetime) -> Tuple[datetime, datetime]:
+    """
+    Next pre-warming start and the peak it prepares for.
+
+    Args:
+        peak: Daily peak time as "HH:MM"
+        lead_minutes: How long before the peak warming starts
+        now: Current time
+
+    Returns:
+        Tuple of (start, peak) datetimes
+    """
+    hour, minute = (int(part) for part in peak.split(':'))
+    peak_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if peak_time <= now:
+        peak_time += timedelta(days=1)
+    start = peak_time - timedelta(minutes=lead_minutes)
+    return max(start, now), peak_time
+
+
+def load_sites(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Active sites from a JSON file or a site catalog project."""
+    if args.catalog:
+        from site_catalog import SiteCatalog
+        with SiteCatalog(Path(args.catalog)) as catalog:
+            return list(catalog.project(args.project)) if args.project else list(catalog.bbox(-90, -180, 90, 180))
+    with open(args.sites) as f:
+        sites = json.load(f)
+    return sites['sites'] if isinstance(sites, dict) else sites
+
+
+def run_once(sites: List[Dict[str, Any]], peak_time: datetime) -> Dict[str, Any]:
+    """Warm the live caches for a peak, stopping when it starts."""
+    from site_analyzer_with_apis import UPSTREAM_REQUESTS, analyze_site_from_location
+    import result_store
+
+    cache = fetch_cache.FetchCache(
+        Path(os.getenv('FETCH_CACHE_DIR', str(fetch_cache.DEFAULT_CACHE_DIR))), background='none'
+    )
+    views = ViewLog(Path(os.getenv('PREWARM_DIR', str(DEFAULT_PREWARM_DIR))) / 'views.log')
+    views.compact()
+    mirror = soil_mirror.default_mirror()
+
+    # Stop at the peak; a run for the current moment warms everything
+    remaining = (peak_time - datetime.now()).total_seconds()
+    deadline = time.monotonic() + remaining if remaining > 0 else None
+    summary = prewarm(
+        sites,
+        cache,
+        UPSTREAM_REQUESTS,
+        view_scores=views.scores(),
+        peak=peak_time.timestamp(),
+        deadline=deadline,
+        analyze=analyze_site_from_location if result_store.default_store() is not None else None,
+        covered_by_mirror=(lambda lat, lon: mirror.sample(lat, lon) is not None) if mirror else None
+    )
+    summary['peak'] = peak_time.isoformat()
+    return summary
+
+
+def main():
+    """Main entry point for command-line usage."""
+    parser = argparse.ArgumentParser(description="Scheduled cache pre-warming")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="Warm all sites now")
+    schedule = commands.add_parser('schedule', help="Warm all sites before every daily peak")
+    for command in (run, schedule):
+        source = command.add_mutually_exclusive_group(required=True)
+        source.add_argument('--sites', help="JSON file with a list of {lat, lon, name} sites")
+        source.add_argument('--catalog', help="Site catalog file")
+        command.add_argument('--project', help="Only warm this catalog project")
+    run.add_argument('--until', default=None, metavar='HH:MM',
+                     help="Peak the values must be fresh for (default: now)")
+    schedule.add_argument('--peak', default=DEFAULT_PEAK, metavar='HH:MM')
+    schedule.add_argument('--lead-minutes', type=float, default=DEFAULT_LEAD_MINUTES)
+
+    views = commands.add_parser('views', help="Most viewed locations")
+    views.add_argument('--top', type=int, default=20)
+
+    args = parser.parse_args()
+
+    if args.command == 'views':
+        log = ViewLog(Path(os.getenv('PREWARM_DIR', str(DEFAULT_PREWARM_DIR))) / 'views.log')
+        ranked = sorted(log.scores().items(), key=lambda item: -item[1])[:args.top]
+        print(json.dumps([
+            {'lat': lat, 'lon': lon, 'score': round(score, 2)} for (lat, lon), score in ranked
+        ], indent=2))
+        return
+
+    if args.command == 'run':
+        now = datetime.now()
+        peak_time = next_run(args.until, 0, now)[1] if args.until else now
+        print(json.dumps({'success': True, **run_once(load_sites(args), peak_time)}, indent=2))
+        return
+
+    while True:
+        start, peak_time = next_run(args.peak, args.lead_minutes, datetime.now())
+        print(f"Next pre-warm at {start.isoformat()} for the {peak_time.isoformat()} peak", file=sys.stderr)
+        time.sleep(max(0.0, (start - datetime.now()).total_seconds()))
+        try:
+            summary = run_once(load_sites(args), peak_time)
+            summary.pop('sites')
+            print(json.dumps(summary), flush=True)
+        except Exception as e:
+            print(f"Warning: Pre-warm run failed - {str(e)}", file=sys.stderr)
+        # Do not start again for the same peak
+        time.sleep(max(0.0, (peak_time - datetime.now()).total_seconds()) + 1)
+
+
+if __name__ == "__main__":
+    main()
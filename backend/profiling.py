@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Analyzer Profiling
+==================
+Profiles whole analyzer runs from their command-line entry points.
+
+Pass --profile (sampled stacks) or --profile=cprofile to
+site_analyzer.py or site_analyzer_with_apis.py, or set
+PROFILE_SAMPLE_RATE (e.g. 0.01) to profile that fraction of runs
+automatically in production.
+
+Sampling mode reads the main thread's stack from a background thread
+every few milliseconds. It costs little, so it can stay on for a sampled
+fraction of requests, and it writes collapsed stacks ("a;b;c count") that
+flamegraph.pl, speedscope or inferno render directly. cProfile mode
+records every call for exact counts and writes a .pstats file.
+
+Both modes split wall time into network wait, JSON handling, scoring and
+other work, and write the split to a .json report next to the profile.
+A one-line summary goes to stderr so stdout stays valid JSON.
+
+Usage:
+    python site_analyzer_with_apis.py 14.0 75.5 --profile
+    python site_analyzer.py --profile=cprofile '{"ndvi": 0.35, ...}'
+    python profiling.py merge data/profiles/*.collapsed > all.collapsed
+    python profiling.py summary data/profiles/*.json
+
+Author: Habitat Canopy Team
+Version: 1.0.0
+"""
+
+import argparse
+import cProfile
+import json
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+
+DEFAULT_PROFILE_DIR = Path(__file__).parent / 'data' / 'profiles'
+DEFAULT_INTERVAL = 0.005  # seconds between stack samples
+
+MODES = ("sample", "cprofile")
+CATEGORIES = ("network", "json", "scoring", "other")
+
+# Modules whose frames mean the run is waiting on the network
+NETWORK_MODULES = ("socket.py", "ssl.py", "http/client.py", "urllib/request.py", "urllib/response.py")
+NETWORK_BUILTINS = ("socket", "ssl", "recv", "connect", "getaddrinfo", "select", "poll")
+
+JSON_MODULES = ("json/__init__.py", "json/decoder.py", "json/encoder.py", "json/scanner.py")
+
+# Files and functions that compute scores
+SCORING_FILES = ("batch_scoring.py", "species_matcher.py", "uncertainty.py", "scenario_weights.py")
+SCORING_FUNCTIONS = (
+    "calculate_vegetation_health_score",
+    "calculate_soil_suitability_score",
+    "calculate_climate_stress_score",
+    "calculate_site_suitability",
+    "score_site_inputs",
+    "recommended_species"
+)
+
+
+def categorize(frames: List[Tuple[str, str]]) -> str:
+    """
+    Category of a stack, innermost frame first.
+
+    Args:
+        frames: (filename, function) pairs from the innermost frame outwards
+
+    Returns:
+        One of CATEGORIES
+    """
+    for filename, function in frames:
+        path = filename.replace('\\', '/')
+        if path.endswith(NETWORK_MODULES):
+            return "network"
+        if path.endswith(JSON_MODULES):
+            return "json"
+        if path.endswith(SCORING_FILES) or function in SCORING_FUNCTIONS:
+            return "scoring"
+    return "other"
+
+
+def frame_label(filename: str, function: str) -> str:
+    """Flamegraph label of a frame (file name without directories)."""
+    return f"{Path(filename).name}:{function}"
+
+
+class StackSampler:
+    """Samples one thread's stack at a fixed interval from a helper thread."""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.stacks: Dict[str, int] = {}
+        self.split = dict.fromkeys(CATEGORIES, 0.0)
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            if frame is None:
+                continue
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append((code.co_filename, code.co_name))
+                frame = frame.f_back
+            stack = ';'.join(frame_label(*entry) for entry in reversed(frames))
+            self.stacks[stack] = self.stacks.get(stack, 0) + 1
+            self.split[categorize(frames)] += elapsed
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Collapsed-stack lines, heaviest first."""
+        return ''.join(
+            f"{stack} {count}\n"
+            for stack, count in sorted(self.stacks.items(), key=lambda item: -item[1])
+        )
+
+
+def _own_category(function: Tuple[str, int, str]) -> Optional[str]:
+    filename, _, name = function
+    if filename == '~':
+        if any(word in name for word in NETWORK_BUILTINS):
+            return "network"
+        return "json" if "json" in name or "scanner" in name else None
+    category = categorize([(filename, name)])
+    return None if category == "other" else category
+
+
+def cprofile_split(stats: pstats.Stats) -> Dict[str, float]:
+    """
+    Time per category from cProfile statistics.
+
+    Each function's self time goes to its own category or, for helpers
+    such as builtins, to the category of its heaviest caller chain.
+    """
+    categories: Dict[Tuple[str, int, str], str] = {}
+
+    def category_of(function, seen=()) -> str:
+        if function in categories:
+            return categories[function]
+        category = _own_category(function)
+        if category is None:
+            callers = stats.stats.get(function, (0, 0, 0, 0, {}))[4]
+            heaviest = max(
+                (caller for caller in callers if caller not in seen),
+                key=lambda caller: callers[caller][3],
+                default=None
+            )
+            category = "other" if heaviest is None else category_of(heaviest, seen + (function,))
+        if not seen:
+            categories[function] = category
+        return category
+
+    split = dict.fromkeys(CATEGORIES, 0.0)
+    for function, (_, _, self_time, _, _) in stats.stats.items():
+        split[category_of(function)] += self_time
+    return split
+
+
+def _env_float(name: str, default: float) -> float:
+    """Non-negative float from an environment variable; warns and uses the default if invalid."""
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        number = float(value)
+        if not number >= 0:
+            raise ValueError("must not be negative")
+        return number
+    except ValueError as e:
+        print(f"Warning: Ignoring {name}={value!r} - {str(e)}", file=sys.stderr)
+        return default
+
+
+def resolve_mode(argv: List[str]) -> Optional[str]:
+    """
+    Remove --profile flags from argv and decide whether to profile this run.
+
+    An unknown --profile=MODE is rejected like any other bad command-line
+    argument: usage on stderr and exit status 2.
+
+    Returns:
+        Profiling mode, or None for an unprofiled run
+    """
+    flags = [argument for argument in argv[1:]
+             if argument == '--profile' or argument.startswith('--profile=')]
+    if flags:
+        for argument in flags:
+            argv.remove(argument)
+        # Only the profile flags are parsed here; the entry point parses the rest
+        parser = argparse.ArgumentParser(prog=os.path.basename(argv[0]), allow_abbrev=False)
+        parser.add_argument('--profile', choices=MODES)
+        options = parser.parse_args(['--profile=sample' if flag == '--profile' else flag for flag in flags])
+        return options.profile
+
+    # A malformed rate only disables profiling, it never fails the run
+    rate = _env_float('PROFILE_SAMPLE_RATE', 0.0)
+    if rate > 0 and random.random() < rate:
+        return "sample"
+    return None
+
+
+def write_report(
+    entry: str,
+    mode: str,
+    wall: float,
+    split: Dict[str, float],
+    samples: Optional[int] = None
+) -> Dict[str, Any]:
+    """Wall-time split report, with each category's share of the run."""
+    total = sum(split.values()) or 1.0
+    return {
+        "entry": entry,
+        "mode": mode,
+        "started_at": datetime.now().isoformat(),
+        "wall_seconds": round(wall, 4),
+        "samples": samples,
+        "split_seconds": {name: round(value, 4) for name, value in split.items()},
+        "split_fraction": {name: round(value / total, 3) for name, value in split.items()}
+    }
+
+
+@contextmanager
+def session(entry: str, argv: Optional[List[str]] = None) -> Iterator[Optional[str]]:
+    """
+    Profile the enclosed entry point run if requested.
+
+    Strips --profile flags from argv (sys.argv by default) before the entry
+    point parses it, and writes the profile and report to PROFILE_DIR when
+    the run ends, including runs that exit through sys.exit. A profile that
+    cannot be written only produces a warning on stderr.
+
+    Args:
+        entry: Entry point name used in file names
+        argv: Argument list to read and modify
+
+    Yields:
+        The profiling mode, or None
+    """
+    argv = sys.argv if argv is None else argv
+    mode = resolve_mode(argv)
+    if mode is None:
+        yield None
+        return
+
+    out_dir = Path(os.getenv('PROFILE_DIR', str(DEFAULT_PROFILE_DIR)))
+    name = f"{entry}-{datetime.now().strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+    started = time.perf_counter()
+
+    if mode == "sample":
+        sampler = StackSampler(_env_float('PROFILE_INTERVAL', DEFAULT_INTERVAL) or DEFAULT_INTERVAL)
+        sampler.start()
+        try:
+            yield mode
+        finally:
+            sampler.stop()
+            wall = time.perf_counter() - started
+            try:
+                out_dir.mkdir(parents=True, exist_ok=True)
+                (out_dir / f"{name}.collapsed").write_text(sampler.collapsed())
+                report = write_report(entry, mode, wall, sampler.split, sampler.samples)
+                report["profile"] = str(out_dir / f"{name}.collapsed")
+                _finish(out_dir / f"{name}.json", report)
+            except Exception as e:
+                _warn_unsaved(out_dir, e)
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield mode
+    finally:
+        profiler.disable()
+        wall = time.perf_counter() - started
+        try:
+            out_dir.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(str(out_dir / f"{name}.pstats"))
+            report = write_report(entry, mode, wall, cprofile_split(pstats.Stats(profiler)))
+            report["profile"] = str(out_dir / f"{name}.pstats")
+            _finish(out_dir / f"{name}.json", report)
+        except Exception as e:
+            _warn_unsaved(out_dir, e)
+
+
+def _warn_unsaved(out_dir: Path, error: Exception):
+    # The entry point has already produced its output; a profile that
+    # cannot be written must not turn the run into a failure
+    print(f"Warning: Could not write profile to {out_dir} - {str(error)}", file=sys.stderr)
+
+
+def _finish(path: Path, report: Dict[str, Any]):
+    path.write_text(json.dumps(report, indent=2))
+    fractions = ', '.join(f"{name} {share:.0%}" for name, share in report["split_fraction"].items())
+    print(f"Profile: {report['wall_seconds']:.3f}s ({fractions}) -> {report['profile']}", file=sys.stderr)
+
+
+def merge_collapsed(paths: List[Path]) -> Dict[str, int]:
+    """Sum the sample counts of several collapsed-stack files."""
+    stacks: Dict[str, int] = {}
+    for path in paths:
+        for line in Path(path).read_text().splitlines():
+            stack, _, count = line.rpartition(' ')
+            if stack:
+                stacks[stack] = stacks.get(stack, 0) + int(count)
+    return stacks
+
+
+def main():
+    """Main entry point for command-line usage."""
+    parser = argparse.ArgumentParser(description="Analyzer profiling tools")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    merge = commands.add_parser('merge', help="Merge collapsed-stack files (for one flamegraph)")
+    merge.add_argument('paths', nargs='+')
+
+    summary = commands.add_parser('summary', help="Aggregate the time split of profile reports")
+    summary.add_argument('paths', nargs='+')
+
+    args = parser.parse_args()
+
+    if args.command == 'merge':
+        stacks = merge_collapsed([Path(path) for path in args.paths])
+        for stack, count in sorted(stacks.items(), key=lambda item: -item[1]):
+            print(f"{stack} {count}")
+        return
+
+    totals = dict.fromkeys(CATEGORIES, 0.0)
+    wall = 0.0
+    runs = 0
+    for path in args.paths:
+        report = json.loads(Path(path).read_text())
+        runs += 1
+        wall += report["wall_seconds"]
+        for name, value in report["split_seconds"].items():
+            totals[name] = totals.get(name, 0.0) + value
+    total = sum(totals.values()) or 1.0
+    print(json.dumps({
+        "runs": runs,
+        "mean_wall_seconds": round(wall / runs, 4) if runs else None,
+        "split_fraction": {name: round(value / total, 3) for name, value in totals.items()}
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Analysis Result Store
+=====================
+Content-addressed store of analysis records, so identical re-analyses and
+dashboard refreshes read a stored record instead of rerunning the analyzer.
+
+Records are keyed by a SHA-256 hash of the exact inputs, the rule-table
+versions (site_analyzer.RULE_VERSIONS) and the data provider versions.
+Component results (vegetation, soil, climate) are stored separately under
+keys that only include their own rule version, so bumping one rule table
+recomputes that component and the final combination while the other
+components are reused. Inputs are not rounded for keys: a few hundredths
+can move a value across a band edge, and every result reports the raw
+values it was scored from.
+
+Layout:
+    objects/ab/cdef...json   records named by their key (immutable, except
+                             location records, which are refreshed in place)
+    refs/<name>              latest record key for a location
+
+Usage:
+    python result_store.py analyze '{"ndvi": 0.35, "soil_ph": 6.5, ...}'
+    python result_store.py latest <lat> <lon> [--max-age SECONDS]
+
+Author: Habitat Canopy Team
+Version: 1.0.0
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from site_analyzer import (
+    RULE_VERSIONS,
+    calculate_vegetation_health_score,
+    calculate_soil_suitability_score,
+    calculate_climate_stress_score,
+    calculate_site_suitability,
+    parse_input_data
+)
+
+
+DEFAULT_STORE_DIR = Path(__file__).parent / 'data' / 'results'
+
+# Decimal places kept per input when hashing inputs for change detection
+INPUT_PRECISION = {
+    "ndvi": 3,
+    "soil_ph": 2,
+    "soil_moisture": 1,
+    "temperature": 1,
+    "rainfall": 1
+}
+
+# Records decoded and kept in memory per store instance
+MEMORY_CACHE_SIZE = 1024
+
+
+def round_inputs(data: Dict[str, Any]) -> Dict[str, float]:
+    """Round analyzer inputs to the precision used for input change detection."""
+    return {
+        field: round(float(data[field]), places)
+        for field, places in INPUT_PRECISION.items()
+    }
+
+
+def record_key(kind: str, payload: Dict[str, Any]) -> str:
+    """Stable SHA-256 key of a record kind and its canonical JSON payload."""
+    canonical = json.dumps({"kind": kind, "payload": payload}, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def location_ref(lat: float, lon: float) -> str:
+    """Ref name under which the latest analysis of a location is recorded."""
+    return f"loc_{lat:.4f}_{lon:.4f}"
+
+
+class ResultStore:
+    """Content-addressed analysis records on local disk."""
+
+    def __init__(self, root: Path = DEFAULT_STORE_DIR):
+        self.root = Path(root)
+        self._memory: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+
+    def _object_path(self, key: str) -> Path:
+        return self.root / 'objects' / key[:2] / f"{key[2:]}.json"
+
+    def _remember(self, key: str, record: Dict[str, Any]):
+        self._memory[key] = record
+        self._memory.move_to_end(key)
+        if len(self._memory) > MEMORY_CACHE_SIZE:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Stored record for a key, or None."""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+        try:
+            with open(self._object_path(key)) as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            return None
+        self._remember(key, record)
+        return record
+
+    def put(self, key: str, record: Dict[str, Any]):
+        """Write a record atomically, replacing any record under the same key."""
+        path = self._object_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(record, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+        self._remember(key, record)
+
+    def set_ref(self, name: str, key: str):
+        """Point a named ref at a record key."""
+        path = self.root / 'refs' / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{name}.{os.getpid()}.tmp")
+        tmp_path.write_text(key)
+        os.replace(tmp_path, path)
+
+    def get_ref(self, name: str) -> Optional[str]:
+        """Record key a ref points at, or None."""
+        try:
+            return (self.root / 'refs' / name).read_text().strip()
+        except FileNotFoundError:
+            return None
+
+    def _component(self, kind: str, payload: Dict[str, Any], compute) -> Tuple[Dict[str, Any], bool]:
+        key = record_key(kind, {**payload, "rules": RULE_VERSIONS[kind]})
+        stored = self.get(key)
+        if stored is not None:
+            return stored["result"], True
+        result = compute()
+        self.put(key, {"kind": kind, "result": result})
+        return result, False
+
+    def analyze(
+        self,
+        data: Dict[str, Any],
+        providers: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Return the stored analysis for these inputs, computing it if needed.
+
+        Args:
+            data: Analyzer inputs (ndvi, soil_ph, soil_moisture,
+                  temperature, rainfall)
+            providers: Optional data provider versions the inputs came from
+
+        Returns:
+            Analysis record with input_data, analysis, rules, providers,
+            record_key and a "cached" flag
+        """
+        inputs = {field: float(data[field]) for field in INPUT_PRECISION}
+        providers = providers or {}
+        key = record_key("analysis", {"inputs": inputs, "rules": RULE_VERSIONS, "providers": providers})
+
+        stored = self.get(key)
+        if stored is not None:
+            return {**stored, "cached": True}
+
+        reused: List[str] = []
+        vegetation_health, hit = self._component(
+            "vegetation", {"ndvi": inputs["ndvi"]},
+            lambda: calculate_vegetation_health_score(inputs["ndvi"])
+        )
+        if hit:
+            reused.append("vegetation")
+        soil_suitability, hit = self._component(
+            "soil", {"soil_ph": inputs["soil_ph"], "soil_moisture": inputs["soil_moisture"]},
+            lambda: calculate_soil_suitability_score(inputs["soil_ph"], inputs["soil_moisture"])
+        )
+        if hit:
+            reused.append("soil")
+        climate_stress, hit = self._component(
+            "climate", {"temperature": inputs["temperature"], "rainfall": inputs["rainfall"]},
+            lambda: calculate_climate_stress_score(inputs["temperature"], inputs["rainfall"])
+        )
+        if hit:
+            reused.append("climate")
+
+        record = {
+            "record_key": key,
+            "created_at": datetime.now().isoformat(),
+            "rules": RULE_VERSIONS,
+            "providers": providers,
+            "input_data": inputs,
+            "analysis": {
+                "vegetation_health": vegetation_health,
+                "soil_suitability": soil_suitability,
+                "climate_stress": climate_stress,
+                "site_suitability": calculate_site_suitability(
+                    vegetation_health, soil_suitability, climate_stress
+                )
+            },
+            "reused_components": reused
+        }
+        self.put(key, record)
+        return {**record, "cached": False}
+
+    def latest_for_location(
+        self,
+        lat: float,
+        lon: float,
+        max_age: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Latest stored analysis of a location, if recent enough.
+
+        Args:
+            lat: Latitude
+            lon: Longitude
+            max_age: Optional maximum age in seconds
+
+        Returns:
+            Stored record or None
+        """
+        key = self.get_ref(location_ref(lat, lon))
+        record = self.get(key) if key else None
+        if record is None or "location" not in record:
+            return None
+        if max_age is not None:
+            age = (datetime.now() - datetime.fromisoformat(record["analyzed_at"])).total_seconds()
+            if age > max_age:
+                return None
+        return record
+
+    def record_location(self, lat: float, lon: float, result: Dict[str, Any]) -> str:
+        """
+        Store a full location analysis result and point the location ref at it.
+
+        Args:
+            lat: Latitude
+            lon: Longitude
+            result: Parsed analyze_site_from_location output
+
+        Returns:
+            Key of the stored location record
+        """
+        # One record per location and analysis: refreshing an unchanged
+        # analysis rewrites it with the new timestamp instead of adding one
+        key = record_key("location", {
+            "analysis_key": result["record_key"],
+            "lat": round(lat, 4),
+            "lon": round(lon, 4)
+        })
+        self.put(key, {**result, "analyzed_at": result["timestamp"]})
+        self.set_ref(location_ref(lat, lon), key)
+        return key
+
+
+def default_store() -> Optional[ResultStore]:
+    """
+    Store configured through RESULT_STORE_DIR (or the default location).
+
+    Returns:
+        ResultStore, or None if the store directory has not been created
+    """
+    root = Path(os.getenv('RESULT_STORE_DIR', str(DEFAULT_STORE_DIR)))
+    if not root.is_dir():
+        return None
+    return ResultStore(root)
+
+
+def summary_for(site_suitability: Dict[str, Any]) -> Dict[str, Any]:
+    """Summary block in the shape analyze_site returns."""
+    return {
+        "suitability_score": site_suitability["final_score"],
+        "risk_level": site_suitability["risk_level"],
+        "priority": site_suitability["priority"],
+        "recommendation": site_suitability["recommendation"]
+    }
+
+
+def main():
+    """Main entry point for command-line usage."""
+    parser = argparse.ArgumentParser(description="Analysis result store")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    analyze = commands.add_parser('analyze', help="Analyze JSON inputs through the store")
+    analyze.add_argument('json_input', nargs='?', help="Site JSON (stdin if omitted)")
+
+    latest = commands.add_parser('latest', help="Latest stored analysis of a location")
+    latest.add_argument('lat', type=float)
+    latest.add_argument('lon', type=float)
+    latest.add_argument('--max-age', type=float, help="Maximum age in seconds")
+
+    args = parser.parse_args()
+    store = ResultStore(Path(os.getenv('RESULT_STORE_DIR', str(DEFAULT_STORE_DIR))))
+
+    if args.command == 'analyze':
+        data = parse_input_data(args.json_input if args.json_input else sys.stdin.read())
+        if "error" in data:
+            print(json.dumps({"success": False, "error": data["error"]}, indent=2))
+            sys.exit(1)
+        record = store.analyze(data)
+        record["success"] = True
+        record["summary"] = summary_for(record["analysis"]["site_suitability"])
+        print(json.dumps(record, indent=2))
+    else:
+        record = store.latest_for_location(args.lat, args.lon, args.max_age)
+        if record is None:
+            print(json.dumps({"success": False, "error": "No stored analysis for this location"}, indent=2))
+            sys.exit(1)
+        print(json.dumps({**record, "cached": True}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Multi-Scenario Weighting
+========================
+Scores sites under many vegetation/soil/climate weightings in one pass.
+
+Component scores are computed once per site with batch_scoring; every
+weight scenario is then a column of a 3 x S weight matrix, and the
+sites x scenarios score matrix is a single matrix product. Comparing 50
+strategies costs little more than scoring the sites once.
+
+Usage:
+    python scenario_weights.py '{"sites": [{"ndvi": 0.35, "soil_ph": 6.5,
+        "soil_moisture": 65, "temperature": 28, "rainfall": 150}],
+        "scenarios": ["balanced", "conservation_first", "arid",
+                      {"name": "custom", "weights": [0.2, 0.5, 0.3]}]}'
+
+Author: Habitat Canopy Team
+Version: 1.0.0
+"""
+
+import json
+import sys
+from typing import Dict, Any, List, Sequence, Tuple, Union
+
+from batch_scoring import RISK_LEVELS, component_columns, risk_level
+from site_analyzer import parse_input_data
+
+
+COMPONENTS = ("vegetation", "soil", "climate")
+
+# Weights used by calculate_site_suitability
+DEFAULT_WEIGHTS = (0.30, 0.40, 0.30)
+
+# Planning strategies
+STRATEGY_PRESETS = {
+    "balanced": DEFAULT_WEIGHTS,
+    "conservation_first": (0.50, 0.25, 0.25),  # protect existing cover
+    "survival_first": (0.15, 0.45, 0.40)       # maximise seedling survival
+}
+
+# Per-biome presets: drier biomes weight climate stress more heavily,
+# wet tropics weight soil because leaching limits establishment
+BIOME_PRESETS = {
+    "tropical_moist": (0.25, 0.45, 0.30),
+    "tropical_dry": (0.25, 0.35, 0.40),
+    "temperate": DEFAULT_WEIGHTS,
+    "arid": (0.20, 0.35, 0.45),
+    "montane": (0.30, 0.35, 0.35)
+}
+
+PRESETS = {**STRATEGY_PRESETS, **BIOME_PRESETS}
+
+Scenario = Union[str, Dict[str, Any], Sequence[float]]
+
+
+def normalize_weights(weights: Union[Dict[str, float], Sequence[float]]) -> Tuple[float, float, float]:
+    """
+    Validate a weight set and scale it to sum to 1.
+
+    Args:
+        weights: {"vegetation", "soil", "climate"} dict or a 3-item sequence
+
+    Returns:
+        Tuple of (vegetation, soil, climate) weights
+    """
+    if isinstance(weights, dict):
+        unknown = sorted(set(weights) - set(COMPONENTS))
+        if unknown:
+            raise ValueError(f"Unknown weight components: {', '.join(unknown)} "
+                             f"(expected {', '.join(COMPONENTS)})")
+        values = tuple(float(weights.get(name, 0.0)) for name in COMPONENTS)
+    else:
+        values = tuple(float(weight) for weight in weights)
+    if len(values) != 3:
+        raise ValueError("A weight set needs exactly 3 weights (vegetation, soil, climate)")
+    if any(weight < 0 for weight in values):
+        raise ValueError("Weights must be non-negative")
+
+    total = sum(values)
+    if total <= 0:
+        raise ValueError("Weights must not all be zero")
+    if abs(total - 1.0) > 1e-12:
+        values = tuple(weight / total for weight in values)
+    return values
+
+
+def resolve_scenarios(scenarios: Sequence[Scenario]) -> Tuple[List[str], List[Tuple[float, float, float]]]:
+    """
+    Turn preset names, weight dicts and weight lists into a weight matrix.
+
+    Returns:
+        Tuple of (scenario names, weight rows)
+    """
+    names = []
+    rows = []
+    for index, scenario in enumerate(scenarios):
+        if isinstance(scenario, str):
+            if scenario not in PRESETS:
+                raise ValueError(f"Unknown weight preset: {scenario}")
+            names.append(scenario)
+            rows.append(PRESETS[scenario])
+        elif isinstance(scenario, dict) and "weights" in scenario:
+            names.append(scenario.get("name", f"scenario_{index + 1}"))
+            rows.append(normalize_weights(scenario["weights"]))
+        else:
+            names.append(f"scenario_{index + 1}")
+            rows.append(normalize_weights(scenario))
+        if names[-1] in names[:-1]:
+            raise ValueError(f"Duplicate scenario name: {names[-1]}")
+    return names, rows
+
+
+def score_matrix(
+    sites: Sequence[Dict[str, float]],
+    scenarios: Sequence[Scenario]
+) -> Dict[str, Any]:
+    """
+    Score every site under every weight scenario.
+
+    Args:
+        sites: Analyzer input dicts (ndvi, soil_ph, soil_moisture,
+               temperature, rainfall)
+        scenarios: Preset names, {"name", "weights"} dicts or weight lists
+
+    Returns:
+        Dictionary with the sites x scenarios score matrix, the matching
+        risk levels and a per-scenario summary
+    """
+    names, weight_rows = resolve_scenarios(scenarios)
+    vegetation, soil, climate = component_columns(
+        [site["ndvi"] for site in sites],
+        [site["soil_ph"] for site in sites],
+        [site["soil_moisture"] for site in sites],
+        [site["temperature"] for site in sites],
+        [site["rainfall"] for site in sites]
+    )
+
+    # (sites x 3) component matrix times (3 x scenarios) weight matrix
+    scores = [
+        [round(v * wv + s * ws + c * wc, 2) for wv, ws, wc in weight_rows]
+        for v, s, c in zip(vegetation, soil, climate)
+    ]
+    risk_levels = [[risk_level(score) for score in row] for row in scores]
+
+    summary = {}
+    for column, name in enumerate(names):
+        column_scores = [row[column] for row in scores]
+        counts = dict.fromkeys(RISK_LEVELS, 0)
+        for row in risk_levels:
+            counts[row[column]] += 1
+        best = max(range(len(sites)), key=lambda i: column_scores[i]) if sites else None
+        summary[name] = {
+            "mean_score": round(sum(column_scores) / len(sites), 2) if sites else None,
+            "risk_counts": counts,
+            "best_site": best
+        }
+
+    return {
+        "scenarios": names,
+        "weights": {name: dict(zip(COMPONENTS, row)) for name, row in zip(names, weight_rows)},
+        "component_scores": [
+            {"vegetation": v, "soil": s, "climate": c}
+            for v, s, c in zip(vegetation, soil, climate)
+        ],
+        "scores": scores,
+        "risk_levels": risk_levels,
+        "summary": summary
+    }
+
+
+def main():
+    """
+    Main entry point for command-line usage.
+    Reads {"sites": [...], "scenarios": [...]} from the command line or
+    stdin; scenarios default to every strategy preset, and "biome" adds
+    that biome's preset.
+    """
+    json_input = sys.argv[1] if len(sys.argv) > 1 else sys.stdin.read()
+
+    try:
+        request = json.loads(json_input)
+        sites = [parse_input_data(json.dumps(site)) for site in request["sites"]]
+        scenarios = list(request.get("scenarios", STRATEGY_PRESETS))
+        if request.get("biome"):
+            scenarios.append(request["biome"])
+        result = score_matrix(sites, scenarios)
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+        print(json.dumps({
+            "success": False,
+            "error": f"Invalid scenario request: {str(e)}"
+        }, indent=2))
+        sys.exit(1)
+
+    print(json.dumps({"success": True, **result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,19 @@ import json
 import sys
 from typing import Dict, Any, Optional
 
+import profiling
+from species_matcher import recommended_species
+
+
+# Version of each rule table. Bump the matching entry whenever a rule's
+# thresholds or weights change so stored results for it are recomputed.
+RULE_VERSIONS = {
+    "vegetation": "1.0",
+    "soil": "1.0",
+    "climate": "1.0",
+    "suitability": "1.0"
+}
+
 
 def parse_input_data(json_str: str) -> Dict[str, Any]:
     """
@@ -272,27 +285,18 @@ def calculate_site_suitability(
     }
 
 
-def analyze_site(json_input: str) -> str:
+def score_site_inputs(data: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Main function to analyze site suitability from JSON input.
+    Run every scoring rule over already-parsed site inputs.
     
     Args:
-        json_input: JSON string with site data
+        data: Dictionary with ndvi, soil_ph, soil_moisture, temperature
+              and rainfall values (see parse_input_data)
         
     Returns:
-        JSON string with analysis results
+        Dictionary with the three component results and the final
+        site suitability
     """
-    # Parse input data
-    data = parse_input_data(json_input)
-    
-    # Check for parsing errors
-    if "error" in data:
-        return json.dumps({
-            "success": False,
-            "error": data["error"]
-        }, indent=2)
-    
-    # Calculate component scores
     vegetation_health = calculate_vegetation_health_score(data["ndvi"])
     soil_suitability = calculate_soil_suitability_score(
         data["soil_ph"],
@@ -303,28 +307,55 @@ def analyze_site(json_input: str) -> str:
         data["rainfall"]
     )
     
-    # Calculate final suitability
     site_suitability = calculate_site_suitability(
         vegetation_health,
         soil_suitability,
         climate_stress
     )
     
+    return {
+        "vegetation_health": vegetation_health,
+        "soil_suitability": soil_suitability,
+        "climate_stress": climate_stress,
+        "site_suitability": site_suitability
+    }
+
+
+def analyze_site(json_input: str) -> str:
+    """
+    Main function to analyze site suitability from JSON input.
+    
+    Args:
+        json_input: JSON string with site data
+        
+    Returns:
+        JSON string with analysis results
+    """
+    # Parse input data
+    data = parse_input_data(json_input)
+    
+    # Check for parsing errors
+    if "error" in data:
+        return json.dumps({
+            "success": False,
+            "error": data["error"]
+        }, indent=2)
+    
+    # Calculate component and final scores
+    analysis = score_site_inputs(data)
+    site_suitability = analysis["site_suitability"]
+    
     # Compile results
     results = {
         "success": True,
         "input_data": data,
-        "analysis": {
-            "vegetation_health": vegetation_health,
-            "soil_suitability": soil_suitability,
-            "climate_stress": climate_stress,
-            "site_suitability": site_suitability
-        },
+        "analysis": analysis,
         "summary": {
             "suitability_score": site_suitability["final_score"],
             "risk_level": site_suitability["risk_level"],
             "priority": site_suitability["priority"],
-            "recommendation": site_suitability["recommendation"]
+            "recommendation": site_suitability["recommendation"],
+            "recommended_species": recommended_species(data)
         }
     }
     
@@ -335,17 +366,19 @@ def main():
     """
     Main entry point for command-line usage.
     Reads JSON from stdin or command-line argument.
+    Pass --profile or --profile=cprofile to profile the run (see profiling.py).
     """
-    if len(sys.argv) > 1:
-        # Read from command-line argument
-        json_input = sys.argv[1]
-    else:
-        # Read from stdin
-        json_input = sys.stdin.read()
-    
-    # Analyze and print results
-    result = analyze_site(json_input)
-    print(result)
+    with profiling.session('site_analyzer'):
+        if len(sys.argv) > 1:
+            # Read from command-line argument
+            json_input = sys.argv[1]
+        else:
+            # Read from stdin
+            json_input = sys.stdin.read()
+        
+        # Analyze and print results
+        result = analyze_site(json_input)
+        print(result)
 
 
 # Example usage and test cases
@@ -18,6 +18,15 @@ import urllib.error
 from datetime import datetime, timedelta
 from pathlib import Path
 
+import early_warning
+import fetch_cache
+import prewarm
+import profiling
+import result_store
+import soil_mirror
+import weather_store
+from species_matcher import recommended_species
+
 
 # Load environment variables from .env file
 def load_env_file():
@@ -42,6 +51,51 @@ SENTINEL_CLIENT_ID = os.getenv('SENTINEL_CLIENT_ID', '056ed018-9605-4843-9d54-78
 SENTINEL_CLIENT_SECRET = os.getenv('SENTINEL_CLIENT_SECRET', 'dkFPNxTxOyiWGiWn1l3GW9al7TJK6qd5')
 
 
+def request_weather_data(lat: float, lon: float) -> Dict[str, Any]:
+    """
+    Call the OpenWeatherMap current weather API.
+    
+    Args:
+        lat: Latitude
+        lon: Longitude
+        
+    Returns:
+        Dictionary with temperature and rainfall data (raises on failure)
+    """
+    url = f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={OPENWEATHER_API_KEY}&units=metric"
+    
+    with urllib.request.urlopen(url, timeout=10) as response:
+        data = json.loads(response.read().decode())
+    
+    # Extract relevant data
+    temperature = data.get('main', {}).get('temp', 25.0)
+    
+    # Get rainfall (if available)
+    rainfall = data.get('rain', {}).get('1h', 0) * 24 * 14  # Estimate 14-day rainfall
+    if rainfall == 0:
+        rainfall = 100.0  # Default if no rain data
+    
+    return {
+        'temperature': temperature,
+        'rainfall': rainfall,
+        'humidity': data.get('main', {}).get('humidity', 60),
+        'source': 'OpenWeatherMap',
+        'success': True
+    }
+
+
+def mock_weather_data(error: str) -> Dict[str, Any]:
+    """Default weather values used when the API is unavailable."""
+    return {
+        'temperature': 25.0,
+        'rainfall': 100.0,
+        'humidity': 60,
+        'source': 'mock',
+        'success': False,
+        'error': error
+    }
+
+
 def fetch_weather_data(lat: float, lon: float) -> Dict[str, Any]:
     """
     Fetch current weather data from OpenWeatherMap API.
@@ -53,37 +107,80 @@ def fetch_weather_data(lat: float, lon: float) -> Dict[str, Any]:
     Returns:
         Dictionary with temperature and rainfall data
     """
-    try:
-        url = f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={OPENWEATHER_API_KEY}&units=metric"
-        
-        with urllib.request.urlopen(url, timeout=10) as response:
-            data = json.loads(response.read().decode())
-            
-            # Extract relevant data
-            temperature = data.get('main', {}).get('temp', 25.0)
-            
-            # Get rainfall (if available)
-            rainfall = data.get('rain', {}).get('1h', 0) * 24 * 14  # Estimate 14-day rainfall
-            if rainfall == 0:
-                rainfall = 100.0  # Default if no rain data
-            
+    # Prefer the locally ingested 14-day window over a single API reading
+    store = weather_store.default_store()
+    if store is not None:
+        window = store.window(lat, lon, now=datetime.now().timestamp())
+        if window and window['coverage_hours'] >= weather_store.MIN_COVERAGE_HOURS:
             return {
-                'temperature': temperature,
-                'rainfall': rainfall,
-                'humidity': data.get('main', {}).get('humidity', 60),
-                'source': 'OpenWeatherMap',
+                'temperature': window['temperature'],
+                'rainfall': window['rainfall'],
+                'observations': window['observations'],
+                'coverage_hours': window['coverage_hours'],
+                'source': 'weather-store',
                 'success': True
             }
+    
+    # Serve the last good reading while the API is slow or failing
+    cache = fetch_cache.default_cache()
+    if cache is not None:
+        return cache.fetch('weather', lat, lon, request_weather_data, mock_weather_data)
+    
+    try:
+        return request_weather_data(lat, lon)
     except Exception as e:
         print(f"Warning: Weather API failed - {str(e)}", file=sys.stderr)
-        return {
-            'temperature': 25.0,
-            'rainfall': 100.0,
-            'humidity': 60,
-            'source': 'mock',
-            'success': False,
-            'error': str(e)
-        }
+        return mock_weather_data(str(e))
+
+
+def request_soil_data(lat: float, lon: float) -> Dict[str, Any]:
+    """
+    Call the SoilGrids API for topsoil pH and clay content.
+    
+    Args:
+        lat: Latitude
+        lon: Longitude
+        
+    Returns:
+        Dictionary with soil pH and moisture data (raises on failure)
+    """
+    # Fetch pH data
+    ph_url = f"https://rest.isric.org/soilgrids/v2.0/properties/query?lon={lon}&lat={lat}&property=phh2o&depth=0-5cm&value=mean"
+    
+    with urllib.request.urlopen(ph_url, timeout=10) as response:
+        ph_data = json.loads(response.read().decode())
+        ph_value = ph_data['properties']['layers'][0]['depths'][0]['values']['mean'] / 10
+    
+    # Fetch clay content for moisture estimation
+    clay_url = f"https://rest.isric.org/soilgrids/v2.0/properties/query?lon={lon}&lat={lat}&property=clay&depth=0-5cm&value=mean"
+    
+    with urllib.request.urlopen(clay_url, timeout=10) as response:
+        clay_data = json.loads(response.read().decode())
+        clay_content = clay_data['properties']['layers'][0]['depths'][0]['values']['mean'] / 10
+    
+    # Estimate moisture based on clay content
+    moisture = soil_mirror.moisture_from_clay(clay_content)
+    
+    return {
+        'soil_ph': ph_value,
+        'soil_moisture': moisture,
+        'clay_content': clay_content,
+        'source': 'SoilGrids',
+        'success': True
+    }
+
+
+def mock_soil_data(lat: float, error: str) -> Dict[str, Any]:
+    """Location-based soil values used when the API is unavailable."""
+    is_tropical = abs(lat) < 23.5
+    return {
+        'soil_ph': 6.0 if is_tropical else 6.5,
+        'soil_moisture': 65 if is_tropical else 55,
+        'clay_content': 25,
+        'source': 'mock',
+        'success': False,
+        'error': error
+    }
 
 
 def fetch_soil_data(lat: float, lon: float) -> Dict[str, Any]:
@@ -97,43 +194,24 @@ def fetch_soil_data(lat: float, lon: float) -> Dict[str, Any]:
     Returns:
         Dictionary with soil pH and moisture data
     """
+    # Prefer the local SoilGrids mirror when it covers the site
+    mirror = soil_mirror.default_mirror()
+    if mirror is not None:
+        soil = mirror.soil_data(lat, lon)
+        if soil is not None:
+            return soil
+    
+    # Serve the last good values while the API is slow or failing
+    cache = fetch_cache.default_cache()
+    if cache is not None:
+        return cache.fetch('soil', lat, lon, request_soil_data,
+                           lambda error: mock_soil_data(lat, error))
+    
     try:
-        # Fetch pH data
-        ph_url = f"https://rest.isric.org/soilgrids/v2.0/properties/query?lon={lon}&lat={lat}&property=phh2o&depth=0-5cm&value=mean"
-        
-        with urllib.request.urlopen(ph_url, timeout=10) as response:
-            ph_data = json.loads(response.read().decode())
-            ph_value = ph_data['properties']['layers'][0]['depths'][0]['values']['mean'] / 10
-        
-        # Fetch clay content for moisture estimation
-        clay_url = f"https://rest.isric.org/soilgrids/v2.0/properties/query?lon={lon}&lat={lat}&property=clay&depth=0-5cm&value=mean"
-        
-        with urllib.request.urlopen(clay_url, timeout=10) as response:
-            clay_data = json.loads(response.read().decode())
-            clay_content = clay_data['properties']['layers'][0]['depths'][0]['values']['mean'] / 10
-        
-        # Estimate moisture based on clay content
-        moisture = min(95, 30 + (clay_content * 0.5))
-        
-        return {
-            'soil_ph': ph_value,
-            'soil_moisture': moisture,
-            'clay_content': clay_content,
-            'source': 'SoilGrids',
-            'success': True
-        }
+        return request_soil_data(lat, lon)
     except Exception as e:
         print(f"Warning: Soil API failed - {str(e)}", file=sys.stderr)
-        # Return mock data based on location
-        is_tropical = abs(lat) < 23.5
-        return {
-            'soil_ph': 6.0 if is_tropical else 6.5,
-            'soil_moisture': 65 if is_tropical else 55,
-            'clay_content': 25,
-            'source': 'mock',
-            'success': False,
-            'error': str(e)
-        }
+        return mock_soil_data(lat, str(e))
 
 
 def fetch_ndvi_data(lat: float, lon: float) -> Dict[str, Any]:
@@ -183,25 +261,61 @@ def fetch_ndvi_data(lat: float, lon: float) -> Dict[str, Any]:
         }
 
 
-def fetch_all_data(lat: float, lon: float) -> Dict[str, Any]:
+# Versions of the data behind each source name, part of stored result keys
+PROVIDER_VERSIONS = {
+    'OpenWeatherMap': '2.5',
+    'SoilGrids': 'v2.0',
+    'soil-mirror': 'v2.0',
+    'weather-store': '1',
+    'estimated': '1',
+    'mock': '1'
+}
+
+
+def provider_versions(data_sources: Dict[str, str]) -> Dict[str, str]:
+    """Map each input source to '<provider>/<version>' for result keys."""
+    return {
+        kind: f"{source}/{PROVIDER_VERSIONS.get(source, 'unknown')}"
+        for kind, source in data_sources.items()
+    }
+
+
+# Live provider calls behind the fetch cache, keyed by cache provider name
+UPSTREAM_REQUESTS = {
+    'weather': request_weather_data,
+    'soil': request_soil_data
+}
+
+
+# Upstream sources keyed by name, in increasing order of fetch cost.
+# NDVI is estimated locally, weather is one HTTP call, soil is two.
+SOURCE_FETCHERS = {
+    'ndvi': fetch_ndvi_data,
+    'weather': fetch_weather_data,
+    'soil': fetch_soil_data
+}
+
+
+def combine_source_data(
+    lat: float,
+    lon: float,
+    weather_data: Dict[str, Any],
+    soil_data: Dict[str, Any],
+    ndvi_data: Dict[str, Any]
+) -> Dict[str, Any]:
     """
-    Fetch all required data from APIs.
+    Merge the per-source fetch results into one analysis input record.
     
     Args:
         lat: Latitude
         lon: Longitude
+        weather_data: Result of fetch_weather_data
+        soil_data: Result of fetch_soil_data
+        ndvi_data: Result of fetch_ndvi_data
         
     Returns:
         Dictionary with all environmental data
     """
-    print(f"Fetching data for location: {lat}, {lon}", file=sys.stderr)
-    
-    # Fetch data from all APIs
-    weather_data = fetch_weather_data(lat, lon)
-    soil_data = fetch_soil_data(lat, lon)
-    ndvi_data = fetch_ndvi_data(lat, lon)
-    
-    # Combine all data
     combined_data = {
         'location': {
             'lat': lat,
@@ -228,6 +342,27 @@ def fetch_all_data(lat: float, lon: float) -> Dict[str, Any]:
     return combined_data
 
 
+def fetch_all_data(lat: float, lon: float) -> Dict[str, Any]:
+    """
+    Fetch all required data from APIs.
+    
+    Args:
+        lat: Latitude
+        lon: Longitude
+        
+    Returns:
+        Dictionary with all environmental data
+    """
+    print(f"Fetching data for location: {lat}, {lon}", file=sys.stderr)
+    
+    # Fetch data from all APIs
+    weather_data = fetch_weather_data(lat, lon)
+    soil_data = fetch_soil_data(lat, lon)
+    ndvi_data = fetch_ndvi_data(lat, lon)
+    
+    return combine_source_data(lat, lon, weather_data, soil_data, ndvi_data)
+
+
 # Import scoring functions from original analyzer
 def calculate_vegetation_health_score(ndvi: float) -> Dict[str, Any]:
     """Calculate vegetation health score based on NDVI value."""
@@ -409,53 +544,71 @@ def analyze_site_from_location(lat: float, lon: float) -> str:
     """
     # Fetch data from APIs
     data = fetch_all_data(lat, lon)
+    input_data = {
+        "ndvi": data["ndvi"],
+        "soil_ph": data["soil_ph"],
+        "soil_moisture": data["soil_moisture"],
+        "temperature": data["temperature"],
+        "rainfall": data["rainfall"]
+    }
+    
+    store = result_store.default_store()
+    if store is not None:
+        # Reuse the stored analysis for identical inputs; the response keeps
+        # this request's fetched inputs
+        record = store.analyze(input_data, provider_versions(data['data_sources']))
+        analysis = record["analysis"]
+    else:
+        # Calculate component scores
+        vegetation_health = calculate_vegetation_health_score(data["ndvi"])
+        soil_suitability = calculate_soil_suitability_score(
+            data["soil_ph"],
+            data["soil_moisture"]
+        )
+        climate_stress = calculate_climate_stress_score(
+            data["temperature"],
+            data["rainfall"]
+        )
+        
+        # Calculate final suitability
+        site_suitability = calculate_site_suitability(
+            vegetation_health,
+            soil_suitability,
+            climate_stress
+        )
+        
+        analysis = {
+            "vegetation_health": vegetation_health,
+            "soil_suitability": soil_suitability,
+            "climate_stress": climate_stress,
+            "site_suitability": site_suitability
+        }
     
-    # Calculate component scores
-    vegetation_health = calculate_vegetation_health_score(data["ndvi"])
-    soil_suitability = calculate_soil_suitability_score(
-        data["soil_ph"],
-        data["soil_moisture"]
-    )
-    climate_stress = calculate_climate_stress_score(
-        data["temperature"],
-        data["rainfall"]
-    )
-    
-    # Calculate final suitability
-    site_suitability = calculate_site_suitability(
-        vegetation_health,
-        soil_suitability,
-        climate_stress
-    )
+    site_suitability = analysis["site_suitability"]
     
     # Compile results
     results = {
         "success": True,
         "location": data['location'],
-        "input_data": {
-            "ndvi": data["ndvi"],
-            "soil_ph": data["soil_ph"],
-            "soil_moisture": data["soil_moisture"],
-            "temperature": data["temperature"],
-            "rainfall": data["rainfall"]
-        },
+        "input_data": input_data,
         "data_sources": data['data_sources'],
         "api_status": data['api_status'],
         "timestamp": data['timestamp'],
-        "analysis": {
-            "vegetation_health": vegetation_health,
-            "soil_suitability": soil_suitability,
-            "climate_stress": climate_stress,
-            "site_suitability": site_suitability
-        },
+        "analysis": analysis,
         "summary": {
             "suitability_score": site_suitability["final_score"],
             "risk_level": site_suitability["risk_level"],
             "priority": site_suitability["priority"],
-            "recommendation": site_suitability["recommendation"]
+            "recommendation": site_suitability["recommendation"],
+            "recommended_species": recommended_species(input_data)
         }
     }
     
+    if store is not None:
+        results["record_key"] = record["record_key"]
+        results["cached"] = record["cached"]
+        store.record_location(lat, lon, results)
+    
     return json.dumps(results, indent=2)
 
 
@@ -463,42 +616,71 @@ def main():
     """
     Main entry point for command-line usage.
     Usage: python site_analyzer_with_apis.py <lat> <lon>
+    Pass --profile or --profile=cprofile to profile the run (see profiling.py).
     """
-    if len(sys.argv) < 3:
-        print("Usage: python site_analyzer_with_apis.py <latitude> <longitude>")
-        print("\nExample:")
-        print("  python site_analyzer_with_apis.py 14.0 75.5")
-        print("\nThis will fetch real data from:")
-        print("  - OpenWeatherMap (weather)")
-        print("  - SoilGrids (soil)")
-        print("  - Sentinel Hub (NDVI - estimated for now)")
-        sys.exit(1)
-    
-    try:
-        lat = float(sys.argv[1])
-        lon = float(sys.argv[2])
+    with profiling.session('site_analyzer_with_apis'):
+        if len(sys.argv) < 3:
+            print("Usage: python site_analyzer_with_apis.py <latitude> <longitude>")
+            print("\nExample:")
+            print("  python site_analyzer_with_apis.py 14.0 75.5")
+            print("\nThis will fetch real data from:")
+            print("  - OpenWeatherMap (weather)")
+            print("  - SoilGrids (soil)")
+            print("  - Sentinel Hub (NDVI - estimated for now)")
+            sys.exit(1)
         
-        # Validate coordinates
-        if not (-90 <= lat <= 90):
-            print("Error: Latitude must be between -90 and 90")
+        try:
+            lat = float(sys.argv[1])
+            lon = float(sys.argv[2])
+        
+            # Validate coordinates
+            if not (-90 <= lat <= 90):
+                print("Error: Latitude must be between -90 and 90")
+                sys.exit(1)
+            if not (-180 <= lon <= 180):
+                print("Error: Longitude must be between -180 and 180")
+                sys.exit(1)
+        
+            # Analyze and print results
+            result = analyze_site_from_location(lat, lon)
+            print(result)
+        
+        except ValueError:
+            print("Error: Latitude and longitude must be numbers")
             sys.exit(1)
-        if not (-180 <= lon <= 180):
-            print("Error: Longitude must be between -180 and 180")
+        except Exception as e:
+            print(json.dumps({
+                "success": False,
+                "error": str(e)
+            }, indent=2))
             sys.exit(1)
         
-        # Analyze and print results
-        result = analyze_site_from_location(lat, lon)
-        print(result)
+        # Count the view so pre-warming favours frequently viewed sites; the
+        # result is already printed, so failures here only warn
+        try:
+            views = prewarm.default_view_log()
+            if views is not None:
+                views.record(lat, lon)
+        except Exception as e:
+            print(f"Warning: Could not record site view - {str(e)}", file=sys.stderr)
         
-    except ValueError:
-        print("Error: Latitude and longitude must be numbers")
-        sys.exit(1)
-    except Exception as e:
-        print(json.dumps({
-            "success": False,
-            "error": str(e)
-        }, indent=2))
-        sys.exit(1)
+        # Update the site's rolling statistics and report new alerts; repeats
+        # of the site's last inputs (e.g. cached page views) are skipped
+        try:
+            detector = early_warning.default_detector()
+            if detector is not None:
+                with detector:
+                    analysis = json.loads(result)
+                    alerts = detector.observe(
+                        early_warning.site_key(lat, lon),
+                        early_warning.scores_from_analysis(analysis["analysis"]),
+                        analysis["timestamp"],
+                        early_warning.input_fingerprint(analysis)
+                    )
+                for alert in alerts:
+                    print(f"Alert ({alert['severity']}): {alert['message']}", file=sys.stderr)
+        except Exception as e:
+            print(f"Warning: Could not update early warning statistics - {str(e)}", file=sys.stderr)
 
 
 if __name__ == "__main__":
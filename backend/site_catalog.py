@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Memory-Mapped Site Catalog
+==========================
+Compact on-disk catalog of candidate and project sites with a grid index
+for bounding-box, radius and project queries.
+
+File layout (little endian):
+    header   magic, version, cell size, record/cell counts, metadata offset
+    records  fixed-width (id, lat, lon, project, name) sorted by grid cell
+    cells    (cell key, first record, record count) sorted by cell key
+    metadata JSON with the project name table
+
+The file is memory-mapped; queries binary-search the cell table in place
+and decode only the records they return, so region-wide rescoring starts
+without loading the catalog into Python objects.
+
+Usage:
+    python site_catalog.py build sites.json catalog.bin [--cell-size 0.1]
+    python site_catalog.py query catalog.bin --bbox 12 74 16 78 [--analyze | --rank 10]
+    python site_catalog.py query catalog.bin --radius 14.0 75.5 25
+    python site_catalog.py query catalog.bin --project "Western Ghats"
+
+Author: Habitat Canopy Team
+Version: 1.0.0
+"""
+
+import argparse
+import bisect
+import json
+import math
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, List, Tuple
+
+
+MAGIC = b'SCAT'
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct('<4sHHdIIQI')   # magic, version, reserved, cell size,
+                                       # records, cells, metadata offset/length
+NAME_BYTES = 32
+RECORD = struct.Struct(f'<IddI{NAME_BYTES}s')  # id, lat, lon, project index + 1, name
+CELL = struct.Struct('<qII')           # cell key, first record, record count
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+
+def cell_key(lat: float, lon: float, cell_size: float) -> int:
+    """Row-major sortable key of the grid cell containing (lat, lon)."""
+    row = math.floor(lat / cell_size)
+    col = math.floor(lon / cell_size)
+    return row * 2 ** 32 + (col + 2 ** 31)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class _CellKeys:
+    """Sequence view over the cell keys in the map, for bisect."""
+
+    def __init__(self, buffer: mmap.mmap, offset: int, count: int):
+        self._buffer = buffer
+        self._offset = offset
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> int:
+        return CELL.unpack_from(self._buffer, self._offset + index * CELL.size)[0]
+
+
+class SiteCatalog:
+    """Read-only, memory-mapped site catalog."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, _, self.cell_size, self.record_count,
+         self.cell_count, meta_offset, meta_length) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"Not a site catalog (version {FORMAT_VERSION}): {self.path}")
+
+        self._records_offset = HEADER.size
+        self._cells_offset = self._records_offset + self.record_count * RECORD.size
+        self._cell_keys = _CellKeys(self._map, self._cells_offset, self.cell_count)
+        metadata = json.loads(self._map[meta_offset:meta_offset + meta_length].decode())
+        self.projects: List[str] = metadata['projects']
+
+    def __enter__(self) -> 'SiteCatalog':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.record_count
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    @staticmethod
+    def build(path: Path, sites: Iterable[Dict[str, Any]], cell_size: float = 0.1) -> int:
+        """
+        Write a catalog file from site dictionaries.
+
+        Args:
+            path: Output file (replaced atomically)
+            sites: Dicts with lat, lon and optional id, name and project
+            cell_size: Grid index cell size in degrees
+
+        Returns:
+            Number of records written
+        """
+        projects: List[str] = []
+        project_index: Dict[str, int] = {}
+        rows = []
+        for number, site in enumerate(sites):
+            lat = float(site['lat'])
+            lon = float(site['lon'])
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                raise ValueError(f"Invalid coordinates for site {number}: {lat}, {lon}")
+            project = site.get('project')
+            project_id = 0
+            if project:
+                if project not in project_index:
+                    project_index[project] = len(projects)
+                    projects.append(project)
+                project_id = project_index[project] + 1
+            name = (site.get('name') or '').encode()[:NAME_BYTES]
+            rows.append((cell_key(lat, lon, cell_size), int(site.get('id', number)),
+                         lat, lon, project_id, name))
+        rows.sort(key=lambda row: (row[0], row[1]))
+
+        cells: List[Tuple[int, int, int]] = []
+        for index, row in enumerate(rows):
+            if cells and cells[-1][0] == row[0]:
+                key, start, count = cells[-1]
+                cells[-1] = (key, start, count + 1)
+            else:
+                cells.append((row[0], index, 1))
+
+        metadata = json.dumps({'projects': projects}).encode()
+        meta_offset = HEADER.size + len(rows) * RECORD.size + len(cells) * CELL.size
+
+        path = Path(path)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, cell_size, len(rows),
+                                len(cells), meta_offset, len(metadata)))
+            for _, site_id, lat, lon, project_id, name in rows:
+                f.write(RECORD.pack(site_id, lat, lon, project_id, name))
+            for cell in cells:
+                f.write(CELL.pack(*cell))
+            f.write(metadata)
+        os.replace(tmp_path, path)
+        return len(rows)
+
+    def _decode(self, values: Tuple) -> Dict[str, Any]:
+        site_id, lat, lon, project_id, name = values
+        return {
+            'id': site_id,
+            'lat': lat,
+            'lon': lon,
+            'name': name.rstrip(b'\0').decode(errors='ignore') or None,
+            'project': self.projects[project_id - 1] if project_id else None
+        }
+
+    def record(self, index: int) -> Dict[str, Any]:
+        """Decode the record at a position in the file."""
+        if not 0 <= index < self.record_count:
+            raise IndexError(index)
+        return self._decode(RECORD.unpack_from(self._map, self._records_offset + index * RECORD.size))
+
+    def _record_range(self, start: int, stop: int) -> Iterator[Tuple]:
+        begin = self._records_offset + start * RECORD.size
+        end = self._records_offset + stop * RECORD.size
+        view = memoryview(self._map)[begin:end]
+        records = RECORD.iter_unpack(view)
+        try:
+            yield from records
+        finally:
+            # Drop the buffer export so the map can be closed afterwards
+            del records
+            view.release()
+
+    def bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> Iterator[Dict[str, Any]]:
+        """
+        Sites inside a bounding box (edges inclusive).
+
+        Every index row overlapping the box maps to one contiguous run of
+        records, found with two binary searches over the cell table.
+        """
+        size = self.cell_size
+        first_col = math.floor(min_lon / size) + 2 ** 31
+        last_col = math.floor(max_lon / size) + 2 ** 31
+        for row in range(math.floor(min_lat / size), math.floor(max_lat / size) + 1):
+            low = bisect.bisect_left(self._cell_keys, row * 2 ** 32 + first_col)
+            high = bisect.bisect_right(self._cell_keys, row * 2 ** 32 + last_col)
+            if low >= high:
+                continue
+            start = CELL.unpack_from(self._map, self._cells_offset + low * CELL.size)[1]
+            _, last_start, last_count = CELL.unpack_from(
+                self._map, self._cells_offset + (high - 1) * CELL.size
+            )
+            for values in self._record_range(start, last_start + last_count):
+                if min_lat <= values[1] <= max_lat and min_lon <= values[2] <= max_lon:
+                    yield self._decode(values)
+
+    def radius(self, lat: float, lon: float, radius_km: float) -> Iterator[Dict[str, Any]]:
+        """Sites within radius_km of a point, each with its distance_km."""
+        lat_span = radius_km / KM_PER_DEGREE
+        cos_lat = math.cos(math.radians(min(89.9, abs(lat) + lat_span)))
+        lon_span = min(180.0, radius_km / (KM_PER_DEGREE * max(cos_lat, 1e-6)))
+        min_lat, max_lat = max(-90.0, lat - lat_span), min(90.0, lat + lat_span)
+
+        # A circle reaching a pole covers every longitude; otherwise split
+        # boxes that cross the antimeridian
+        boxes = [(lon - lon_span, lon + lon_span)]
+        if lon_span >= 180.0 or abs(lat) + lat_span >= 90.0:
+            boxes = [(-180.0, 180.0)]
+        elif boxes[0][0] < -180.0:
+            boxes = [(-180.0, boxes[0][1]), (boxes[0][0] + 360.0, 180.0)]
+        elif boxes[0][1] > 180.0:
+            boxes = [(boxes[0][0], 180.0), (-180.0, boxes[0][1] - 360.0)]
+
+        for min_lon, max_lon in boxes:
+            for site in self.bbox(min_lat, min_lon, max_lat, max_lon):
+                distance = haversine_km(lat, lon, site['lat'], site['lon'])
+                if distance <= radius_km:
+                    site['distance_km'] = round(distance, 3)
+                    yield site
+
+    def project(self, name: str) -> Iterator[Dict[str, Any]]:
+        """All sites of a project (sequential scan over the mapped records)."""
+        if name not in self.projects:
+            return
+        project_id = self.projects.index(name) + 1
+        for values in self._record_range(0, self.record_count):
+            if values[3] == project_id:
+                yield self._decode(values)
+
+
+def analyze_sites(sites: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Run the API analyzer over catalog query results, one site at a time.
+
+    Args:
+        sites: Catalog records (e.g. from SiteCatalog.bbox)
+
+    Yields:
+        Parsed analysis results tagged with the catalog site id and name
+    """
+    from site_analyzer_with_apis import analyze_site_from_location
+
+    for site in sites:
+        result = json.loads(analyze_site_from_location(site['lat'], site['lon']))
+        result['site'] = {'id': site['id'], 'name': site['name'], 'project': site['project']}
+        yield result
+
+
+def main():
+    """Main entry point for command-line usage."""
+    parser = argparse.ArgumentParser(description="Memory-mapped site catalog")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help="Build a catalog from a JSON list of sites")
+    build.add_argument('sites')
+    build.add_argument('catalog')
+    build.add_argument('--cell-size', type=float, default=0.1)
+
+    query = commands.add_parser('query', help="Query a catalog")
+    query.add_argument('catalog')
+    selector = query.add_mutually_exclusive_group(required=True)
+    selector.add_argument('--bbox', nargs=4, type=float,
+                          metavar=('MIN_LAT', 'MIN_LON', 'MAX_LAT', 'MAX_LON'))
+    selector.add_argument('--radius', nargs=3, type=float, metavar=('LAT', 'LON', 'KM'))
+    selector.add_argument('--project')
+    action = query.add_mutually_exclusive_group()
+    action.add_argument('--analyze', action='store_true', help="Analyze every matching site")
+    action.add_argument('--rank', type=int, metavar='K', help="Rank matching sites, keep top K")
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        with open(args.sites) as f:
+            count = SiteCatalog.build(Path(args.catalog), json.load(f), args.cell_size)
+        print(json.dumps({'success': True, 'records': count}, indent=2))
+        return
+
+    with SiteCatalog(Path(args.catalog)) as catalog:
+        if args.bbox:
+            sites = catalog.bbox(*args.bbox)
+        elif args.radius:
+            sites = catalog.radius(*args.radius)
+        else:
+            sites = catalog.project(args.project)
+
+        if args.analyze:
+            output: Any = list(analyze_sites(sites))
+        elif args.rank:
+            from site_ranking import rank_sites
+            output = rank_sites(sites, k=args.rank)
+        else:
+            output = list(sites)
+
+    print(json.dumps(output, indent=2))
+
+
+if __name__ == "__main__":
+    main()
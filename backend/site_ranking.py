@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Top-K Site Ranking
+==================
+Streams suitability scores over a large candidate set (for example a grid
+sampled over a region) and keeps only the best K sites in a bounded heap.
+
+Sources are fetched cheapest first. Before every further fetch the best
+score a candidate could still reach is compared against the current
+top-K cutoff, and candidates that cannot make the list are dropped
+without paying for the remaining upstream calls.
+
+Author: Habitat Canopy Team
+Version: 1.0.0
+"""
+
+import heapq
+import json
+import sys
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from site_analyzer import score_site_inputs
+from site_screening import (
+    SOURCE_ORDER,
+    inputs_from_sources,
+    risk_for_score,
+    score_bounds
+)
+
+
+INPUT_FIELDS = ("ndvi", "soil_ph", "soil_moisture", "temperature", "rainfall")
+
+# Priority classes in ranking order (higher is better)
+PRIORITY_RANK = {"LOW": 0, "MEDIUM": 1, "HIGH": 2}
+
+
+def grid_candidates(
+    min_lat: float,
+    min_lon: float,
+    max_lat: float,
+    max_lon: float,
+    step: float
+) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily generate candidate locations on a regular lat/lon grid.
+
+    Args:
+        min_lat: Southern edge of the region
+        min_lon: Western edge of the region
+        max_lat: Northern edge of the region
+        max_lon: Eastern edge of the region
+        step: Grid spacing in degrees
+
+    Yields:
+        Candidate dictionaries with lat and lon
+    """
+    if step <= 0:
+        raise ValueError("Grid step must be positive")
+
+    # Integer indexing avoids accumulating floating point drift
+    rows = int(round((max_lat - min_lat) / step)) + 1
+    cols = int(round((max_lon - min_lon) / step)) + 1
+    for row in range(rows):
+        lat = round(min_lat + row * step, 6)
+        if lat > max_lat + 1e-9:
+            break
+        for col in range(cols):
+            lon = round(min_lon + col * step, 6)
+            if lon > max_lon + 1e-9:
+                break
+            yield {"lat": lat, "lon": lon}
+
+
+def ranking_key(score: float, by: str) -> Tuple:
+    """
+    Build the comparison key used by the top-K heap.
+
+    Args:
+        score: Final suitability score
+        by: "final_score" or "priority" (priority class, then score)
+
+    Returns:
+        Tuple that orders better sites higher
+    """
+    if by == "priority":
+        return (PRIORITY_RANK[risk_for_score(score)[1]], score)
+    return (score,)
+
+
+def _default_fetchers() -> Dict[str, Any]:
+    # Imported lazily so offline rankings never load API configuration
+    from site_analyzer_with_apis import SOURCE_FETCHERS
+    return SOURCE_FETCHERS
+
+
+def rank_sites(
+    candidates: Iterable[Dict[str, Any]],
+    k: int = 10,
+    by: str = "final_score",
+    fetchers: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Keep the K best candidates from a stream of sites.
+
+    Candidates carrying all five input fields are scored directly.
+    Candidates carrying only lat/lon are fetched source by source and
+    pruned as soon as their best reachable score cannot beat the cutoff.
+    Ties keep the earlier candidate.
+
+    Args:
+        candidates: Iterable of dicts with lat/lon (and optionally name and
+                    the analyzer input fields)
+        k: Number of sites to keep
+        by: "final_score" or "priority"
+        fetchers: Optional fetch functions keyed by source name, each
+                  called as fetch(lat, lon); defaults to the live APIs
+
+    Returns:
+        Dictionary with the ranked results and pruning statistics
+    """
+    if k <= 0:
+        raise ValueError("k must be positive")
+    if by not in ("final_score", "priority"):
+        raise ValueError(f"Unknown ranking field: {by}")
+
+    heap: List[Tuple] = []
+    total = 0
+    pruned = 0
+    fetch_calls = {name: 0 for name in SOURCE_ORDER}
+
+    for candidate in candidates:
+        total += 1
+
+        if all(field in candidate for field in INPUT_FIELDS):
+            inputs = {field: float(candidate[field]) for field in INPUT_FIELDS}
+        else:
+            if fetchers is None:
+                fetchers = _default_fetchers()
+            lat = float(candidate["lat"])
+            lon = float(candidate["lon"])
+            sources: Dict[str, Dict[str, Any]] = {}
+            for name in SOURCE_ORDER:
+                # A later candidate only displaces the cutoff when strictly better
+                if len(heap) == k and ranking_key(score_bounds(sources)[1], by) <= heap[0][0]:
+                    break
+                sources[name] = fetchers[name](lat, lon)
+                fetch_calls[name] += 1
+            if len(sources) < len(SOURCE_ORDER):
+                pruned += 1
+                continue
+            inputs = inputs_from_sources(sources)
+
+        suitability = score_site_inputs(inputs)["site_suitability"]
+        score = suitability["final_score"]
+        key = ranking_key(score, by)
+        if len(heap) == k and key <= heap[0][0]:
+            continue
+
+        record = {
+            "name": candidate.get("name"),
+            "lat": candidate.get("lat"),
+            "lon": candidate.get("lon"),
+            "final_score": score,
+            "risk_level": suitability["risk_level"],
+            "priority": suitability["priority"],
+            "input_data": inputs
+        }
+        # Negated sequence number makes earlier candidates win ties
+        entry = (key, -total, record)
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        else:
+            heapq.heapreplace(heap, entry)
+
+    ranked = [entry[2] for entry in sorted(heap, reverse=True)]
+    for rank, record in enumerate(ranked, start=1):
+        record["rank"] = rank
+
+    return {
+        "success": True,
+        "ranked_by": by,
+        "k": k,
+        "total_candidates": total,
+        "scored": total - pruned,
+        "pruned": pruned,
+        "fetch_calls": fetch_calls,
+        "results": ranked
+    }
+
+
+def main():
+    """
+    Main entry point for command-line usage.
+    Reads a JSON ranking request from the command line or stdin, e.g.
+    {"bbox": [12.0, 74.0, 16.0, 78.0], "step": 0.5, "k": 10}
+    or {"sites": [{"lat": 14.0, "lon": 75.5, "name": "Site 1"}], "k": 3}
+    """
+    json_input = sys.argv[1] if len(sys.argv) > 1 else sys.stdin.read()
+
+    try:
+        request = json.loads(json_input)
+        if "bbox" in request:
+            min_lat, min_lon, max_lat, max_lon = request["bbox"]
+            candidates = grid_candidates(
+                min_lat, min_lon, max_lat, max_lon, float(request.get("step", 0.1))
+            )
+        else:
+            candidates = request["sites"]
+
+        result = rank_sites(
+            candidates,
+            k=int(request.get("k", 10)),
+            by=request.get("by", "final_score")
+        )
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+        print(json.dumps({
+            "success": False,
+            "error": f"Invalid ranking request: {str(e)}"
+        }, indent=2))
+        sys.exit(1)
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
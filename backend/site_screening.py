@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Bound-Based Site Screening
+==========================
+Decides a site's risk class (LOW/MEDIUM/HIGH) with as few upstream calls
+as possible.
+
+Each component score has a fixed range, so after every fetch the final
+score is bracketed by a lower and an upper bound. Fetching stops as soon
+as both bounds fall into the same risk class, because no remaining
+source can change the outcome.
+
+Author: Habitat Canopy Team
+Version: 1.0.0
+"""
+
+import json
+import sys
+import time
+from typing import Dict, Any, Callable, Iterable, List, Optional, Tuple
+
+import fetch_cache
+import soil_mirror
+import weather_store
+from site_analyzer import (
+    calculate_vegetation_health_score,
+    calculate_soil_suitability_score,
+    calculate_climate_stress_score
+)
+
+
+# Fetch order used when a site only carries a location
+SOURCE_ORDER = ("ndvi", "weather", "soil")
+
+# Range of each component score when its source has not been fetched
+# (soil scores at least 10 + 10, climate stress is capped at 100)
+VEGETATION_RANGE = (0.0, 100.0)
+SOIL_RANGE = (20.0, 100.0)
+CLIMATE_RANGE = (0.0, 100.0)
+
+# Upstream HTTP requests made by each source fetch
+SOURCE_CALLS = {"ndvi": 0, "weather": 1, "soil": 2}
+
+# Sources answered from local data, without any upstream request
+LOCAL_SOURCES = ("weather-store", "soil-mirror", "estimated")
+
+
+def upstream_calls(name: str, result: Dict[str, Any]) -> int:
+    """
+    Upstream HTTP requests a source fetch actually made.
+
+    Values read from the weather store, the soil mirror or the fetch cache
+    (anything but a cache miss) cost no request.
+
+    Args:
+        name: Source name (ndvi, weather, soil)
+        result: The fetch result
+
+    Returns:
+        Number of upstream requests
+    """
+    cache = result.get("cache")
+    if cache is not None:
+        return SOURCE_CALLS.get(name, 1) if cache.get("status") == "miss" else 0
+    if result.get("source") in LOCAL_SOURCES:
+        return 0
+    return SOURCE_CALLS.get(name, 1)
+
+
+def avoided_calls(
+    lat: float,
+    lon: float,
+    skipped: Iterable[str],
+    is_cached: Optional[Callable[[str, float, float], bool]] = None
+) -> int:
+    """
+    Upstream HTTP requests the skipped sources would have made.
+
+    Skipped sources that would have been served locally (is_cached is
+    True for them) would not have made a request, so they are not counted.
+
+    Args:
+        lat: Latitude
+        lon: Longitude
+        skipped: Names of the sources that were not fetched
+        is_cached: Optional predicate telling whether a source already has
+                   a value for this location
+
+    Returns:
+        Number of upstream requests avoided
+    """
+    return sum(
+        SOURCE_CALLS.get(name, 1) for name in skipped
+        if is_cached is None or not is_cached(name, lat, lon)
+    )
+
+
+def local_source_predicate() -> Callable[[str, float, float], bool]:
+    """
+    Predicate telling whether a source can be read without a live call.
+
+    Covers the sources the live fetchers prefer over the network: the
+    weather store window, the soil mirror and the fetch cache.
+
+    Returns:
+        Function called as is_local(name, lat, lon)
+    """
+    store = weather_store.default_store()
+    mirror = soil_mirror.default_mirror()
+    cache = fetch_cache.default_cache()
+
+    def is_local(name: str, lat: float, lon: float) -> bool:
+        if name == "weather" and store is not None:
+            window = store.window(lat, lon, now=time.time())
+            if window and window["coverage_hours"] >= weather_store.MIN_COVERAGE_HOURS:
+                return True
+        if name == "soil" and mirror is not None and mirror.soil_data(lat, lon) is not None:
+            return True
+        return cache is not None and cache.is_cached(name, lat, lon)
+
+    return is_local
+
+
+def inputs_from_sources(sources: Dict[str, Dict[str, Any]]) -> Dict[str, float]:
+    """
+    Flatten fetched source results into analyzer input fields.
+
+    Args:
+        sources: Fetch results keyed by source name (ndvi, weather, soil)
+
+    Returns:
+        Dictionary with the input fields available so far
+    """
+    inputs = {}
+    if "ndvi" in sources:
+        inputs["ndvi"] = float(sources["ndvi"]["ndvi"])
+    if "soil" in sources:
+        inputs["soil_ph"] = float(sources["soil"]["soil_ph"])
+        inputs["soil_moisture"] = float(sources["soil"]["soil_moisture"])
+    if "weather" in sources:
+        inputs["temperature"] = float(sources["weather"]["temperature"])
+        inputs["rainfall"] = float(sources["weather"]["rainfall"])
+    return inputs
+
+
+def risk_for_score(score: float) -> Tuple[str, str]:
+    """
+    Risk level and priority calculate_site_suitability assigns to a score.
+
+    Args:
+        score: Final suitability score (0-100)
+
+    Returns:
+        Tuple of (risk_level, priority)
+    """
+    if score >= 70:
+        return "LOW", "HIGH"
+    if score >= 50:
+        return "MEDIUM", "MEDIUM"
+    return "HIGH", "LOW"
+
+
+def score_bounds(sources: Dict[str, Dict[str, Any]]) -> Tuple[float, float]:
+    """
+    Bracket the final score given the sources fetched so far.
+
+    Known components contribute their exact score, unknown components
+    contribute the full range they could take.
+
+    Args:
+        sources: Fetch results keyed by source name (ndvi, weather, soil)
+
+    Returns:
+        Tuple of (lower bound, upper bound) on final_score
+    """
+    inputs = inputs_from_sources(sources)
+
+    veg_lo, veg_hi = VEGETATION_RANGE
+    if "ndvi" in inputs:
+        veg_lo = veg_hi = calculate_vegetation_health_score(inputs["ndvi"])["score"]
+
+    soil_lo, soil_hi = SOIL_RANGE
+    if "soil_ph" in inputs:
+        soil_lo = soil_hi = calculate_soil_suitability_score(
+            inputs["soil_ph"], inputs["soil_moisture"]
+        )["score"]
+
+    climate_lo, climate_hi = CLIMATE_RANGE
+    if "temperature" in inputs:
+        climate_lo = climate_hi = 100 - calculate_climate_stress_score(
+            inputs["temperature"], inputs["rainfall"]
+        )["stress_score"]
+
+    lower = veg_lo * 0.30 + soil_lo * 0.40 + climate_lo * 0.30
+    upper = veg_hi * 0.30 + soil_hi * 0.40 + climate_hi * 0.30
+    return round(lower, 2), round(upper, 2)
+
+
+def fetch_plan(
+    lat: float,
+    lon: float,
+    order: Iterable[str] = SOURCE_ORDER,
+    is_cached: Optional[Callable[[str, float, float], bool]] = None
+) -> List[str]:
+    """
+    Order sources so cached ones are read before any live fetch.
+
+    Args:
+        lat: Latitude
+        lon: Longitude
+        order: Sources in increasing order of live fetch cost
+        is_cached: Optional predicate telling whether a source already has
+                   a value for this location
+
+    Returns:
+        List of source names in the order they should be fetched
+    """
+    order = list(order)
+    if is_cached is None:
+        return order
+    cached = [name for name in order if is_cached(name, lat, lon)]
+    return cached + [name for name in order if name not in cached]
+
+
+def screen_site(
+    lat: float,
+    lon: float,
+    fetchers: Optional[Dict[str, Any]] = None,
+    order: Iterable[str] = SOURCE_ORDER,
+    is_cached: Optional[Callable[[str, float, float], bool]] = None
+) -> Dict[str, Any]:
+    """
+    Determine a site's risk class, skipping fetches that cannot change it.
+
+    Args:
+        lat: Latitude
+        lon: Longitude
+        fetchers: Optional fetch functions keyed by source name, each
+                  called as fetch(lat, lon); defaults to the live APIs
+        order: Sources in increasing order of live fetch cost
+        is_cached: Optional predicate used to read cached sources first and
+                   to leave them out of the avoided upstream calls
+
+    Returns:
+        Dictionary with risk level, score bounds, the sources used and
+        the upstream calls made and avoided
+    """
+    if fetchers is None:
+        from site_analyzer_with_apis import SOURCE_FETCHERS
+        fetchers = SOURCE_FETCHERS
+
+    plan = fetch_plan(lat, lon, order, is_cached)
+    sources: Dict[str, Dict[str, Any]] = {}
+    lower, upper = score_bounds(sources)
+    calls = 0
+
+    for name in plan:
+        if risk_for_score(lower) == risk_for_score(upper):
+            break
+        sources[name] = fetchers[name](lat, lon)
+        calls += upstream_calls(name, sources[name])
+        lower, upper = score_bounds(sources)
+
+    risk_level, priority = risk_for_score(lower)
+    skipped = [name for name in plan if name not in sources]
+    return {
+        "location": {"lat": lat, "lon": lon},
+        "risk_level": risk_level,
+        "priority": priority,
+        "score_bounds": {"min": lower, "max": upper},
+        "final_score": lower if lower == upper else None,
+        "fetched": list(sources),
+        "skipped": skipped,
+        "upstream_calls": calls,
+        "avoided_upstream_calls": avoided_calls(lat, lon, skipped, is_cached)
+    }
+
+
+def screen_sites(
+    locations: Iterable[Dict[str, Any]],
+    fetchers: Optional[Dict[str, Any]] = None,
+    order: Iterable[str] = SOURCE_ORDER,
+    is_cached: Optional[Callable[[str, float, float], bool]] = None
+) -> Dict[str, Any]:
+    """
+    Screen many sites and report how many upstream calls were avoided.
+
+    Args:
+        locations: Iterable of dicts with lat, lon and optional name
+        fetchers: Optional fetch functions keyed by source name
+        order: Sources in increasing order of live fetch cost
+        is_cached: Optional predicate used to read cached sources first and
+                   to leave them out of the avoided upstream calls
+
+    Returns:
+        Dictionary with per-site results and call statistics
+    """
+    order = list(order)
+    results = []
+    total_calls = 0
+    total_avoided = 0
+
+    for location in locations:
+        result = screen_site(
+            float(location["lat"]), float(location["lon"]), fetchers, order, is_cached
+        )
+        result["name"] = location.get("name")
+        total_calls += result["upstream_calls"]
+        total_avoided += result["avoided_upstream_calls"]
+        results.append(result)
+
+    return {
+        "success": True,
+        "total": len(results),
+        "upstream_calls": total_calls,
+        "avoided_upstream_calls": total_avoided,
+        "results": results
+    }
+
+
+def main():
+    """
+    Main entry point for command-line usage.
+    Reads {"sites": [{"lat": ..., "lon": ..., "name": ...}]} from the
+    command line or stdin and prints the risk class of every site.
+    """
+    json_input = sys.argv[1] if len(sys.argv) > 1 else sys.stdin.read()
+
+    try:
+        request = json.loads(json_input)
+        locations = request["sites"] if isinstance(request, dict) else request
+        # Read locally served sources before any live call
+        result = screen_sites(locations, is_cached=local_source_predicate())
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+        print(json.dumps({
+            "success": False,
+            "error": f"Invalid screening request: {str(e)}"
+        }, indent=2))
+        sys.exit(1)
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
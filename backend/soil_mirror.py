@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+"""
+Local SoilGrids Mirror
+======================
+Regional copy of the SoilGrids topsoil (0-5 cm) pH and clay layers as
+memory-mapped raster tiles, so soil lookups need no network calls.
+
+Each 1 x 1 degree tile is one file holding an int16 grid per band, in
+SoilGrids mapped units (pH x 10, clay in g/kg), rows south to north:
+
+    header   magic, version, band count, south edge, west edge, cells per degree
+    bands    band-major int16 grids, -32768 = no data
+
+A point lookup computes the cell offset and reads 2 bytes per band from
+the mapped tile; batch lookups are grouped per tile. manifest.json lists
+the bands and, per tile, its grid resolution and every region mirrored
+into it with when and from where it was built. Tiles may differ in
+resolution, but all regions within one tile share it.
+
+Tiles are built by sampling the SoilGrids REST API at every cell centre
+of a region, or imported from XYZ exports of the SoilGrids rasters
+(gdal_translate -of XYZ phh2o_0-5cm_mean.vrt ph.xyz).
+
+Usage:
+    python soil_mirror.py build --bbox 12 74 16 78 [--cells-per-degree 20]
+    python soil_mirror.py import --bbox 12 74 16 78 --xyz phh2o=ph.xyz --xyz clay=clay.xyz
+    python soil_mirror.py refresh [--max-age-days 180]
+    python soil_mirror.py query <lat> <lon>
+
+Author: Habitat Canopy Team
+Version: 1.0.0
+"""
+
+import argparse
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import urllib.request
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Any, Iterable, List, Optional, Sequence, Tuple
+
+
+MAGIC = b'SOIL'
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct('<4sHHhhI')  # magic, version, bands, south, west, cells per degree
+VALUE = struct.Struct('<h')
+NODATA = -32768
+
+BANDS = ("phh2o", "clay")
+BAND_SCALE = {"phh2o": 10, "clay": 10}  # mapped units per pH unit / per percent
+
+DEFAULT_CELLS_PER_DEGREE = 20  # 0.05 degree cells (about 5.5 km)
+DEFAULT_MIRROR_DIR = Path(__file__).parent / 'data' / 'soil_mirror'
+
+SOILGRIDS_QUERY_URL = (
+    "https://rest.isric.org/soilgrids/v2.0/properties/query"
+    "?lon={lon}&lat={lat}&property=phh2o&property=clay&depth=0-5cm&value=mean"
+)
+
+# (south, west, north, east) in degrees
+BBox = Tuple[float, float, float, float]
+
+# Raw band values at a point, None where SoilGrids has no data
+Sampler = Callable[[float, float], Optional[Dict[str, int]]]
+
+
+def moisture_from_clay(clay_content: float) -> float:
+    """Soil moisture estimate (%) from clay content (%)."""
+    return min(95, 30 + (clay_content * 0.5))
+
+
+def tile_name(south: int, west: int) -> str:
+    """File name of the tile with the given south-west corner (e.g. N12E077.tile)."""
+    return (f"{'N' if south >= 0 else 'S'}{abs(south):02d}"
+            f"{'E' if west >= 0 else 'W'}{abs(west):03d}.tile")
+
+
+def tiles_for_bbox(bbox: BBox) -> List[Tuple[int, int]]:
+    """South-west corners of every tile overlapping a bounding box."""
+    south, west, north, east = bbox
+    rows = range(math.floor(south), min(89, math.ceil(north) - 1) + 1)
+    cols = range(math.floor(west), min(179, math.ceil(east) - 1) + 1)
+    return [(row, col) for row in rows for col in cols]
+
+
+class _Tile:
+    """One memory-mapped tile file."""
+
+    def __init__(self, path: Path):
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.band_count, self.south, self.west, self.cells = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Not a soil mirror tile (version {FORMAT_VERSION}): {path}")
+        self._band_bytes = self.cells * self.cells * VALUE.size
+
+    def offset(self, lat: float, lon: float) -> int:
+        """Byte offset of the cell containing a point in band 0."""
+        row = min(self.cells - 1, int((lat - self.south) * self.cells))
+        col = min(self.cells - 1, int((lon - self.west) * self.cells))
+        return HEADER.size + (row * self.cells + col) * VALUE.size
+
+    def grids(self) -> List[List[int]]:
+        """Every band grid as a row-major list of raw values."""
+        count = self.cells * self.cells
+        return [
+            list(struct.unpack_from(f'<{count}h', self._map, HEADER.size + band * self._band_bytes))
+            for band in range(self.band_count)
+        ]
+
+    def values(self, offset: int) -> List[int]:
+        """Raw value of every band at a cell offset."""
+        return [
+            VALUE.unpack_from(self._map, offset + band * self._band_bytes)[0]
+            for band in range(self.band_count)
+        ]
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def write_tile(path: Path, south: int, west: int, cells: int, bands: Sequence[Sequence[int]]):
+    """
+    Write a tile file atomically.
+
+    Args:
+        path: Tile file path
+        south: Latitude of the south edge
+        west: Longitude of the west edge
+        cells: Cells per degree (grid side length)
+        bands: One row-major grid of raw values per band
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(bands), south, west, cells))
+        for grid in bands:
+            if len(grid) != cells * cells:
+                raise ValueError(f"Band grid needs {cells * cells} values, got {len(grid)}")
+            f.write(struct.pack(f'<{len(grid)}h', *grid))
+    os.replace(tmp_path, path)
+
+
+class SoilMirror:
+    """Read access to a local SoilGrids mirror."""
+
+    def __init__(self, root: Path = DEFAULT_MIRROR_DIR):
+        self.root = Path(root)
+        manifest_path = self.root / 'manifest.json'
+        if manifest_path.exists():
+            with open(manifest_path) as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {'version': FORMAT_VERSION, 'bands': list(BANDS), 'tiles': {}}
+        self.bands: List[str] = self.manifest['bands']
+        self._tiles: Dict[Tuple[int, int], Optional[_Tile]] = {}
+
+    def __enter__(self) -> 'SoilMirror':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for tile in self._tiles.values():
+            if tile is not None:
+                tile.close()
+        self._tiles.clear()
+
+    def _tile(self, south: int, west: int) -> Optional[_Tile]:
+        key = (south, west)
+        if key not in self._tiles:
+            path = self.root / tile_name(south, west)
+            self._tiles[key] = _Tile(path) if path.exists() else None
+        return self._tiles[key]
+
+    def _decode(self, raw: Sequence[int]) -> Optional[Dict[str, float]]:
+        if NODATA in raw:
+            return None
+        return {band: value / BAND_SCALE.get(band, 1) for band, value in zip(self.bands, raw)}
+
+    def sample(self, lat: float, lon: float) -> Optional[Dict[str, float]]:
+        """
+        Band values at a point (pH, clay %).
+
+        Returns:
+            Value per band, or None outside the mirror or where there is no data
+        """
+        tile = self._tile(math.floor(lat), math.floor(lon))
+        if tile is None:
+            return None
+        return self._decode(tile.values(tile.offset(lat, lon)))
+
+    def sample_many(self, points: Iterable[Tuple[float, float]]) -> List[Optional[Dict[str, float]]]:
+        """Band values at many (lat, lon) points, read tile by tile."""
+        points = list(points)
+        order = sorted(range(len(points)),
+                       key=lambda i: (math.floor(points[i][0]), math.floor(points[i][1])))
+        results: List[Optional[Dict[str, float]]] = [None] * len(points)
+        current_key = None
+        tile = None
+        for index in order:
+            lat, lon = points[index]
+            key = (math.floor(lat), math.floor(lon))
+            if key != current_key:
+                current_key = key
+                tile = self._tile(*key)
+            if tile is not None:
+                results[index] = self._decode(tile.values(tile.offset(lat, lon)))
+        return results
+
+    def soil_data(self, lat: float, lon: float) -> Optional[Dict[str, Any]]:
+        """
+        Soil data for a point in the shape fetch_soil_data returns.
+
+        Returns:
+            Dictionary with soil pH and moisture, or None if the mirror does
+            not cover the point
+        """
+        values = self.sample(lat, lon)
+        if values is None:
+            return None
+        return {
+            'soil_ph': values['phh2o'],
+            'soil_moisture': moisture_from_clay(values['clay']),
+            'clay_content': values['clay'],
+            'source': 'soil-mirror',
+            'success': True
+        }
+
+    def build(
+        self,
+        bbox: BBox,
+        sampler: Sampler,
+        cells_per_degree: int = DEFAULT_CELLS_PER_DEGREE,
+        source: str = 'soilgrids-rest',
+        tiles: Optional[Iterable[Tuple[int, int]]] = None
+    ) -> Dict[str, int]:
+        """
+        Build (or rebuild) the tiles covering a region.
+
+        Only cells inside the bounding box are written; cells of an existing
+        tile outside it (mirrored by earlier builds) are kept. Cells the
+        sampler has no data for are stored as no data.
+
+        Raises:
+            ValueError: An existing tile has another resolution; rebuilding
+                        it would lose the regions mirrored into it
+
+        Args:
+            bbox: (south, west, north, east) region
+            sampler: Returns the raw band values at a cell centre
+            cells_per_degree: Grid resolution
+            source: Recorded in the manifest for each tile
+            tiles: Optional subset of tile corners to build
+
+        Returns:
+            Counts of tiles and sampled cells written
+        """
+        south, west, north, east = bbox
+        corners = list(tiles if tiles is not None else tiles_for_bbox(bbox))
+        for tile_south, tile_west in corners:
+            existing = self.resolution(tile_south, tile_west)
+            if existing is not None and existing != cells_per_degree:
+                raise ValueError(f"{tile_name(tile_south, tile_west)} is mirrored at {existing} cells per degree, "
+                                 f"not {cells_per_degree}")
+
+        tile_count = 0
+        sampled = 0
+        for tile_south, tile_west in corners:
+            grids = self._existing_grids(tile_south, tile_west, cells_per_degree)
+            for row in range(cells_per_degree):
+                lat = tile_south + (row + 0.5) / cells_per_degree
+                if not south <= lat <= north:
+                    continue
+                for col in range(cells_per_degree):
+                    lon = tile_west + (col + 0.5) / cells_per_degree
+                    if not west <= lon <= east:
+                        continue
+                    raw = sampler(lat, lon)
+                    for grid, band in zip(grids, self.bands):
+                        grid[row * cells_per_degree + col] = NODATA if raw is None else raw[band]
+                    if raw is not None:
+                        sampled += 1
+            self._replace_tile(tile_south, tile_west, cells_per_degree, grids, source, bbox)
+            tile_count += 1
+        self._save_manifest()
+        return {'tiles': tile_count, 'cells': sampled}
+
+    def import_xyz(
+        self,
+        bbox: BBox,
+        band_files: Dict[str, Path],
+        cells_per_degree: int = DEFAULT_CELLS_PER_DEGREE
+    ) -> Dict[str, int]:
+        """
+        Build the tiles of a region from XYZ raster exports.
+
+        Args:
+            bbox: (south, west, north, east) region
+            band_files: XYZ file ("lon lat value" per line) per band, in
+                        SoilGrids mapped units
+            cells_per_degree: Grid resolution; source pixels falling into
+                              the same cell are averaged
+
+        Returns:
+            Counts of tiles and filled cells written
+        """
+        south, west, north, east = bbox
+        sums: Dict[Tuple[int, int], List[List[float]]] = {}
+        for band_index, band in enumerate(self.bands):
+            with open(band_files[band]) as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) < 3:
+                        continue
+                    lon, lat, value = float(parts[0]), float(parts[1]), float(parts[2])
+                    if value == NODATA or not (south <= lat <= north and west <= lon <= east):
+                        continue
+                    cell = (math.floor(lat * cells_per_degree), math.floor(lon * cells_per_degree))
+                    totals = sums.setdefault(cell, [[0.0, 0] for _ in self.bands])
+                    totals[band_index][0] += value
+                    totals[band_index][1] += 1
+
+        def sampler(lat: float, lon: float) -> Optional[Dict[str, int]]:
+            totals = sums.get((math.floor(lat * cells_per_degree), math.floor(lon * cells_per_degree)))
+            if totals is None or any(count == 0 for _, count in totals):
+                return None
+            return {band: round(total / count) for band, (total, count) in zip(self.bands, totals)}
+
+        return self.build(bbox, sampler, cells_per_degree, source='xyz')
+
+    def resolution(self, south: int, west: int) -> Optional[int]:
+        """Cells per degree of an existing tile, or None if it is not mirrored."""
+        tile = self._tile(south, west)
+        return tile.cells if tile is not None else None
+
+    def _existing_grids(self, south: int, west: int, cells: int) -> List[List[int]]:
+        tile = self._tile(south, west)
+        if tile is not None:
+            return tile.grids()
+        self.manifest['tiles'].pop(tile_name(south, west), None)
+        return [[NODATA] * (cells * cells) for _ in self.bands]
+
+    def _replace_tile(self, south: int, west: int, cells: int, grids: List[List[int]], source: str, bbox: BBox):
+        name = tile_name(south, west)
+        old = self._tiles.pop((south, west), None)
+        if old is not None:
+            old.close()
+        write_tile(self.root / name, south, west, cells, grids)
+        entry = self.manifest['tiles'].setdefault(name, {'south': south, 'west': west, 'regions': []})
+        entry['cells_per_degree'] = cells
+        entry['regions'] = [region for region in entry['regions'] if region['bbox'] != list(bbox)]
+        entry['regions'].append({
+            'bbox': list(bbox),
+            'source': source,
+            'built_at': datetime.now().isoformat()
+        })
+
+    def _save_manifest(self):
+        path = self.root / 'manifest.json'
+        tmp_path = path.with_name(f"manifest.json.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def stale_regions(self, max_age: timedelta) -> List[Tuple[int, int, Dict[str, Any]]]:
+        """Tile corner and region of every region mirrored longer than max_age ago."""
+        cutoff = datetime.now() - max_age
+        return [
+            (entry['south'], entry['west'], region)
+            for entry in self.manifest['tiles'].values()
+            for region in entry['regions']
+            if datetime.fromisoformat(region['built_at']) < cutoff
+        ]
+
+
+def soilgrids_sample(lat: float, lon: float) -> Optional[Dict[str, int]]:
+    """Raw topsoil pH and clay at a point from the SoilGrids REST API."""
+    with urllib.request.urlopen(SOILGRIDS_QUERY_URL.format(lat=lat, lon=lon), timeout=30) as response:
+        data = json.loads(response.read().decode())
+    values = {}
+    for layer in data['properties']['layers']:
+        mean = layer['depths'][0]['values']['mean']
+        if mean is None:
+            return None
+        values[layer['name']] = mean
+    return values
+
+
+_mirrors: Dict[str, SoilMirror] = {}
+
+
+def default_mirror() -> Optional[SoilMirror]:
+    """
+    Mirror configured through SOIL_MIRROR_DIR (or the default location),
+    opened once per process.
+
+    Returns:
+        SoilMirror, or None if no mirror has been built
+    """
+    root = os.getenv('SOIL_MIRROR_DIR', str(DEFAULT_MIRROR_DIR))
+    if root not in _mirrors:
+        if not (Path(root) / 'manifest.json').exists():
+            return None
+        _mirrors[root] = SoilMirror(Path(root))
+    return _mirrors[root]
+
+
+def main():
+    """Main entry point for command-line usage."""
+    parser = argparse.ArgumentParser(description="Local SoilGrids mirror")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help="Sample a region from the SoilGrids REST API")
+    build.add_argument('--bbox', type=float, nargs=4, required=True,
+                       metavar=('SOUTH', 'WEST', 'NORTH', 'EAST'))
+    build.add_argument('--cells-per-degree', type=int, default=DEFAULT_CELLS_PER_DEGREE)
+
+    xyz = commands.add_parser('import', help="Build a region from XYZ raster exports")
+    xyz.add_argument('--bbox', type=float, nargs=4, required=True,
+                     metavar=('SOUTH', 'WEST', 'NORTH', 'EAST'))
+    xyz.add_argument('--xyz', action='append', required=True, metavar='BAND=PATH')
+    xyz.add_argument('--cells-per-degree', type=int, default=DEFAULT_CELLS_PER_DEGREE)
+
+    refresh = commands.add_parser('refresh', help="Re-sample regions older than --max-age-days")
+    refresh.add_argument('--max-age-days', type=float, default=180)
+
+    query = commands.add_parser('query', help="Soil data at a point")
+    query.add_argument('lat', type=float)
+    query.add_argument('lon', type=float)
+
+    args = parser.parse_args()
+    mirror = SoilMirror(Path(os.getenv('SOIL_MIRROR_DIR', str(DEFAULT_MIRROR_DIR))))
+
+    def rest_sampler(lat: float, lon: float) -> Optional[Dict[str, int]]:
+        try:
+            return soilgrids_sample(lat, lon)
+        except Exception as e:
+            print(f"Warning: SoilGrids sample failed for {lat:.4f}, {lon:.4f} - {str(e)}", file=sys.stderr)
+            return None
+
+    if args.command in ('build', 'import'):
+        try:
+            if args.command == 'build':
+                result = mirror.build(tuple(args.bbox), rest_sampler, args.cells_per_degree)
+            else:
+                band_files = dict(item.split('=', 1) for item in args.xyz)
+                missing = [band for band in mirror.bands if band not in band_files]
+                if missing:
+                    parser.error(f"import needs --xyz for bands: {', '.join(missing)}")
+                result = mirror.import_xyz(tuple(args.bbox),
+                                           {band: Path(path) for band, path in band_files.items()},
+                                           args.cells_per_degree)
+        except ValueError as e:
+            print(json.dumps({'success': False, 'error': str(e)}, indent=2))
+            sys.exit(1)
+        print(json.dumps({'success': True, **result}, indent=2))
+
+    elif args.command == 'refresh':
+        stale = mirror.stale_regions(timedelta(days=args.max_age_days))
+        refreshed = {'tiles': 0, 'cells': 0}
+        for south, west, region in stale:
+            if region['source'] == 'xyz':
+                print(f"Warning: {tile_name(south, west)} region {region['bbox']} was imported from XYZ; "
+                      f"re-run import", file=sys.stderr)
+                continue
+            # Each tile is refreshed at its own resolution
+            cells = mirror.resolution(south, west)
+            if cells is None:
+                print(f"Warning: {tile_name(south, west)} is listed but missing; re-run build",
+                      file=sys.stderr)
+                continue
+            result = mirror.build(tuple(region['bbox']), rest_sampler, cells, tiles=[(south, west)])
+            refreshed['tiles'] += result['tiles']
+            refreshed['cells'] += result['cells']
+        print(json.dumps({'success': True, 'stale': len(stale), **refreshed}, indent=2))
+
+    else:
+        soil = mirror.soil_data(args.lat, args.lon)
+        if soil is None:
+            print(json.dumps({'success': False, 'error': "Location not covered by the soil mirror"}, indent=2))
+            sys.exit(1)
+        print(json.dumps(soil, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Species Suitability Matrix
+==========================
+Matches sites against a species tolerance table (pH, soil moisture,
+temperature and annual rainfall ranges) and returns the best N species
+per site.
+
+Each factor scores 1.0 inside the species' range and falls off linearly
+to 0 over a margin outside it; the species score is 100 x the product of
+the factors, so one limiting factor rules a species out. Species rainfall
+ranges are annual, so the rainfall factor only applies when a site
+carries "annual_rainfall"; the analyzer's 14-day total is not comparable.
+
+For every factor the species' non-zero ranges are indexed as bitsets
+over the sorted range edges. Matching a site ANDs four precomputed
+bitsets to get the few species that can score above zero, and only those
+are scored, so thousands of species cost about as much as a handful.
+
+The default table is the frontend species catalog (src/data/species.json).
+
+Usage:
+    python species_matcher.py '{"soil_ph": 6.5, "soil_moisture": 65, "temperature": 28,
+                                "annual_rainfall": 1400, "top_n": 5}'
+
+Author: Habitat Canopy Team
+Version: 1.0.0
+"""
+
+import bisect
+import heapq
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+
+DEFAULT_SPECIES_FILE = Path(__file__).parent.parent / 'src' / 'data' / 'species.json'
+
+
+# Soil moisture range (%) implied by drought tolerance when a species has
+# no explicit moistureRange
+DROUGHT_MOISTURE_RANGES = {
+    "very_high": (15, 70),
+    "high": (25, 75),
+    "medium": (35, 85),
+    "low": (45, 95)
+}
+
+# Distance outside a range at which a factor reaches 0. Rainfall uses a
+# fraction of the violated bound because its ranges span orders of magnitude.
+PH_MARGIN = 0.5
+MOISTURE_MARGIN = 10.0
+TEMPERATURE_MARGIN = 3.0
+RAINFALL_MARGIN_FRACTION = 0.25
+
+FACTORS = ("ph", "moisture", "temperature", "rainfall")
+
+DEFAULT_TOP_N = 5
+
+
+def factor_score(value: float, low: float, high: float, margin_low: float, margin_high: float) -> float:
+    """1.0 inside [low, high], falling linearly to 0 over the margins."""
+    if value < low:
+        return max(0.0, 1.0 - (low - value) / margin_low) if margin_low > 0 else 0.0
+    if value > high:
+        return max(0.0, 1.0 - (value - high) / margin_high) if margin_high > 0 else 0.0
+    return 1.0
+
+
+def tolerance_from_species(species: Dict[str, Any]) -> Dict[str, Tuple[float, float]]:
+    """
+    Tolerance ranges of one species-table entry.
+
+    Args:
+        species: Entry with phRange, temperatureRange, minRainfall,
+                 maxRainfall and moistureRange or droughtTolerance
+
+    Returns:
+        (low, high) range per factor
+    """
+    moisture = species.get("moistureRange") or DROUGHT_MOISTURE_RANGES[
+        species.get("droughtTolerance", "medium")
+    ]
+    return {
+        "ph": tuple(species["phRange"]),
+        "moisture": tuple(moisture),
+        "temperature": tuple(species["temperatureRange"]),
+        "rainfall": (species["minRainfall"], species["maxRainfall"])
+    }
+
+
+def load_species_table(path: Optional[Path] = None) -> List[Dict[str, Any]]:
+    """
+    Load the species tolerance table.
+
+    Args:
+        path: JSON file with a "species" list (defaults to SPECIES_TABLE
+              or the frontend species catalog)
+
+    Returns:
+        List of species entries
+    """
+    path = Path(path or os.getenv('SPECIES_TABLE', str(DEFAULT_SPECIES_FILE)))
+    with open(path) as f:
+        data = json.load(f)
+    return data["species"] if isinstance(data, dict) else data
+
+
+def _set_bits(mask: int) -> List[int]:
+    """Indices of the set bits of a bitset, lowest first."""
+    bits = bin(mask)[:1:-1]
+    indices = []
+    position = bits.find('1')
+    while position >= 0:
+        indices.append(position)
+        position = bits.find('1', position + 1)
+    return indices
+
+
+class _FactorIndex:
+    """Bitsets of the species whose range covers each value interval."""
+
+    def __init__(self, lows: Sequence[float], highs: Sequence[float]):
+        # masks[k] covers the open interval below edges[k]; points[k] covers
+        # edges[k] itself, including zero-width ranges (low == high)
+        events = sorted(
+            [(low, 0, index) for index, low in enumerate(lows)]
+            + [(high, 1, index) for index, high in enumerate(highs)]
+        )
+        self.edges: List[float] = []
+        self.masks: List[int] = [0]
+        self.points: List[int] = []
+        mask = 0
+        for edge, closes, index in events:
+            if not self.edges or self.edges[-1] != edge:
+                self.edges.append(edge)
+                self.masks.append(mask)
+                self.points.append(mask)
+            # Opens sort before closes, so a range is in the point mask of
+            # every edge it touches, and leaves the mask after its high edge
+            if closes:
+                mask &= ~(1 << index)
+            else:
+                mask |= 1 << index
+                self.points[-1] |= 1 << index
+            self.masks[-1] = mask
+
+    def closed_interval(self, value: float) -> int:
+        """Species with low <= value <= high."""
+        position = bisect.bisect_left(self.edges, value)
+        if position < len(self.edges) and self.edges[position] == value:
+            return self.points[position]
+        return self.masks[position]
+
+
+class SpeciesMatcher:
+    """Scores sites against a whole species table at once."""
+
+    def __init__(self, species: Sequence[Dict[str, Any]]):
+        self.species = list(species)
+        self.ranges = [tolerance_from_species(entry) for entry in self.species]
+
+        # Flat (low, high, margin_low, margin_high) per factor for the hot loop
+        self._bounds = []
+        for ranges in self.ranges:
+            rain_low, rain_high = ranges["rainfall"]
+            margins = {
+                "ph": (PH_MARGIN, PH_MARGIN),
+                "moisture": (MOISTURE_MARGIN, MOISTURE_MARGIN),
+                "temperature": (TEMPERATURE_MARGIN, TEMPERATURE_MARGIN),
+                "rainfall": (rain_low * RAINFALL_MARGIN_FRACTION, rain_high * RAINFALL_MARGIN_FRACTION)
+            }
+            self._bounds.append(tuple(
+                (ranges[factor][0], ranges[factor][1]) + margins[factor] for factor in FACTORS
+            ))
+
+        # Non-zero score ranges (tolerance plus margins) and full-score ranges
+        self._reach = [
+            _FactorIndex(
+                [bounds[position][0] - bounds[position][2] for bounds in self._bounds],
+                [bounds[position][1] + bounds[position][3] for bounds in self._bounds]
+            )
+            for position in range(len(FACTORS))
+        ]
+        self._core = [
+            _FactorIndex(
+                [bounds[position][0] for bounds in self._bounds],
+                [bounds[position][1] for bounds in self._bounds]
+            )
+            for position in range(len(FACTORS))
+        ]
+
+    @staticmethod
+    def site_values(site: Dict[str, float]) -> Tuple[Optional[float], ...]:
+        """Factor values of a site in FACTORS order (None = not available)."""
+        annual_rainfall = site.get("annual_rainfall")
+        return (
+            float(site["soil_ph"]),
+            float(site["soil_moisture"]),
+            float(site["temperature"]),
+            float(annual_rainfall) if annual_rainfall is not None else None
+        )
+
+    def factors(self, index: int, values: Sequence[Optional[float]]) -> Dict[str, float]:
+        """Per-factor scores (0-1) of one species at a site."""
+        return {
+            factor: round(factor_score(value, *bounds), 3)
+            for factor, value, bounds in zip(FACTORS, values, self._bounds[index])
+            if value is not None
+        }
+
+    def score(self, index: int, values: Sequence[Optional[float]]) -> float:
+        """Unrounded suitability (0-100) of one species at a site."""
+        product = 1.0
+        for value, (low, high, margin_low, margin_high) in zip(values, self._bounds[index]):
+            if value is None:
+                continue
+            if value < low:
+                if value <= low - margin_low:
+                    return 0.0
+                product *= 1.0 - (low - value) / margin_low
+            elif value > high:
+                if value >= high + margin_high:
+                    return 0.0
+                product *= 1.0 - (value - high) / margin_high
+        return product * 100
+
+    def _entry(self, index: int, score: float, values: Sequence[Optional[float]]) -> Dict[str, Any]:
+        entry = self.species[index]
+        factors = self.factors(index, values)
+        limiting = min(factors, key=lambda factor: factors[factor])
+        return {
+            "name": entry.get("name"),
+            "scientific_name": entry.get("scientificName"),
+            "score": round(score, 1),
+            "factors": factors,
+            "limiting_factor": limiting if factors[limiting] < 1 else None
+        }
+
+    def match(self, site: Dict[str, float], top_n: int = DEFAULT_TOP_N) -> List[Dict[str, Any]]:
+        """
+        Best species for one site. Ties keep table order.
+
+        Args:
+            site: Analyzer inputs (soil_ph, soil_moisture, temperature)
+                  and optionally annual_rainfall in mm
+            top_n: Number of species to return
+
+        Returns:
+            Species ranked by score, each with its factor breakdown and
+            limiting factor (None when every factor is within range)
+        """
+        values = self.site_values(site)
+
+        # Fast path: enough species tolerate every factor fully (score 100)
+        core = -1
+        for index, value in zip(self._core, values):
+            if value is not None:
+                core &= index.closed_interval(value)
+        if core:
+            perfect = _set_bits(core)
+            if len(perfect) >= top_n:
+                return [self._entry(index, 100.0, values) for index in perfect[:top_n]]
+
+        reach = -1
+        for index, value in zip(self._reach, values):
+            if value is None:
+                continue
+            reach &= index.closed_interval(value)
+            if not reach:
+                return []
+
+        score = self.score
+        scored = []
+        for index in _set_bits(reach):
+            value = score(index, values)
+            if value > 0:
+                scored.append((value, -index))
+
+        return [
+            self._entry(-negative_index, value, values)
+            for value, negative_index in heapq.nlargest(top_n, scored)
+        ]
+
+    def match_many(self, sites: Sequence[Dict[str, float]], top_n: int = DEFAULT_TOP_N) -> List[List[Dict[str, Any]]]:
+        """Best species for every site (sites x species evaluation)."""
+        return [self.match(site, top_n) for site in sites]
+
+
+_default_matcher: Optional[SpeciesMatcher] = None
+
+
+def default_matcher() -> Optional[SpeciesMatcher]:
+    """
+    Matcher over the default species table, built once per process.
+
+    Returns:
+        SpeciesMatcher, or None if the table is not available
+    """
+    global _default_matcher
+    if _default_matcher is None:
+        try:
+            _default_matcher = SpeciesMatcher(load_species_table())
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Warning: Species table unavailable - {str(e)}", file=sys.stderr)
+            return None
+    return _default_matcher
+
+
+def recommended_species(site: Dict[str, float], top_n: int = 3) -> List[str]:
+    """Names of the best species for a site, [] without a species table."""
+    matcher = default_matcher()
+    if matcher is None:
+        return []
+    return [entry["name"] for entry in matcher.match(site, top_n)]
+
+
+def main():
+    """
+    Main entry point for command-line usage.
+    Reads one site or a list of sites as JSON from the command line or
+    stdin; "top_n" sets the number of species per site.
+    """
+    from site_analyzer import parse_input_data
+
+    json_input = sys.argv[1] if len(sys.argv) > 1 else sys.stdin.read()
+    try:
+        request = json.loads(json_input)
+    except json.JSONDecodeError as e:
+        print(json.dumps({"success": False, "error": f"Invalid JSON format: {str(e)}"}, indent=2))
+        sys.exit(1)
+
+    matcher = default_matcher()
+    if matcher is None:
+        print(json.dumps({"success": False, "error": "Species table unavailable"}, indent=2))
+        sys.exit(1)
+
+    sites = request if isinstance(request, list) else [request]
+    results = []
+    for site in sites:
+        data = parse_input_data(json.dumps(site))
+        if site.get("annual_rainfall") is not None:
+            data["annual_rainfall"] = float(site["annual_rainfall"])
+        results.append({
+            "input_data": data,
+            "species": matcher.match(data, int(site.get("top_n", DEFAULT_TOP_N)))
+        })
+
+    output = {"success": True, "results": results}
+    if not isinstance(request, list):
+        output = {"success": True, **results[0]}
+    print(json.dumps(output, indent=2))
+
+
+if __name__ == "__main__":
+    main()
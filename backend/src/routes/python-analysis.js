@@ -1,5 +1,5 @@
 import express from 'express';
-import { exec } from 'child_process';
+import { exec, spawn } from 'child_process';
 import { promisify } from 'util';
 import path from 'path';
 import { fileURLToPath } from 'url';
@@ -86,6 +86,50 @@ router.post('/analyze', async (req, res) => {
   }
 });
 
+/**
+ * GET /api/python-analysis/result?lat=..&lon=..&maxAge=..
+ * Latest stored analysis for a location, served from the Python result store
+ * without re-fetching upstream data (for dashboard refreshes)
+ */
+router.get('/result', async (req, res) => {
+  const lat = parseFloat(req.query.lat);
+  const lon = parseFloat(req.query.lon);
+
+  if (Number.isNaN(lat) || Number.isNaN(lon)) {
+    return res.status(400).json({ error: 'Latitude and longitude are required' });
+  }
+
+  const storeScript = path.join(__dirname, '../../result_store.py');
+  const maxAge = req.query.maxAge ? ` --max-age ${parseFloat(req.query.maxAge)}` : '';
+
+  try {
+    const { stdout } = await execAsync(`python "${storeScript}" latest ${lat} ${lon}${maxAge}`, {
+      timeout: 10000
+    });
+    res.json(JSON.parse(stdout));
+  } catch (error) {
+    // The store exits non-zero with a JSON body when nothing is stored
+    if (error.stdout) {
+      return res.status(404).json(JSON.parse(error.stdout));
+    }
+    res.status(500).json({
+      error: 'Failed to read stored analysis',
+      details: error.message
+    });
+  }
+});
+
+/**
+ * GET /api/python-analysis/tiles/:z/:x/:y.json
+ * Precomputed suitability tiles written by suitability_tiles.py, served as
+ * static files so map panning never runs the analyzer
+ */
+const tileDir = process.env.TILE_DIR || path.join(__dirname, '../../data/tiles');
+router.use('/tiles', express.static(tileDir, { maxAge: '1h' }));
+router.get('/tiles/:z/:x/:y.json', (req, res) => {
+  res.status(404).json({ error: 'Tile not found' });
+});
+
 /**
  * GET /api/python-analysis/test
  * Test endpoint to verify Python integration
@@ -179,4 +223,47 @@ router.post('/batch', async (req, res) => {
   }
 });
 
+/**
+ * POST /api/python-analysis/stream
+ * Analyze many locations, streaming NDJSON events (start, result, progress
+ * with ETA, done/cancelled) as each analysis completes. There is no overall
+ * timeout or buffer limit; closing the connection cancels the job.
+ *
+ * Body: { locations: [{ lat, lon, name }], workers?: number }
+ */
+router.post('/stream', (req, res) => {
+  const { locations, workers } = req.body;
+
+  if (!Array.isArray(locations) || locations.length === 0) {
+    return res.status(400).json({
+      error: 'locations array is required',
+      example: { locations: [{ lat: 14.0, lon: 75.5, name: 'Site 1' }] }
+    });
+  }
+
+  const streamScript = path.join(__dirname, '../../analysis_stream.py');
+  const child = spawn('python', [streamScript], { stdio: ['pipe', 'pipe', 'pipe'] });
+
+  res.status(200);
+  res.setHeader('Content-Type', 'application/x-ndjson');
+  res.setHeader('Cache-Control', 'no-cache');
+
+  child.stdout.pipe(res);
+  child.stderr.on('data', (chunk) => console.log('Python warnings:', chunk.toString()));
+  child.on('error', (error) => {
+    console.error('Stream analysis error:', error);
+    res.end(JSON.stringify({ event: 'error', success: false, error: error.message }) + '\n');
+  });
+
+  // Cancel the job when the client goes away before it finishes
+  res.on('close', () => {
+    if (child.exitCode === null && child.signalCode === null) {
+      console.log('🛑 Client disconnected - cancelling stream analysis');
+      child.kill('SIGTERM');
+    }
+  });
+
+  child.stdin.end(JSON.stringify({ locations, workers }));
+});
+
 export default router;
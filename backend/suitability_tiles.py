@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Suitability Tile Pyramid
+========================
+Precomputes map tiles of suitability scores and risk classes, so the map
+reads static files instead of running the analyzer per point.
+
+Tiles follow the XYZ (slippy map) scheme. Each tile is a JSON grid of
+TILE_CELLS x TILE_CELLS cells, row 0 at the north edge. At the deepest
+zoom every cell holds the mean final score of the input points inside it;
+each lower zoom is downsampled by averaging 2 x 2 child cells, and a
+cell's risk class is derived from its score.
+
+manifest.json keeps a hash of the inputs of every deepest-zoom tile.
+Rebuilding re-scores only tiles whose inputs changed (or that gained or
+lost all points) and the tiles above them, and leaves the rest untouched.
+Tiles can also be exported to an MBTiles (SQLite) file.
+
+Layout:
+    <z>/<x>/<y>.json    tiles
+    manifest.json       zoom range, tile size, input hash per deepest tile
+
+Usage:
+    python suitability_tiles.py build inputs.ndjson [--min-zoom 6] [--max-zoom 12]
+    python suitability_tiles.py mbtiles suitability.mbtiles
+    python suitability_tiles.py tile <z> <x> <y>
+
+Author: Habitat Canopy Team
+Version: 1.0.0
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+
+from batch_scoring import final_score, risk_level
+from result_store import round_inputs
+from site_analyzer import RULE_VERSIONS
+
+
+TILE_CELLS = 16
+DEFAULT_MIN_ZOOM = 6
+DEFAULT_MAX_ZOOM = 12
+MAX_LATITUDE = 85.05112878  # Web Mercator limit
+
+DEFAULT_TILE_DIR = Path(__file__).parent / 'data' / 'tiles'
+
+Grid = List[List[Optional[float]]]
+
+
+def cell_for(lat: float, lon: float, zoom: int) -> Tuple[int, int]:
+    """Global (column, row) of the cell containing a point at a zoom level."""
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    cells = TILE_CELLS * 2 ** zoom
+    lat_rad = math.radians(lat)
+    col = int((lon + 180.0) / 360.0 * cells)
+    row = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * cells)
+    return min(cells - 1, max(0, col)), min(cells - 1, max(0, row))
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """(south, west, north, east) of a tile."""
+    n = 2 ** z
+
+    def lat(row: float) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return lat(y + 1), x / n * 360.0 - 180.0, lat(y), (x + 1) / n * 360.0 - 180.0
+
+
+def empty_grid() -> Grid:
+    return [[None] * TILE_CELLS for _ in range(TILE_CELLS)]
+
+
+def downsample(children: Dict[Tuple[int, int], Grid]) -> Grid:
+    """
+    Parent grid from up to four child grids keyed by (dx, dy) quadrant.
+    Each parent cell is the mean of its non-empty 2 x 2 child cells.
+    """
+    half = TILE_CELLS // 2
+    parent = empty_grid()
+    for (dx, dy), grid in children.items():
+        for row in range(half):
+            for col in range(half):
+                values = [
+                    value
+                    for value in (grid[2 * row][2 * col], grid[2 * row][2 * col + 1],
+                                  grid[2 * row + 1][2 * col], grid[2 * row + 1][2 * col + 1])
+                    if value is not None
+                ]
+                if values:
+                    parent[dy * half + row][dx * half + col] = round(sum(values) / len(values), 2)
+    return parent
+
+
+def input_hash(points: List[Dict[str, Any]]) -> str:
+    """Hash of a tile's inputs and the scoring rules."""
+    canonical = sorted(
+        json.dumps({'lat': round(p['lat'], 6), 'lon': round(p['lon'], 6), **round_inputs(p)}, sort_keys=True)
+        for p in points
+    )
+    payload = json.dumps({'points': canonical, 'rules': RULE_VERSIONS, 'cells': TILE_CELLS})
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class TilePyramid:
+    """Suitability tiles on local disk."""
+
+    def __init__(self, root: Path = DEFAULT_TILE_DIR):
+        self.root = Path(root)
+
+    def _path(self, z: int, x: int, y: int) -> Path:
+        return self.root / str(z) / str(x) / f"{y}.json"
+
+    def _manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.root / 'manifest.json') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def tile(self, z: int, x: int, y: int) -> Optional[Dict[str, Any]]:
+        """Stored tile, or None."""
+        try:
+            with open(self._path(z, x, y)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _grid(self, z: int, x: int, y: int) -> Optional[Grid]:
+        tile = self.tile(z, x, y)
+        return tile['scores'] if tile else None
+
+    def _write(self, z: int, x: int, y: int, grid: Grid) -> bool:
+        """Write a tile, or remove it if the grid is empty. Returns True if written."""
+        path = self._path(z, x, y)
+        if all(value is None for row in grid for value in row):
+            if path.exists():
+                path.unlink()
+            return False
+        tile = {
+            'z': z, 'x': x, 'y': y,
+            'cells': TILE_CELLS,
+            'scores': grid,
+            'risk': [[risk_level(value) if value is not None else None for value in row] for row in grid]
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(tile, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+        return True
+
+    def build(
+        self,
+        points: Iterable[Dict[str, Any]],
+        min_zoom: int = DEFAULT_MIN_ZOOM,
+        max_zoom: int = DEFAULT_MAX_ZOOM
+    ) -> Dict[str, Any]:
+        """
+        Build or incrementally update the pyramid from input points.
+
+        Args:
+            points: Dicts with lat, lon and the analyzer inputs
+            min_zoom: Lowest zoom level to write
+            max_zoom: Zoom level scored from the points
+
+        Returns:
+            Summary with the number of tiles re-scored, written and removed
+        """
+        if not 0 <= min_zoom <= max_zoom:
+            raise ValueError("Zoom levels must satisfy 0 <= min_zoom <= max_zoom")
+
+        by_tile: Dict[Tuple[int, int], List[Dict[str, Any]]] = {}
+        for point in points:
+            col, row = cell_for(float(point['lat']), float(point['lon']), max_zoom)
+            by_tile.setdefault((col // TILE_CELLS, row // TILE_CELLS), []).append(point)
+
+        manifest = self._manifest()
+        same_layout = (manifest.get('min_zoom') == min_zoom and manifest.get('max_zoom') == max_zoom
+                       and manifest.get('cells') == TILE_CELLS)
+        old_hashes: Dict[str, str] = manifest.get('hashes', {}) if same_layout else {}
+        if not same_layout:
+            for z in range(manifest.get('min_zoom', 0), manifest.get('max_zoom', -1) + 1):
+                for path in (self.root / str(z)).glob('*/*.json'):
+                    path.unlink()
+
+        hashes = {f"{x}/{y}": input_hash(tile_points) for (x, y), tile_points in by_tile.items()}
+        dirty: Set[Tuple[int, int]] = {
+            (x, y) for (x, y) in by_tile if old_hashes.get(f"{x}/{y}") != hashes[f"{x}/{y}"]
+        }
+        removed = {tuple(int(part) for part in key.split('/')) for key in old_hashes if key not in hashes}
+
+        written = 0
+        for x, y in dirty:
+            sums: Dict[Tuple[int, int], List[float]] = {}
+            for point in by_tile[(x, y)]:
+                col, row = cell_for(float(point['lat']), float(point['lon']), max_zoom)
+                score = final_score(point['ndvi'], point['soil_ph'], point['soil_moisture'],
+                                    point['temperature'], point['rainfall'])
+                totals = sums.setdefault((row - y * TILE_CELLS, col - x * TILE_CELLS), [0.0, 0])
+                totals[0] += score
+                totals[1] += 1
+            grid = empty_grid()
+            for (row, col), (total, count) in sums.items():
+                grid[row][col] = round(total / count, 2)
+            written += self._write(max_zoom, x, y, grid)
+        for x, y in removed:
+            self._write(max_zoom, x, y, empty_grid())
+
+        changed = dirty | removed
+        for z in range(max_zoom - 1, min_zoom - 1, -1):
+            changed = {(x // 2, y // 2) for x, y in changed}
+            for x, y in changed:
+                children = {}
+                for dx in (0, 1):
+                    for dy in (0, 1):
+                        grid = self._grid(z + 1, 2 * x + dx, 2 * y + dy)
+                        if grid is not None:
+                            children[(dx, dy)] = grid
+                written += self._write(z, x, y, downsample(children))
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        manifest = {'min_zoom': min_zoom, 'max_zoom': max_zoom, 'cells': TILE_CELLS,
+                    'rules': RULE_VERSIONS, 'hashes': hashes}
+        tmp_path = self.root / f"manifest.json.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.root / 'manifest.json')
+
+        return {
+            'rescored_tiles': len(dirty),
+            'removed_tiles': len(removed),
+            'tiles_written': written,
+            'unchanged_tiles': len(by_tile) - len(dirty)
+        }
+
+    def export_mbtiles(self, path: Path) -> int:
+        """
+        Write all tiles to an MBTiles file (gzipped JSON tile data).
+
+        Returns:
+            Number of tiles exported
+        """
+        manifest = self._manifest()
+        path = Path(path)
+        if path.exists():
+            path.unlink()
+        connection = sqlite3.connect(path)
+        try:
+            connection.execute("CREATE TABLE metadata (name TEXT, value TEXT)")
+            connection.execute(
+                "CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB)"
+            )
+            connection.execute(
+                "CREATE UNIQUE INDEX tile_index ON tiles (zoom_level, tile_column, tile_row)"
+            )
+            connection.executemany("INSERT INTO metadata VALUES (?, ?)", [
+                ('name', 'suitability'),
+                ('format', 'json'),
+                ('minzoom', str(manifest.get('min_zoom', 0))),
+                ('maxzoom', str(manifest.get('max_zoom', 0))),
+                ('description', 'Reforestation suitability score and risk class per cell')
+            ])
+            count = 0
+            for tile_path in sorted(self.root.glob('*/*/*.json')):
+                z, x, y = int(tile_path.parts[-3]), int(tile_path.parts[-2]), int(tile_path.stem)
+                # MBTiles rows count from the south (TMS)
+                connection.execute(
+                    "INSERT INTO tiles VALUES (?, ?, ?, ?)",
+                    (z, x, 2 ** z - 1 - y, gzip.compress(tile_path.read_bytes()))
+                )
+                count += 1
+            connection.commit()
+        finally:
+            connection.close()
+        return count
+
+
+def load_points(path: Path) -> List[Dict[str, Any]]:
+    """Input points from a JSON list or NDJSON file."""
+    text = Path(path).read_text()
+    if text.lstrip().startswith('['):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def main():
+    """Main entry point for command-line usage."""
+    parser = argparse.ArgumentParser(description="Suitability tile pyramid")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help="Build or update tiles from input points")
+    build.add_argument('inputs', help="JSON or NDJSON file of {lat, lon, ndvi, soil_ph, ...} points")
+    build.add_argument('--min-zoom', type=int, default=DEFAULT_MIN_ZOOM)
+    build.add_argument('--max-zoom', type=int, default=DEFAULT_MAX_ZOOM)
+
+    mbtiles = commands.add_parser('mbtiles', help="Export the tiles to an MBTiles file")
+    mbtiles.add_argument('path')
+
+    tile = commands.add_parser('tile', help="Print one tile")
+    tile.add_argument('z', type=int)
+    tile.add_argument('x', type=int)
+    tile.add_argument('y', type=int)
+
+    args = parser.parse_args()
+    pyramid = TilePyramid(Path(os.getenv('TILE_DIR', str(DEFAULT_TILE_DIR))))
+
+    try:
+        if args.command == 'build':
+            result = pyramid.build(load_points(Path(args.inputs)), args.min_zoom, args.max_zoom)
+        elif args.command == 'mbtiles':
+            result = {'tiles': pyramid.export_mbtiles(Path(args.path))}
+        else:
+            result = pyramid.tile(args.z, args.x, args.y)
+            if result is None:
+                print(json.dumps({'success': False, 'error': "Tile not found"}, indent=2))
+                sys.exit(1)
+    except (OSError, KeyError, ValueError) as e:
+        print(json.dumps({'success': False, 'error': str(e)}, indent=2))
+        sys.exit(1)
+
+    print(json.dumps({'success': True, **result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test script for analysis_stream.py
+Checks the NDJSON event stream, time to first result for small and large
+jobs, and cancellation in-process and by signal.
+"""
+
+import json
+import signal
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from analysis_stream import stream_analyses
+
+
+def slow_analysis(seconds: float, calls: list):
+    def analyze(lat: float, lon: float) -> dict:
+        calls.append((lat, lon))
+        time.sleep(seconds)
+        if lat < 0:
+            raise RuntimeError("upstream failed")
+        return {"success": True, "summary": {"suitability_score": lat}}
+    return analyze
+
+
+def locations(count: int) -> list:
+    return [{"lat": float(i), "lon": 75.0, "name": f"Site {i}"} for i in range(count)]
+
+
+def test_event_stream() -> bool:
+    """Every location yields one result and one progress event, then done."""
+    events = []
+    job = locations(20) + [{"lat": -1.0, "lon": 75.0}]
+    final = stream_analyses(job, events.append, slow_analysis(0.01, []), workers=4)
+    results = [e for e in events if e["event"] == "result"]
+    progress = [e for e in events if e["event"] == "progress"]
+    json.dumps(events)
+    return (events[0] == {"event": "start", "total": 21, "workers": 4}
+            and sorted(e["index"] for e in results) == list(range(21))
+            and [p["completed"] for p in progress] == list(range(1, 22))
+            and progress[-1]["eta_seconds"] == 0 and progress[-1]["failed"] == 1
+            and final == events[-1] and final["event"] == "done" and final["completed"] == 21)
+
+
+def test_first_result_independent_of_size() -> bool:
+    """The first result of a 2000-site job arrives as fast as that of a 4-site job."""
+    first = {}
+    for size in (4, 2000):
+        cancel = threading.Event()
+        start = time.monotonic()
+
+        def emit(event, size=size, cancel=cancel, start=start):
+            if event["event"] == "result" and size not in first:
+                first[size] = time.monotonic() - start
+                cancel.set()
+
+        stream_analyses(locations(size), emit, slow_analysis(0.05, []), workers=4, cancel=cancel)
+    return first[4] < 0.2 and first[2000] < 0.2
+
+
+def test_cancel_drops_queued_work() -> bool:
+    """Cancelling stops the job promptly and never starts the queued locations."""
+    calls = []
+    events = []
+    cancel = threading.Event()
+    threading.Timer(0.25, cancel.set).start()
+    start = time.monotonic()
+    final = stream_analyses(locations(200), events.append, slow_analysis(0.1, calls),
+                            workers=4, cancel=cancel, grace_seconds=0.2)
+    elapsed = time.monotonic() - start
+    return (final["event"] == "cancelled" and final["completed"] < 200
+            and len(calls) <= 4 * 5 and elapsed < 1.0)
+
+
+def test_sigterm_cancels_process() -> bool:
+    """SIGTERM to a streaming process ends it with a cancelled event."""
+    script = (
+        "import threading, time, analysis_stream as s\n"
+        "cancel = threading.Event()\n"
+        "s.install_cancel_handlers(cancel)\n"
+        "s.stream_analyses([{'lat': 1, 'lon': 2}] * 100, s.ndjson_emitter(),\n"
+        "                  analyze=lambda lat, lon: time.sleep(0.2) or {'success': True},\n"
+        "                  workers=2, cancel=cancel)\n"
+    )
+    process = subprocess.Popen([sys.executable, "-c", script], stdout=subprocess.PIPE, text=True,
+                               cwd=Path(__file__).parent)
+    lines = []
+    for line in process.stdout:
+        lines.append(json.loads(line))
+        if lines[-1]["event"] == "result":
+            process.send_signal(signal.SIGTERM)
+            break
+    start = time.monotonic()
+    lines += [json.loads(line) for line in process.stdout]
+    process.wait(timeout=5)
+    return lines[-1]["event"] == "cancelled" and time.monotonic() - start < 2.0
+
+
+def main():
+    """Run all test cases."""
+    print("ANALYSIS STREAM TEST SUITE")
+    print("=" * 70)
+
+    tests = [
+        test_event_stream,
+        test_first_result_independent_of_size,
+        test_cancel_drops_queued_work,
+        test_sigterm_cancels_process
+    ]
+    tests_passed = 0
+    for test in tests:
+        passed = test()
+        tests_passed += passed
+        print(f"{'✓' if passed else '✗'} {test.__doc__}")
+
+    print(f"\n{'=' * 70}")
+    print(f"TEST SUMMARY: {tests_passed}/{len(tests)} tests passed")
+    print(f"{'=' * 70}")
+
+    return 0 if tests_passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Test script for bulk_jobs.py
+Checks deterministic sharding, several worker processes sharing one job
+directory, resuming after an interrupted run, lease takeover (including
+a worker losing its claim mid-shard), and the merged ranking against a
+single-machine ranking.
+"""
+
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bulk_jobs import BulkJob
+from site_ranking import grid_candidates, rank_sites
+
+
+SCRIPT = Path(__file__).parent / "bulk_jobs.py"
+
+
+def offline_sites(count: int, seed: int = 3) -> list:
+    rng = random.Random(seed)
+    return [
+        {
+            "name": f"Site {i}",
+            "lat": round(rng.uniform(8, 30), 4),
+            "lon": round(rng.uniform(68, 90), 4),
+            "ndvi": round(rng.uniform(0, 1), 3),
+            "soil_ph": round(rng.uniform(4, 9), 2),
+            "soil_moisture": round(rng.uniform(10, 95), 1),
+            "temperature": round(rng.uniform(5, 45), 1),
+            "rainfall": round(rng.uniform(0, 500), 1)
+        }
+        for i in range(count)
+    ]
+
+
+def fake_analysis(lat: float, lon: float) -> dict:
+    """Stand-in for analyze_site_from_location, derived from the location."""
+    from site_analyzer import score_site_inputs
+    inputs = {"ndvi": (lat % 1), "soil_ph": 5 + (lon % 3), "soil_moisture": 60,
+              "temperature": 25, "rainfall": 150}
+    return {"success": True, "input_data": inputs, "analysis": score_site_inputs(inputs)}
+
+
+def test_deterministic_shards() -> bool:
+    """Planning is repeatable, covers every candidate once and rejects a conflicting plan."""
+    with tempfile.TemporaryDirectory() as tmp:
+        sites = offline_sites(250)
+        first = BulkJob.plan(Path(tmp) / "a", sites=sites, shard_size=40, k=5)
+        again = BulkJob.plan(Path(tmp) / "a", sites=sites, shard_size=40, k=5)
+        other = BulkJob.plan(Path(tmp) / "b", sites=sites, shard_size=40, k=5)
+        covered = [site for shard in range(len(first.manifest["shards"])) for site in first.candidates(shard)]
+
+        region = BulkJob.plan(Path(tmp) / "region", bbox=(12, 74, 13, 75), step=0.1, shard_size=30)
+        cells = [c for shard in range(len(region.manifest["shards"])) for c in region.candidates(shard)]
+
+        try:
+            BulkJob.plan(Path(tmp) / "a", sites=sites, shard_size=50, k=5)
+            conflict_rejected = False
+        except ValueError:
+            conflict_rejected = True
+
+    return (
+        len(first.manifest["shards"]) == 7
+        and first.manifest["job_id"] == again.manifest["job_id"] == other.manifest["job_id"]
+        and covered == sites
+        and cells == list(grid_candidates(12, 74, 13, 75, 0.1))
+        and conflict_rejected
+    )
+
+
+def test_parallel_workers_match_single_ranking() -> bool:
+    """Four worker processes share the shards and the merge equals a single-machine ranking."""
+    with tempfile.TemporaryDirectory() as tmp:
+        sites = offline_sites(20000)
+        sites_file = Path(tmp) / "sites.json"
+        sites_file.write_text(json.dumps({"sites": sites}))
+        job_dir = Path(tmp) / "job"
+        subprocess.run([sys.executable, str(SCRIPT), "plan", str(job_dir), "--sites", str(sites_file),
+                        "--shard-size", "200", "--k", "25"], check=True, capture_output=True)
+
+        workers = [
+            subprocess.Popen([sys.executable, str(SCRIPT), "work", str(job_dir), "--worker", f"node-{i}"],
+                             stdout=subprocess.PIPE, text=True)
+            for i in range(4)
+        ]
+        reports = [json.loads(worker.communicate()[0]) for worker in workers]
+        processed = [shard for report in reports for shard in report["processed"]]
+
+        merged = BulkJob(job_dir).merge()
+        saved = json.loads((job_dir / "result.json").read_text())
+
+    expected = rank_sites(sites, k=25)["results"]
+    return (
+        sorted(processed) == list(range(100))
+        and sum(1 for report in reports if report["processed"]) > 1
+        and merged == saved
+        and merged["summary"]["scored"] == 20000
+        and sum(merged["summary"]["risk_levels"].values()) == 20000
+        and sum(merged["summary"]["histogram"]) == 20000
+        and [(r["name"], r["final_score"], r["rank"]) for r in merged["results"]]
+        == [(r["name"], r["final_score"], r["rank"]) for r in expected]
+    )
+
+
+def test_rerun_skips_finished_shards() -> bool:
+    """An interrupted job resumes with only the unfinished shards; merging early needs --partial."""
+    with tempfile.TemporaryDirectory() as tmp:
+        calls = []
+
+        def analyze(lat, lon):
+            calls.append((lat, lon))
+            return fake_analysis(lat, lon)
+
+        job = BulkJob.plan(Path(tmp), bbox=(10, 70, 11, 71), step=0.1, shard_size=20, k=10)
+        first = job.work("node-a", analyze=analyze, max_shards=3)
+        calls_after_first = len(calls)
+        try:
+            job.merge()
+            incomplete_rejected = False
+        except RuntimeError:
+            incomplete_rejected = True
+        partial = job.merge(partial=True)
+
+        second = job.work("node-b", analyze=analyze)
+        third = job.work("node-c", analyze=analyze)
+        merged = job.merge()
+
+    shards = job.manifest["shards"]
+    first_size = sum(shards[i]["stop"] - shards[i]["start"] for i in first["processed"])
+    return (
+        len(first["processed"]) == 3 and calls_after_first == first_size
+        and incomplete_rejected and not partial["complete"]
+        and len(second["processed"]) == len(shards) - 3 and second["already_finished"] == 3
+        and third["processed"] == [] and third["already_finished"] == len(shards)
+        and len(calls) == 121
+        and merged["complete"] and merged["summary"]["scored"] == 121
+    )
+
+
+def test_expired_lease_taken_over() -> bool:
+    """A live claim blocks other workers; an expired one (crashed worker) is taken over."""
+    with tempfile.TemporaryDirectory() as tmp:
+        job = BulkJob.plan(Path(tmp), sites=offline_sites(30), shard_size=10, k=3)
+        held = job.claim(0, "node-a", lease=60)
+        blocked = not job.claim(0, "node-b", lease=60)
+        crashed = job.claim(1, "node-crashed", lease=0.05)
+        time.sleep(0.1)
+        taken = job.work("node-b")
+        job.release(0, "node-b")
+        still_held = job.claim_owner(0) == "node-a"
+        job.release(0, "node-a")
+        finished = job.work("node-c")
+
+    return (
+        held and blocked and crashed and still_held
+        and taken["processed"] == [1, 2] and taken["claimed_elsewhere"] == 1
+        and finished["processed"] == [0] and finished["already_finished"] == 2
+    )
+
+
+def test_lost_claim_abandons_shard() -> bool:
+    """A worker whose lease expired mid-shard stops it, keeps the new owner's claim and moves on."""
+    with tempfile.TemporaryDirectory() as tmp:
+        job = BulkJob.plan(Path(tmp), bbox=(10, 70, 11, 71), step=0.1, shard_size=40, k=5)
+        taken_over = []
+
+        def stalled(lat, lon):
+            if not taken_over:
+                # Stall past the lease; another worker takes the shard over
+                shard = next(s for s in range(4) if job.claim_owner(s) == "node-a")
+                time.sleep(0.7)
+                taken_over.append((shard, job.claim(shard, "node-b", lease=60)))
+            return fake_analysis(lat, lon)
+
+        report = job.work("node-a", analyze=stalled, lease=0.6)
+        shard, claimed = taken_over[0]
+        abandoned = job.result(shard) is None and job.claim_owner(shard) == "node-b"
+        job.process(shard, "node-b", fake_analysis)
+        job.release(shard, "node-b")
+        merged = job.merge()
+
+    return (
+        claimed and abandoned
+        and report["lost_claims"] == [shard]
+        and sorted(report["processed"] + [shard]) == [0, 1, 2, 3]
+        and merged["complete"] and merged["summary"]["scored"] == 121
+    )
+
+
+def main():
+    """Run all test cases."""
+    print("BULK JOBS TEST SUITE")
+    print("=" * 70)
+
+    tests = [
+        test_deterministic_shards,
+        test_parallel_workers_match_single_ranking,
+        test_rerun_skips_finished_shards,
+        test_expired_lease_taken_over,
+        test_lost_claim_abandons_shard
+    ]
+    tests_passed = 0
+    for test in tests:
+        passed = test()
+        tests_passed += passed
+        print(f"{'✓' if passed else '✗'} {test.__doc__}")
+
+    print(f"\n{'=' * 70}")
+    print(f"TEST SUMMARY: {tests_passed}/{len(tests)} tests passed")
+    print(f"{'=' * 70}")
+
+    return 0 if tests_passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Test script for early_warning.py
+Checks that incremental statistics equal a full recomputation, the
+sudden change, drift and threshold rules, skipping of repeated inputs,
+persistence and throughput, and the NDJSON command-line input.
+"""
+
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import early_warning
+from early_warning import EarlyWarning, update_stats
+
+
+def stable_scores(rng: random.Random, final: float = 78.0) -> dict:
+    return {
+        "final_score": round(final + rng.gauss(0, 1.5), 2),
+        "vegetation": round(60 + rng.gauss(0, 2), 2),
+        "soil": 85.0,
+        "climate_stress": 15.0
+    }
+
+
+def test_incremental_matches_recomputation() -> bool:
+    """O(1) updates give the same baseline and variance as recomputing the whole history."""
+    rng = random.Random(1)
+    values = [70 + rng.gauss(0, 5) for _ in range(200)]
+    stats = None
+    for value in values:
+        stats, _ = update_stats(stats, value)
+
+    # Reference: exponentially weighted mean and variance over the full history
+    alpha = early_warning.BASELINE_ALPHA
+    weights = [alpha * (1 - alpha) ** (len(values) - 1 - i) for i in range(1, len(values))]
+    weights.insert(0, (1 - alpha) ** (len(values) - 1))
+    mean = sum(w * v for w, v in zip(weights, values))
+    variance = sum(w * (v - mean) ** 2 for w, v in zip(weights, values))
+
+    return (
+        stats["count"] == 200
+        and abs(stats["baseline"] - mean) < 1e-9
+        and abs(stats["variance"] - variance) / variance < 0.05
+    )
+
+
+def test_sudden_drop_and_threshold() -> bool:
+    """A stable site stays quiet; a sudden collapse raises sudden change and threshold alerts."""
+    rng = random.Random(2)
+    with tempfile.TemporaryDirectory() as tmp, EarlyWarning(Path(tmp) / "ew.sqlite") as detector:
+        quiet = []
+        for day in range(30):
+            quiet += detector.observe("site-a", stable_scores(rng), f"2024-06-{day + 1:02d}")
+        alerts = detector.observe("site-a", {"final_score": 45.0, "vegetation": 30.0,
+                                             "soil": 85.0, "climate_stress": 65.0}, "2024-07-01")
+        stored = detector.alerts("site-a")
+
+    rules = {(alert["metric"], alert["rule"], alert["severity"]) for alert in alerts}
+    return (
+        quiet == []
+        and ("final_score", "sudden_change", "warning") in rules
+        and ("final_score", "threshold", "warning") in rules
+        and ("final_score", "threshold", "critical") in rules
+        and ("climate_stress", "threshold", "warning") in rules
+        and ("vegetation", "sudden_change", "warning") in rules
+        and len(stored) == len(alerts)
+    )
+
+
+def test_drift_once_per_episode() -> bool:
+    """A gradual decline raises one drift alert, and another only after the site recovers."""
+    with tempfile.TemporaryDirectory() as tmp, EarlyWarning(Path(tmp) / "ew.sqlite") as detector:
+        def run(values):
+            raised = []
+            for value in values:
+                raised += [a for a in detector.observe("site-b", {"final_score": value}) if a["rule"] == "drift"]
+            return raised
+
+        first = run([90.0] * 10 + [90 - 2.5 * i for i in range(1, 9)])
+        still_low = run([70.0] * 3)
+        recovered = run([90.0] * 40)
+        second = run([90 - 2.5 * i for i in range(1, 9)])
+
+    return len(first) == 1 and still_low == [] and recovered == [] and len(second) == 1
+
+
+def test_repeated_inputs_observed_once() -> bool:
+    """Repeats of a site's last inputs (cached page views) do not count as observations."""
+    def result(final: float, day: int) -> dict:
+        return {"success": True, "location": {"lat": 14.0, "lon": 75.5},
+                "timestamp": f"2024-06-{day:02d}T08:00:00",
+                "input_data": {"ndvi": final / 100, "soil_ph": 6.5},
+                "analysis": {"site_suitability": {"final_score": final}}}
+
+    with tempfile.TemporaryDirectory() as tmp, EarlyWarning(Path(tmp) / "ew.sqlite") as detector:
+        raised = []
+        for day in range(1, 10):
+            raised += detector.observe_many([early_warning.parse_observation(result(80.0, day))])
+        raised += detector.observe_many([early_warning.parse_observation(result(76.0, 10))])
+        # A keyed repeat is skipped too, and returning to earlier inputs counts again
+        keyed = [detector.observe("site-k", {"final_score": 80.0}, None, "key-1") for _ in range(9)]
+        back = detector.observe("site-k", {"final_score": 76.0}, None, "key-2")
+        again = detector.observe("site-k", {"final_score": 80.0}, None, "key-1")
+        stats = detector.stats("14.0000,75.5000")["final_score"]
+        keyed_count = detector.stats("site-k")["final_score"]["count"]
+
+    return (
+        raised == [] and stats["count"] == 2 and stats["last"] == 76.0
+        and keyed == [[]] * 9 and back == [] and again == [] and keyed_count == 3
+    )
+
+
+def test_persistence_and_throughput() -> bool:
+    """Statistics persist across reopen; 20,000 sites are updated in seconds, alerts can be acknowledged."""
+    rng = random.Random(3)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "ew.sqlite"
+        with EarlyWarning(path) as detector:
+            detector.observe_many(
+                (f"site-{i}", stable_scores(rng), "2024-06-01") for i in range(20000)
+            )
+        started = time.perf_counter()
+        with EarlyWarning(path) as detector:
+            detector.observe_many(
+                (f"site-{i}", stable_scores(rng, final=78.0 if i else 40.0), "2024-06-02") for i in range(20000)
+            )
+            elapsed = time.perf_counter() - started
+            stats = detector.stats("site-1")
+            alerts = detector.alerts(open_only=True)
+            acknowledged = detector.acknowledge(alerts[0]["id"])
+            still_open = detector.alerts(open_only=True)
+
+    print(f"    20000 site updates in {elapsed:.2f}s")
+    return (
+        stats["final_score"]["count"] == 2
+        and elapsed < 5.0
+        and {alert["site_id"] for alert in alerts} == {"site-0"}
+        and acknowledged and len(still_open) == len(alerts) - 1
+    )
+
+
+def test_cli_reads_stream_events() -> bool:
+    """The observe command accepts analysis_stream events and skips other lines."""
+    with tempfile.TemporaryDirectory() as tmp:
+        def event(final: float, day: int) -> str:
+            return json.dumps({"event": "result", "index": 0, "success": True, "result": {
+                "location": {"lat": 14.0, "lon": 75.5},
+                "timestamp": f"2024-06-{day:02d}T08:00:00",
+                "analysis": {
+                    "vegetation_health": {"score": 60.0},
+                    "soil_suitability": {"score": 85.0},
+                    "climate_stress": {"stress_score": 15.0},
+                    "site_suitability": {"final_score": final}
+                }
+            }})
+
+        lines = [json.dumps({"event": "start", "total": 2})] + [event(75.0, 1), event(65.0, 2)]
+        script = Path(__file__).parent / "early_warning.py"
+        env = {**os.environ, "EARLY_WARNING_DB": str(Path(tmp) / "ew.sqlite")}
+        run = subprocess.run([sys.executable, str(script), "observe"], input="\n".join(lines),
+                             capture_output=True, text=True, env=env)
+        output = json.loads(run.stdout)
+        stats = json.loads(subprocess.run([sys.executable, str(script), "stats", "14.0000,75.5000"],
+                                          capture_output=True, text=True, env=env).stdout)
+
+    return (
+        output["observed"] == 2 and output["skipped"] == 1
+        and [alert["rule"] for alert in output["alerts"]] == ["threshold"]
+        and stats["stats"]["final_score"]["last"] == 65.0
+    )
+
+
+def main():
+    """Run all test cases."""
+    print("EARLY WARNING TEST SUITE")
+    print("=" * 70)
+
+    tests = [
+        test_incremental_matches_recomputation,
+        test_sudden_drop_and_threshold,
+        test_drift_once_per_episode,
+        test_repeated_inputs_observed_once,
+        test_persistence_and_throughput,
+        test_cli_reads_stream_events
+    ]
+    tests_passed = 0
+    for test in tests:
+        passed = test()
+        tests_passed += passed
+        print(f"{'✓' if passed else '✗'} {test.__doc__}")
+
+    print(f"\n{'=' * 70}")
+    print(f"TEST SUMMARY: {tests_passed}/{len(tests)} tests passed")
+    print(f"{'=' * 70}")
+
+    return 0 if tests_passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Test script for fetch_cache.py
+Checks fresh hits, stale-while-revalidate, negative caching and the
+analyzer's use of the cache during an upstream outage.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+from fetch_cache import FRESH_TTL, FetchCache
+
+
+class Upstream:
+    """Fake provider call that counts requests and can fail or stall."""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.version = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, lat: float, lon: float) -> dict:
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise TimeoutError("timed out")
+        self.version += 1
+        return {"temperature": 20.0 + self.version, "source": "OpenWeatherMap", "success": True}
+
+
+def fallback(error: str) -> dict:
+    return {"temperature": 25.0, "source": "mock", "success": False, "error": error}
+
+
+def age_entry(cache: FetchCache, seconds: float):
+    """Pretend the cached weather value for (14.0, 75.5) is this old."""
+    entry = cache.entry("weather", 14.0, 75.5)
+    cache._update("weather", 14.0, 75.5, fetched_at=entry["fetched_at"] - seconds)
+
+
+def test_fresh_values_are_reused() -> bool:
+    """A fresh value is served from disk without another call, for the whole cell."""
+    with tempfile.TemporaryDirectory() as root:
+        cache = FetchCache(Path(root))
+        upstream = Upstream()
+        first = cache.fetch("weather", 14.0, 75.5, upstream, fallback)
+        second = FetchCache(Path(root)).fetch("weather", 14.04, 75.53, upstream, fallback)
+        return (upstream.calls == 1 and first["cache"]["status"] == "miss"
+                and second["cache"]["status"] == "fresh" and second["temperature"] == 21.0)
+
+
+def test_stale_value_served_while_refreshing() -> bool:
+    """A stale value returns immediately with its age while one background refresh runs."""
+    with tempfile.TemporaryDirectory() as root:
+        cache = FetchCache(Path(root))
+        upstream = Upstream()
+        cache.fetch("weather", 14.0, 75.5, upstream, fallback)
+        age_entry(cache, FRESH_TTL["weather"] + 600)
+        upstream.delay = 0.3
+
+        start = time.perf_counter()
+        stale = [cache.fetch("weather", 14.0, 75.5, upstream, fallback) for _ in range(5)]
+        elapsed = time.perf_counter() - start
+        cache.wait()
+        fresh = cache.fetch("weather", 14.0, 75.5, upstream, fallback)
+
+        return (elapsed < 0.2 and upstream.calls == 2
+                and all(r["cache"]["status"] == "stale" and r["temperature"] == 21.0 for r in stale)
+                and stale[0]["cache"]["age_seconds"] >= FRESH_TTL["weather"] + 600
+                and fresh["cache"]["status"] == "fresh" and fresh["temperature"] == 22.0)
+
+
+def test_failures_are_remembered() -> bool:
+    """After a slow failure, the next requests for the cell fall back at once."""
+    with tempfile.TemporaryDirectory() as root:
+        cache = FetchCache(Path(root))
+        upstream = Upstream(delay=0.3, fail=True)
+        first = cache.fetch("weather", 14.0, 75.5, upstream, fallback)
+
+        start = time.perf_counter()
+        repeated = [cache.fetch("weather", 14.0, 75.5, upstream, fallback) for _ in range(20)]
+        elapsed = time.perf_counter() - start
+
+        return (upstream.calls == 1 and first["source"] == "mock" and elapsed < 0.1
+                and all(r["cache"]["status"] == "negative" for r in repeated))
+
+
+def test_stale_value_survives_failed_refresh() -> bool:
+    """A failed refresh keeps serving the stale value and is not retried immediately."""
+    with tempfile.TemporaryDirectory() as root:
+        cache = FetchCache(Path(root))
+        upstream = Upstream()
+        cache.fetch("weather", 14.0, 75.5, upstream, fallback)
+        age_entry(cache, FRESH_TTL["weather"] + 600)
+        upstream.fail = True
+
+        cache.fetch("weather", 14.0, 75.5, upstream, fallback)
+        cache.wait()
+        after = [cache.fetch("weather", 14.0, 75.5, upstream, fallback) for _ in range(5)]
+        cache.wait()
+        return upstream.calls == 2 and all(r["temperature"] == 21.0 for r in after)
+
+
+def test_analyzer_during_outage() -> bool:
+    """fetch_weather_data pays the upstream timeout once per cell during an outage."""
+    calls = []
+
+    def unreachable(url, timeout=None):
+        calls.append(url)
+        time.sleep(0.2)
+        raise TimeoutError("timed out")
+
+    with tempfile.TemporaryDirectory() as root:
+        os.environ["FETCH_CACHE_DIR"] = root
+        os.environ["FETCH_CACHE_REFRESH"] = "thread"
+        original = urllib.request.urlopen
+        urllib.request.urlopen = unreachable
+        try:
+            import site_analyzer_with_apis
+            results = [site_analyzer_with_apis.fetch_weather_data(14.0, 75.5) for _ in range(10)]
+        finally:
+            urllib.request.urlopen = original
+            del os.environ["FETCH_CACHE_DIR"]
+            del os.environ["FETCH_CACHE_REFRESH"]
+        return len(calls) == 1 and all(r["source"] == "mock" for r in results)
+
+
+def main():
+    """Run all test cases."""
+    print("FETCH CACHE TEST SUITE")
+    print("=" * 70)
+
+    tests = [
+        test_fresh_values_are_reused,
+        test_stale_value_served_while_refreshing,
+        test_failures_are_remembered,
+        test_stale_value_survives_failed_refresh,
+        test_analyzer_during_outage
+    ]
+    tests_passed = 0
+    for test in tests:
+        passed = test()
+        tests_passed += passed
+        print(f"{'✓' if passed else '✗'} {test.__doc__}")
+
+    print(f"\n{'=' * 70}")
+    print(f"TEST SUMMARY: {tests_passed}/{len(tests)} tests passed")
+    print(f"{'=' * 70}")
+
+    return 0 if tests_passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
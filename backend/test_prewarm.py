@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Test script for prewarm.py
+Runs pre-warming against fake providers and a simulated clock to check
+view priority, rate limiting and the peak deadline.
+"""
+
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from fetch_cache import FetchCache
+from prewarm import TokenBucket, ViewLog, prewarm
+
+
+class FakeClock:
+    """Monotonic clock that only advances when sleeping."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+def recording_provider(clock: FakeClock, log: list, name: str):
+    def request(lat: float, lon: float) -> dict:
+        log.append((clock.now, name, lat, lon))
+        return {"source": name, "success": True}
+    return request
+
+
+def sites(count: int) -> list:
+    return [{"lat": 10.0 + i * 0.5, "lon": 76.0, "name": f"Site {i}"} for i in range(count)]
+
+
+def test_token_bucket_rate() -> bool:
+    """The bucket allows the burst, then paces calls at its rate."""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, capacity=3, clock=clock, sleep=clock.sleep)
+    times = []
+    for _ in range(9):
+        bucket.acquire()
+        times.append(clock.now)
+    # 3 burst calls at t=0, then one every 0.5 s
+    return times[:3] == [0.0, 0.0, 0.0] and abs(times[-1] - 3.0) < 1e-9
+
+
+def test_views_decide_order() -> bool:
+    """Most viewed sites (recent views weigh more) are warmed first."""
+    with tempfile.TemporaryDirectory() as root:
+        now = time.time()
+        views = ViewLog(Path(root) / "views.log")
+        for _ in range(3):
+            views.record(12.0, 76.0, now - 6 * 86400)   # three old views
+        views.record(11.0, 76.0, now - 3600)            # one recent view
+        views.record(12.0, 76.0, now - 30 * 86400)      # outside the window
+        scores = views.scores(now)
+
+        clock = FakeClock()
+        calls = []
+        summary = prewarm(
+            sites(5), FetchCache(Path(root) / "cache"),
+            {"weather": recording_provider(clock, calls, "weather")},
+            view_scores=scores,
+            buckets={"weather": TokenBucket(100, 100, clock, clock.sleep)}
+        )
+        order = [lat for _, _, lat, _ in calls]
+        return (order[:2] == [11.0, 12.0] and order[2:] == [10.0, 10.5, 11.5]
+                and views.compact(now) == 4 and summary["warmed"] == 5)
+
+
+def test_rate_limits_and_deadline() -> bool:
+    """Soil calls respect 5 per minute and warming stops at the peak deadline."""
+    with tempfile.TemporaryDirectory() as root:
+        clock = FakeClock()
+        calls = []
+        summary = prewarm(
+            sites(40), FetchCache(Path(root)),
+            {"weather": recording_provider(clock, calls, "weather"),
+             "soil": recording_provider(clock, calls, "soil")},
+            buckets={"weather": TokenBucket(1.0, 10, clock, clock.sleep),
+                     "soil": TokenBucket(5 / 60, 2, clock, clock.sleep)},
+            deadline=300.0
+        )
+        soil_times = [t for t, name, _, _ in calls if name == "soil"]
+        # Every 60 s window holds at most the burst plus 5 upstream soil
+        # requests (2 per refresh)
+        windows_ok = all(
+            sum(2 for t in soil_times if start <= t < start + 60) <= 5 + 2
+            for start in soil_times
+        )
+        return (windows_ok and clock.now <= 300.0 and summary["skipped"] > 0
+                and summary["warmed"] + summary["skipped"] == 40
+                and summary["calls"]["soil"] == 2 * len(soil_times))
+
+
+def test_warm_entries_are_skipped() -> bool:
+    """Values still fresh at the peak and mirrored soil need no calls."""
+    with tempfile.TemporaryDirectory() as root:
+        clock = FakeClock()
+        calls = []
+        cache = FetchCache(Path(root))
+        providers = {"weather": recording_provider(clock, calls, "weather"),
+                     "soil": recording_provider(clock, calls, "soil")}
+        buckets = {name: TokenBucket(100, 100, clock, clock.sleep) for name in providers}
+        mirrored = lambda lat, lon: lat == 10.0
+        prewarm(sites(3), cache, providers, buckets=buckets, covered_by_mirror=mirrored)
+        first = len(calls)
+        again = prewarm(sites(3), cache, providers, buckets=buckets,
+                        peak=time.time() + 600, covered_by_mirror=mirrored)
+        # An hour later weather is stale at the peak, soil is not
+        later = prewarm(sites(3), cache, providers, buckets=buckets,
+                        peak=time.time() + 3700, covered_by_mirror=mirrored)
+        return (first == 5 and again["already_warm"] == 3
+                and later["calls"] == {"weather": 3, "soil": 0})
+
+
+def test_failed_analysis_continues() -> bool:
+    """A re-analysis that raises is counted as failed and the remaining sites are still warmed."""
+    with tempfile.TemporaryDirectory() as root:
+        clock = FakeClock()
+        calls, analyzed = [], []
+        providers = {"weather": recording_provider(clock, calls, "weather")}
+        buckets = {"weather": TokenBucket(100, 100, clock, clock.sleep)}
+
+        def analyze(lat: float, lon: float):
+            analyzed.append(lat)
+            if lat == 10.5:
+                raise ValueError("upstream error")
+
+        saved_stderr = sys.stderr
+        sys.stderr = io.StringIO()
+        try:
+            summary = prewarm(sites(4), FetchCache(Path(root)), providers, buckets=buckets, analyze=analyze)
+        finally:
+            sys.stderr = saved_stderr
+
+    statuses = {site["lat"]: site["status"] for site in summary["sites"]}
+    return (
+        sorted(analyzed) == [10.0, 10.5, 11.0, 11.5]
+        and summary["warmed"] == 3 and summary["failed"] == 1
+        and statuses[10.5] == "failed"
+    )
+
+
+def main():
+    """Run all test cases."""
+    print("PRE-WARM TEST SUITE")
+    print("=" * 70)
+
+    tests = [
+        test_token_bucket_rate,
+        test_views_decide_order,
+        test_rate_limits_and_deadline,
+        test_warm_entries_are_skipped,
+        test_failed_analysis_continues
+    ]
+    tests_passed = 0
+    for test in tests:
+        passed = test()
+        tests_passed += passed
+        print(f"{'✓' if passed else '✗'} {test.__doc__}")
+
+    print(f"\n{'=' * 70}")
+    print(f"TEST SUMMARY: {tests_passed}/{len(tests)} tests passed")
+    print(f"{'=' * 70}")
+
+    return 0 if tests_passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
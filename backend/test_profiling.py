@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Test script for profiling.py
+Checks flag handling, the sampled collapsed-stack output and time split,
+cProfile mode, and profiling an analyzer run from the command line.
+"""
+
+import contextlib
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import profiling
+
+
+def busy(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def calculate_site_suitability(seconds: float):
+    busy(seconds)
+
+
+def network_wait(seconds: float):
+    # A blocking socket read shows up under socket.py in the sampled stack
+    reader, writer = socket.socketpair()
+    reader.settimeout(seconds)
+    try:
+        reader.makefile('rb').read(1)
+    except (socket.timeout, OSError):
+        pass
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_flag_handling() -> bool:
+    """--profile flags are removed from argv; unflagged runs follow PROFILE_SAMPLE_RATE."""
+    argv = ["site_analyzer.py", "--profile", "{}"]
+    sampled = profiling.resolve_mode(argv) == "sample" and argv == ["site_analyzer.py", "{}"]
+    argv = ["x", "14.0", "--profile=cprofile", "75.5"]
+    exact = profiling.resolve_mode(argv) == "cprofile" and argv == ["x", "14.0", "75.5"]
+
+    os.environ["PROFILE_SAMPLE_RATE"] = "1"
+    always = profiling.resolve_mode(["x"]) == "sample"
+    os.environ["PROFILE_SAMPLE_RATE"] = "0"
+    never = profiling.resolve_mode(["x"]) is None
+    del os.environ["PROFILE_SAMPLE_RATE"]
+
+    try:
+        with contextlib.redirect_stderr(io.StringIO()):
+            profiling.resolve_mode(["x", "--profile=perf"])
+        rejected = False
+    except SystemExit as e:
+        rejected = e.code == 2
+    return sampled and exact and always and never and rejected
+
+
+def test_invalid_env_disables_profiling() -> bool:
+    """A malformed PROFILE_SAMPLE_RATE warns on stderr and leaves the run unprofiled."""
+    warnings = io.StringIO()
+    results = []
+    with contextlib.redirect_stderr(warnings):
+        for value in ("often", "-1"):
+            os.environ["PROFILE_SAMPLE_RATE"] = value
+            try:
+                with profiling.session("test", ["x", "14.0"]) as mode:
+                    results.append(mode)
+            except ValueError:
+                results.append("raised")
+            finally:
+                del os.environ["PROFILE_SAMPLE_RATE"]
+    return results == [None, None] and warnings.getvalue().count("PROFILE_SAMPLE_RATE") == 2
+
+
+def test_sampled_split() -> bool:
+    """Sampled stacks are collapsed per frame and split into network and scoring time."""
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["PROFILE_DIR"] = tmp
+        try:
+            with profiling.session("test", ["x", "--profile"]) as mode:
+                network_wait(0.3)
+                calculate_site_suitability(0.3)
+        finally:
+            del os.environ["PROFILE_DIR"]
+        report = json.loads(next(Path(tmp).glob("*.json")).read_text())
+        lines = Path(report["profile"]).read_text().splitlines()
+
+    split = report["split_fraction"]
+    stacks = [line.rpartition(' ')[0] for line in lines]
+    return (
+        mode == "sample"
+        and report["samples"] > 20
+        and split["network"] > 0.3 and split["scoring"] > 0.3
+        and all(line.rpartition(' ')[2].isdigit() for line in lines)
+        and any(s.endswith("test_profiling.py:calculate_site_suitability;test_profiling.py:busy") for s in stacks)
+    )
+
+
+def test_cprofile_mode() -> bool:
+    """cProfile mode writes loadable stats and splits self time by category."""
+    import pstats
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["PROFILE_DIR"] = tmp
+        try:
+            with profiling.session("test", ["x", "--profile=cprofile"]):
+                calculate_site_suitability(0.1)
+                json.loads(json.dumps([{"value": i} for i in range(20000)]))
+        finally:
+            del os.environ["PROFILE_DIR"]
+        report = json.loads(next(Path(tmp).glob("*.json")).read_text())
+        stats = pstats.Stats(report["profile"])
+
+    return (
+        report["mode"] == "cprofile"
+        and stats.total_calls > 0
+        and report["split_seconds"]["scoring"] >= 0.09
+        and report["split_seconds"]["json"] > 0
+    )
+
+
+def test_cli_profile_keeps_stdout_json() -> bool:
+    """A profiled analyzer run prints the same JSON and leaves the profile behind."""
+    with tempfile.TemporaryDirectory() as tmp:
+        site = json.dumps({"ndvi": 0.35, "soil_ph": 6.5, "soil_moisture": 65, "temperature": 28, "rainfall": 150})
+        script = Path(__file__).parent / "site_analyzer.py"
+        env = {**os.environ, "PROFILE_DIR": tmp}
+        plain = subprocess.run([sys.executable, str(script), site], capture_output=True, text=True, env=env)
+        profiled = subprocess.run(
+            [sys.executable, str(script), "--profile", site], capture_output=True, text=True, env=env
+        )
+        files = sorted(path.suffix for path in Path(tmp).iterdir())
+
+    return (
+        json.loads(profiled.stdout)["summary"] == json.loads(plain.stdout)["summary"]
+        and "Profile:" in profiled.stderr
+        and files == [".collapsed", ".json"]
+    )
+
+
+def test_cli_profile_failures_do_not_fail_run() -> bool:
+    """An unwritable PROFILE_DIR only warns; a bad --profile mode is a usage error, not a traceback."""
+    with tempfile.TemporaryDirectory() as tmp:
+        site = json.dumps({"ndvi": 0.35, "soil_ph": 6.5, "soil_moisture": 65, "temperature": 28, "rainfall": 150})
+        script = Path(__file__).parent / "site_analyzer.py"
+        blocker = Path(tmp) / "not-a-directory"
+        blocker.write_text("")
+        env = {**os.environ, "PROFILE_DIR": str(blocker / "profiles")}
+        unwritable = subprocess.run([sys.executable, str(script), "--profile=cprofile", site],
+                                    capture_output=True, text=True, env=env)
+        bad_mode = subprocess.run([sys.executable, str(script), "--profile=perf", site],
+                                  capture_output=True, text=True, env=env)
+
+    return (
+        unwritable.returncode == 0
+        and json.loads(unwritable.stdout)["success"]
+        and "Warning: Could not write profile" in unwritable.stderr
+        and bad_mode.returncode == 2 and bad_mode.stdout == ""
+        and "invalid choice" in bad_mode.stderr and "Traceback" not in bad_mode.stderr
+    )
+
+
+def test_merge_collapsed() -> bool:
+    """Merging collapsed files sums the counts of identical stacks."""
+    with tempfile.TemporaryDirectory() as tmp:
+        first, second = Path(tmp) / "a.collapsed", Path(tmp) / "b.collapsed"
+        first.write_text("main;fetch 3\nmain;score 2\n")
+        second.write_text("main;fetch 4\n")
+        stacks = profiling.merge_collapsed([first, second])
+    return stacks == {"main;fetch": 7, "main;score": 2}
+
+
+def main():
+    """Run all test cases."""
+    print("PROFILING TEST SUITE")
+    print("=" * 70)
+
+    tests = [
+        test_flag_handling,
+        test_invalid_env_disables_profiling,
+        test_sampled_split,
+        test_cprofile_mode,
+        test_cli_profile_keeps_stdout_json,
+        test_cli_profile_failures_do_not_fail_run,
+        test_merge_collapsed
+    ]
+    tests_passed = 0
+    for test in tests:
+        passed = test()
+        tests_passed += passed
+        print(f"{'✓' if passed else '✗'} {test.__doc__}")
+
+    print(f"\n{'=' * 70}")
+    print(f"TEST SUMMARY: {tests_passed}/{len(tests)} tests passed")
+    print(f"{'=' * 70}")
+
+    return 0 if tests_passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Test script for result_store.py
+Checks record reuse, per-component invalidation on rule changes and the
+location refs used for dashboard refreshes.
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import result_store
+import site_analyzer
+from result_store import ResultStore
+
+
+SITE = {"ndvi": 0.35, "soil_ph": 6.5, "soil_moisture": 65, "temperature": 28, "rainfall": 150}
+
+
+def test_identical_inputs_hit() -> bool:
+    """Re-analysis of identical inputs returns the stored record."""
+    with tempfile.TemporaryDirectory() as root:
+        store = ResultStore(Path(root))
+        first = store.analyze(SITE)
+        second = ResultStore(Path(root)).analyze(dict(SITE))
+        expected = json.loads(site_analyzer.analyze_site(json.dumps(SITE)))["analysis"]
+        return (
+            not first["cached"]
+            and second["cached"]
+            and second["record_key"] == first["record_key"]
+            and second["analysis"] == expected
+        )
+
+
+def test_rule_change_reuses_other_components() -> bool:
+    """Bumping the soil rules recomputes soil only, reusing the other components."""
+    with tempfile.TemporaryDirectory() as root:
+        store = ResultStore(Path(root))
+        first = store.analyze(SITE)
+        original = dict(result_store.RULE_VERSIONS)
+        result_store.RULE_VERSIONS["soil"] = "test-bump"
+        try:
+            second = store.analyze(SITE)
+        finally:
+            result_store.RULE_VERSIONS.clear()
+            result_store.RULE_VERSIONS.update(original)
+        return (
+            not second["cached"]
+            and second["record_key"] != first["record_key"]
+            and second["reused_components"] == ["vegetation", "climate"]
+        )
+
+
+def test_provider_versions_in_key() -> bool:
+    """The same inputs from a different provider version get their own record."""
+    with tempfile.TemporaryDirectory() as root:
+        store = ResultStore(Path(root))
+        live = store.analyze(SITE, {"soil": "SoilGrids/v2.0"})
+        mock = store.analyze(SITE, {"soil": "mock/1"})
+        return live["record_key"] != mock["record_key"] and not mock["cached"]
+
+
+def test_nearby_inputs_scored_separately() -> bool:
+    """Inputs a hair apart on either side of a band edge never share a record or component."""
+    sequence = [
+        {**SITE, "soil_ph": 5.996},
+        {**SITE, "soil_ph": 6.004},
+        {**SITE, "soil_ph": 6.004, "ndvi": 0.5},
+        {**SITE, "ndvi": 0.5996},
+        {**SITE, "ndvi": 0.6004},
+        {**SITE, "soil_moisture": 49.96, "temperature": 34.96},
+        {**SITE, "soil_moisture": 50.04, "temperature": 35.04}
+    ]
+    with tempfile.TemporaryDirectory() as root:
+        store = ResultStore(Path(root))
+        for data in sequence:
+            record = store.analyze(data)
+            if (record["cached"] or record["input_data"] != data
+                    or record["analysis"] != site_analyzer.score_site_inputs(data)):
+                return False
+        again = store.analyze({**SITE, "soil_ph": 6.004})
+    return (
+        again["cached"]
+        and again["analysis"]["soil_suitability"]["ph_status"] == "OPTIMAL"
+        and again["analysis"]["soil_suitability"]["ph_value"] == 6.004
+    )
+
+
+def test_location_refresh_replaces_record() -> bool:
+    """Refreshing an unchanged location analysis does not add another record."""
+    with tempfile.TemporaryDirectory() as root:
+        store = ResultStore(Path(root))
+        record = store.analyze(SITE)
+        keys = set()
+        for hour in range(5):
+            keys.add(store.record_location(14.0, 75.5, {
+                "success": True,
+                "location": {"lat": 14.0, "lon": 75.5},
+                "timestamp": f"2026-01-01T0{hour}:00:00",
+                "record_key": record["record_key"],
+                "analysis": record["analysis"]
+            }))
+        objects = list((Path(root) / "objects").rglob("*.json"))
+        latest = ResultStore(Path(root)).latest_for_location(14.0, 75.5)
+        return len(keys) == 1 and len(objects) == 5 and latest["analyzed_at"] == "2026-01-01T04:00:00"
+
+
+def test_location_ref() -> bool:
+    """The latest location analysis is readable through its ref."""
+    with tempfile.TemporaryDirectory() as root:
+        store = ResultStore(Path(root))
+        record = store.analyze(SITE)
+        result = {
+            "success": True,
+            "location": {"lat": 14.0, "lon": 75.5},
+            "timestamp": "2026-01-01T06:00:00",
+            "record_key": record["record_key"],
+            "analysis": record["analysis"]
+        }
+        store.record_location(14.0, 75.5, result)
+        latest = ResultStore(Path(root)).latest_for_location(14.0, 75.5)
+        stale = ResultStore(Path(root)).latest_for_location(14.0, 75.5, max_age=60)
+        return latest["record_key"] == record["record_key"] and stale is None
+
+
+def main():
+    """Run all test cases."""
+    print("RESULT STORE TEST SUITE")
+    print("=" * 70)
+
+    tests = [
+        test_identical_inputs_hit,
+        test_rule_change_reuses_other_components,
+        test_provider_versions_in_key,
+        test_nearby_inputs_scored_separately,
+        test_location_refresh_replaces_record,
+        test_location_ref
+    ]
+    tests_passed = 0
+    for test in tests:
+        passed = test()
+        tests_passed += passed
+        print(f"{'✓' if passed else '✗'} {test.__doc__}")
+
+    print(f"\n{'=' * 70}")
+    print(f"TEST SUMMARY: {tests_passed}/{len(tests)} tests passed")
+    print(f"{'=' * 70}")
+
+    return 0 if tests_passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
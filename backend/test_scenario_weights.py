@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test script for scenario_weights.py
+Checks the balanced preset against calculate_site_suitability, weight
+normalization, the ordering each preset produces and rejection of bad
+scenario lists.
+"""
+
+import random
+import sys
+
+from scenario_weights import PRESETS, normalize_weights, resolve_scenarios, score_matrix
+from site_analyzer import score_site_inputs
+
+
+def random_sites(count: int, seed: int = 4) -> list:
+    rng = random.Random(seed)
+    return [
+        {
+            "ndvi": rng.uniform(0, 1),
+            "soil_ph": rng.uniform(4, 9),
+            "soil_moisture": rng.uniform(10, 95),
+            "temperature": rng.uniform(5, 45),
+            "rainfall": rng.uniform(0, 500)
+        }
+        for _ in range(count)
+    ]
+
+
+def test_balanced_matches_analyzer() -> bool:
+    """The balanced preset scores every site exactly like calculate_site_suitability."""
+    sites = random_sites(2000)
+    result = score_matrix(sites, ["balanced"])
+    for site, row, risks in zip(sites, result["scores"], result["risk_levels"]):
+        expected = score_site_inputs(site)["site_suitability"]
+        if row[0] != expected["final_score"] or risks[0] != expected["risk_level"]:
+            return False
+    return True
+
+
+def test_weights_normalized() -> bool:
+    """Weight lists and dicts are scaled to sum to 1; invalid weight sets and unknown components are rejected."""
+    scaled = normalize_weights([2, 4, 4])
+    from_dict = normalize_weights({"vegetation": 1, "soil": 1})
+    names, rows = resolve_scenarios([{"name": "custom", "weights": [1, 1, 2]}, [3, 3, 3]])
+
+    rejected = 0
+    for bad in ([0.5, 0.5], [-0.2, 0.6, 0.6], [0, 0, 0], {"vegetation": 1, "soils": 1}):
+        try:
+            normalize_weights(bad)
+        except ValueError:
+            rejected += 1
+
+    return (
+        all(abs(a - b) < 1e-12 for a, b in zip(scaled, (0.2, 0.4, 0.4)))
+        and from_dict == (0.5, 0.5, 0.0)
+        and names == ["custom", "scenario_2"]
+        and all(abs(sum(row) - 1.0) < 1e-12 for row in rows)
+        and rejected == 4
+    )
+
+
+def test_preset_orderings() -> bool:
+    """Each preset ranks sites in the order of its own weighted component scores."""
+    sites = random_sites(300)
+    names = list(PRESETS)
+    result = score_matrix(sites, names)
+    components = result["component_scores"]
+
+    for column, name in enumerate(names):
+        wv, ws, wc = PRESETS[name]
+        expected = [c["vegetation"] * wv + c["soil"] * ws + c["climate"] * wc for c in components]
+        scores = [row[column] for row in result["scores"]]
+        ranked = sorted(range(len(sites)), key=lambda i: scores[i])
+        if any(expected[a] > expected[b] + 0.01 for a, b in zip(ranked, ranked[1:])):
+            return False
+        if result["summary"][name]["best_site"] != max(range(len(sites)), key=lambda i: scores[i]):
+            return False
+
+    # A site with dense cover but poor soil ranks higher under conservation_first
+    cover = {"ndvi": 0.95, "soil_ph": 4.2, "soil_moisture": 20, "temperature": 26, "rainfall": 150}
+    soil = {"ndvi": 0.2, "soil_ph": 6.5, "soil_moisture": 60, "temperature": 26, "rainfall": 150}
+    pair = score_matrix([cover, soil], ["conservation_first", "survival_first"])["scores"]
+    return pair[0][0] > pair[1][0] and pair[0][1] < pair[1][1]
+
+
+def test_bad_scenarios_rejected() -> bool:
+    """Unknown preset names and duplicate scenario names are rejected."""
+    rejected = 0
+    for scenarios in (["balanced", "no_such_preset"],
+                      ["arid", "arid"],
+                      ["balanced", {"name": "balanced", "weights": [1, 1, 1]}]):
+        try:
+            score_matrix(random_sites(3), scenarios)
+        except ValueError:
+            rejected += 1
+    return rejected == 3
+
+
+def main():
+    """Run all test cases."""
+    print("SCENARIO WEIGHTS TEST SUITE")
+    print("=" * 70)
+
+    tests = [
+        test_balanced_matches_analyzer,
+        test_weights_normalized,
+        test_preset_orderings,
+        test_bad_scenarios_rejected
+    ]
+    tests_passed = 0
+    for test in tests:
+        passed = test()
+        tests_passed += passed
+        print(f"{'✓' if passed else '✗'} {test.__doc__}")
+
+    print(f"\n{'=' * 70}")
+    print(f"TEST SUMMARY: {tests_passed}/{len(tests)} tests passed")
+    print(f"{'=' * 70}")
+
+    return 0 if tests_passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
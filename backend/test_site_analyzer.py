@@ -1,151 +1,358 @@
 #!/usr/bin/env python3
 """
 Test script for site_analyzer.py
-Demonstrates various input scenarios and expected outputs.
+Runs in-process regression and parity checks over every scorer
+implementation (site_analyzer, site_analyzer_with_apis, batch_scoring):
+a golden corpus of inputs and expected outputs, generated cases at every
+band edge, a large random parity run, and analyze_site_from_location with
+the network mocked out.
+
+Set FUZZ_CASES to change the size of the random parity run.
 """
 
+import io
 import json
-import subprocess
+import os
+import random
 import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from typing import Callable, Dict, Any, List, Optional, Tuple
 
+import batch_scoring
+import site_analyzer
+import site_analyzer_with_apis
 
-def test_analyzer(test_name: str, input_data: dict):
-    """Run analyzer with test data and display results."""
-    print(f"\n{'=' * 70}")
-    print(f"TEST: {test_name}")
-    print(f"{'=' * 70}")
-    print(f"Input Data:")
-    print(json.dumps(input_data, indent=2))
-    print(f"\n{'-' * 70}")
-    
-    # Run the analyzer
-    result = subprocess.run(
-        ['python', 'site_analyzer.py', json.dumps(input_data)],
-        capture_output=True,
-        text=True
+
+FUZZ_CASES = int(os.getenv('FUZZ_CASES', '200000'))
+
+# Smallest step used to probe both sides of a band edge
+EPSILON = 1e-9
+
+# (name, input, (vegetation, soil, stress, final_score, risk_level))
+GOLDEN_CASES = [
+    ("Ideal Reforestation Site",
+     {"ndvi": 0.35, "soil_ph": 6.5, "soil_moisture": 65, "temperature": 28, "rainfall": 150},
+     (46.67, 100, 0, 84.0, "LOW")),
+    ("Healthy Forest (Low Priority)",
+     {"ndvi": 0.75, "soil_ph": 6.8, "soil_moisture": 70, "temperature": 25, "rainfall": 180},
+     (87.5, 100, 0, 96.25, "LOW")),
+    ("Drought Conditions",
+     {"ndvi": 0.25, "soil_ph": 7.2, "soil_moisture": 25, "temperature": 38, "rainfall": 15},
+     (33.33, 60, 100, 34.0, "HIGH")),
+    ("Acidic Soil Challenge",
+     {"ndvi": 0.40, "soil_ph": 5.0, "soil_moisture": 55, "temperature": 26, "rainfall": 120},
+     (53.33, 70, 0, 74.0, "LOW")),
+    ("Waterlogged Conditions",
+     {"ndvi": 0.30, "soil_ph": 6.5, "soil_moisture": 95, "temperature": 24, "rainfall": 450},
+     (40.0, 60, 50, 51.0, "MEDIUM")),
+    ("Missing Fields (Defaults)",
+     {"ndvi": 0.45, "soil_ph": 6.0},
+     (60.0, 100, 0, 88.0, "LOW")),
+    ("Extreme Heat And Flooding",
+     {"ndvi": 0.05, "soil_ph": 9.1, "soil_moisture": 10, "temperature": 45, "rainfall": 520},
+     (6.67, 20, 100, 10.0, "HIGH")),
+    ("Cold Highland",
+     {"ndvi": 0.62, "soil_ph": 5.6, "soil_moisture": 42, "temperature": 8, "rainfall": 60},
+     (81.0, 70, 65, 62.8, "MEDIUM")),
+    ("Sparse Drought Penalty",
+     {"ndvi": 0.0, "soil_ph": 4.2, "soil_moisture": 28, "temperature": 36, "rainfall": 49},
+     (0.0, 20, 80, 14.0, "HIGH"))
+]
+
+# Input field, band edges and points per band level, per banded rule
+BANDED_FIELDS = [
+    ("soil_ph", batch_scoring.PH_EDGES, batch_scoring.SOIL_POINTS),
+    ("soil_moisture", batch_scoring.MOISTURE_EDGES, batch_scoring.SOIL_POINTS),
+    ("temperature", batch_scoring.TEMPERATURE_EDGES, batch_scoring.STRESS_POINTS),
+    ("rainfall", batch_scoring.RAINFALL_EDGES, batch_scoring.STRESS_POINTS)
+]
+
+# Component result key holding each banded field's points
+COMPONENT_POINTS = {
+    "soil_ph": ("soil_suitability", "ph_score"),
+    "soil_moisture": ("soil_suitability", "moisture_score"),
+    "temperature": ("climate_stress", "temp_stress"),
+    "rainfall": ("climate_stress", "rain_stress")
+}
+
+NDVI_EDGES = (0.0, 0.3, 0.6, 1.0)
+
+NEUTRAL_INPUT = {"ndvi": 0.45, "soil_ph": 6.5, "soil_moisture": 60, "temperature": 25, "rainfall": 150}
+
+Summary = Tuple[float, float, float, float, str]
+
+
+def score_with_module(module) -> Callable[[Dict[str, float]], Summary]:
+    """Scorer built from a module's calculate_* functions."""
+    def score(data: Dict[str, float]) -> Summary:
+        vegetation = module.calculate_vegetation_health_score(data["ndvi"])
+        soil = module.calculate_soil_suitability_score(data["soil_ph"], data["soil_moisture"])
+        climate = module.calculate_climate_stress_score(data["temperature"], data["rainfall"])
+        suitability = module.calculate_site_suitability(vegetation, soil, climate)
+        return (
+            vegetation["score"], soil["score"], climate["stress_score"],
+            suitability["final_score"], suitability["risk_level"]
+        )
+    return score
+
+
+def score_with_batch(data: Dict[str, float]) -> Summary:
+    final = batch_scoring.final_score(
+        data["ndvi"], data["soil_ph"], data["soil_moisture"], data["temperature"], data["rainfall"]
+    )
+    return (
+        batch_scoring.vegetation_score(data["ndvi"]),
+        batch_scoring.soil_score(data["soil_ph"], data["soil_moisture"]),
+        batch_scoring.climate_stress(data["temperature"], data["rainfall"]),
+        final,
+        batch_scoring.risk_level(final)
+    )
+
+
+SCORERS = {
+    "site_analyzer": score_with_module(site_analyzer),
+    "site_analyzer_with_apis": score_with_module(site_analyzer_with_apis),
+    "batch_scoring": score_with_batch
+}
+
+
+def mismatches(cases: List[Dict[str, float]], expected: List[Summary], skip: Optional[str] = None) -> List[str]:
+    """Describe every scorer result (except the skipped scorer's) that differs from the expected one."""
+    failures = []
+    for name, scorer in SCORERS.items():
+        if name == skip:
+            continue
+        for data, want in zip(cases, expected):
+            got = scorer(data)
+            if got != want:
+                failures.append(f"{name} {data}: {got} != {want}")
+    return failures
+
+
+def report(failures: List[str]) -> bool:
+    for failure in failures[:5]:
+        print(f"    {failure}")
+    return not failures
+
+
+def band_edge_cases() -> List[Tuple[Dict[str, float], str, int]]:
+    """
+    Inputs on and just outside every band edge.
+
+    Returns:
+        (input, field, expected band level) for each generated case
+    """
+    cases = []
+    for field, (lows, highs), _ in BANDED_FIELDS:
+        for level, edge in enumerate(lows):
+            cases.append(({**NEUTRAL_INPUT, field: edge}, field, level))
+            cases.append(({**NEUTRAL_INPUT, field: edge - EPSILON}, field, level + 1))
+        for level, edge in enumerate(highs):
+            cases.append(({**NEUTRAL_INPUT, field: edge}, field, level))
+            cases.append(({**NEUTRAL_INPUT, field: edge + EPSILON}, field, level + 1))
+    return cases
+
+
+def random_input(rng: random.Random) -> Dict[str, float]:
+    """Random input, drawn near band edges a quarter of the time."""
+    data = {
+        "ndvi": rng.uniform(-0.2, 1.2),
+        "soil_ph": rng.uniform(3.0, 10.0),
+        "soil_moisture": rng.uniform(0, 100),
+        "temperature": rng.uniform(-5, 50),
+        "rainfall": rng.uniform(0, 600)
+    }
+    if rng.random() < 0.25:
+        field, (lows, highs), _ = rng.choice(BANDED_FIELDS)
+        data[field] = rng.choice(lows + highs) + rng.choice((-EPSILON, 0, EPSILON))
+    return data
+
+
+def test_golden_corpus() -> bool:
+    """Every scorer reproduces the golden outputs."""
+    cases = [site_analyzer.parse_input_data(json.dumps(data)) for _, data, _ in GOLDEN_CASES]
+    return report(mismatches(cases, [expected for _, _, expected in GOLDEN_CASES]))
+
+
+def test_analyze_site_output() -> bool:
+    """analyze_site reports the golden scores and rejects invalid JSON."""
+    for _, data, (vegetation, soil, stress, final, risk) in GOLDEN_CASES:
+        result = json.loads(site_analyzer.analyze_site(json.dumps(data)))
+        analysis = result["analysis"]
+        if (
+            not result["success"]
+            or result["summary"]["suitability_score"] != final
+            or result["summary"]["risk_level"] != risk
+            or analysis["vegetation_health"]["score"] != vegetation
+            or analysis["soil_suitability"]["score"] != soil
+            or analysis["climate_stress"]["stress_score"] != stress
+        ):
+            return False
+
+    invalid = json.loads(site_analyzer.analyze_site("{invalid json}"))
+    return invalid["success"] is False and "Invalid JSON" in invalid["error"]
+
+
+def test_band_edges() -> bool:
+    """Values on a band edge stay in the inner band and just past it move out."""
+    failures = []
+    cases = band_edge_cases()
+    parity_inputs = [data for data, _, _ in cases]
+    points = {field: band_points for field, _, band_points in BANDED_FIELDS}
+    for data, field, level in cases:
+        component, key = COMPONENT_POINTS[field]
+        got = site_analyzer.score_site_inputs(data)[component][key]
+        if got != points[field][level]:
+            failures.append(f"{field}={data[field]!r}: {got} != {points[field][level]}")
+
+    # NDVI classes switch above 0.6 and at 0.3, and the score is continuous
+    for edge in NDVI_EDGES:
+        below = site_analyzer.calculate_vegetation_health_score(edge - EPSILON)
+        at = site_analyzer.calculate_vegetation_health_score(edge)
+        above = site_analyzer.calculate_vegetation_health_score(edge + EPSILON)
+        if abs(above["score"] - below["score"]) > 0.01:
+            failures.append(f"ndvi score jumps at {edge}")
+        parity_inputs += [{**NEUTRAL_INPUT, "ndvi": value} for value in (edge - EPSILON, edge, edge + EPSILON)]
+    classes = [site_analyzer.calculate_vegetation_health_score(v)["classification"]
+               for v in (0.3 - EPSILON, 0.3, 0.6, 0.6 + EPSILON)]
+    if classes != ["POOR", "MODERATE", "MODERATE", "HEALTHY"]:
+        failures.append(f"ndvi classes at edges: {classes}")
+
+    # The drought penalty needs temperature above 35 and rainfall below 50
+    for temperature, rainfall, penalised in ((35, 49, False), (35 + EPSILON, 49, True),
+                                             (36, 50, False), (36, 50 - EPSILON, True)):
+        data = {**NEUTRAL_INPUT, "temperature": temperature, "rainfall": rainfall}
+        stress = site_analyzer.score_site_inputs(data)["climate_stress"]
+        if (stress["stress_score"] > stress["temp_stress"] + stress["rain_stress"]) != penalised:
+            failures.append(f"drought penalty at {temperature}, {rainfall}")
+        parity_inputs.append(data)
+
+    # Every other implementation agrees with the independent column scorer
+    # on all of these edge inputs
+    expected = [score_with_batch(data) for data in parity_inputs]
+    failures += mismatches(parity_inputs, expected, skip="batch_scoring")
+    return report(failures)
+
+
+def test_random_parity() -> bool:
+    """All scorers agree on a large random corpus, in seconds."""
+    rng = random.Random(20240601)
+    cases = [random_input(rng) for _ in range(FUZZ_CASES)]
+    started = time.perf_counter()
+
+    reference = batch_scoring.final_score_column(
+        [c["ndvi"] for c in cases], [c["soil_ph"] for c in cases], [c["soil_moisture"] for c in cases],
+        [c["temperature"] for c in cases], [c["rainfall"] for c in cases]
+    )
+    failures = []
+    for name in ("site_analyzer", "site_analyzer_with_apis"):
+        scorer = SCORERS[name]
+        for data, expected in zip(cases, reference):
+            got = scorer(data)
+            if got[3] != expected or got[4] != batch_scoring.risk_level(expected):
+                failures.append(f"{name} {data}: {got[3]} != {expected}")
+                break
+
+    elapsed = time.perf_counter() - started
+    print(f"    {FUZZ_CASES} cases x {len(SCORERS)} scorers in {elapsed:.1f}s")
+    return report(failures)
+
+
+class FakeUpstream:
+    """Stands in for urllib.request.urlopen with canned provider responses."""
+
+    def __init__(self, weather: Dict[str, Any], ph: float, clay: float, fail: bool = False):
+        self.responses = {
+            "api.openweathermap.org": weather,
+            "property=phh2o": {"properties": {"layers": [{"depths": [{"values": {"mean": ph * 10}}]}]}},
+            "property=clay": {"properties": {"layers": [{"depths": [{"values": {"mean": clay * 10}}]}]}}
+        }
+        self.fail = fail
+        self.urls: List[str] = []
+
+    def __call__(self, url, timeout=None):
+        self.urls.append(url)
+        if self.fail:
+            raise urllib.error.URLError("network disabled in tests")
+        for marker, body in self.responses.items():
+            if marker in url:
+                return io.BytesIO(json.dumps(body).encode())
+        raise urllib.error.URLError(f"unexpected URL {url}")
+
+
+def analyze_offline(lat: float, lon: float, upstream: FakeUpstream) -> Dict[str, Any]:
+    """analyze_site_from_location with no local stores and a fake network."""
+    with tempfile.TemporaryDirectory() as tmp:
+        saved_env = {name: os.environ.get(name) for name in (
+            "WEATHER_STORE_DIR", "SOIL_MIRROR_DIR", "FETCH_CACHE_DIR", "RESULT_STORE_DIR"
+        )}
+        saved_urlopen = urllib.request.urlopen
+        saved_stderr = sys.stderr
+        try:
+            for name in saved_env:
+                os.environ[name] = os.path.join(tmp, "missing", name.lower())
+            urllib.request.urlopen = upstream
+            sys.stderr = io.StringIO()
+            random.seed(7)
+            return json.loads(site_analyzer_with_apis.analyze_site_from_location(lat, lon))
+        finally:
+            urllib.request.urlopen = saved_urlopen
+            sys.stderr = saved_stderr
+            for name, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+
+def test_mocked_network() -> bool:
+    """analyze_site_from_location scores provider responses like site_analyzer, and falls back offline."""
+    upstream = FakeUpstream({"main": {"temp": 31.5, "humidity": 70}, "rain": {"1h": 0.5}}, ph=5.4, clay=32)
+    live = analyze_offline(14.0, 75.5, upstream)
+    inputs = live["input_data"]
+    expected = json.loads(site_analyzer.analyze_site(json.dumps(inputs)))
+
+    offline = analyze_offline(40.0, -3.7, FakeUpstream({}, ph=0, clay=0, fail=True))
+
+    return (
+        len(upstream.urls) == 3
+        and live["data_sources"]["weather"] == "OpenWeatherMap"
+        and live["data_sources"]["soil"] == "SoilGrids"
+        and inputs["temperature"] == 31.5 and inputs["rainfall"] == 0.5 * 24 * 14 and inputs["soil_ph"] == 5.4
+        and live["analysis"] == expected["analysis"]
+        and live["summary"] == expected["summary"]
+        and offline["success"]
+        and offline["data_sources"]["weather"] == "mock"
+        and offline["input_data"]["soil_ph"] == 6.5
     )
-    
-    print("Output:")
-    print(result.stdout)
-    
-    if result.returncode != 0:
-        print(f"Error: {result.stderr}")
-    
-    return result.returncode == 0
 
 
 def main():
     """Run all test cases."""
     print("SITE ANALYZER TEST SUITE")
     print("=" * 70)
-    
+
+    tests = [
+        test_golden_corpus,
+        test_analyze_site_output,
+        test_band_edges,
+        test_random_parity,
+        test_mocked_network
+    ]
     tests_passed = 0
-    tests_total = 0
-    
-    # Test 1: Ideal reforestation site
-    tests_total += 1
-    if test_analyzer(
-        "Ideal Reforestation Site",
-        {
-            "ndvi": 0.35,
-            "soil_ph": 6.5,
-            "soil_moisture": 65,
-            "temperature": 28,
-            "rainfall": 150
-        }
-    ):
-        tests_passed += 1
-    
-    # Test 2: Healthy forest (already vegetated)
-    tests_total += 1
-    if test_analyzer(
-        "Healthy Forest (Low Priority)",
-        {
-            "ndvi": 0.75,
-            "soil_ph": 6.8,
-            "soil_moisture": 70,
-            "temperature": 25,
-            "rainfall": 180
-        }
-    ):
-        tests_passed += 1
-    
-    # Test 3: Drought conditions
-    tests_total += 1
-    if test_analyzer(
-        "Drought Conditions",
-        {
-            "ndvi": 0.25,
-            "soil_ph": 7.2,
-            "soil_moisture": 25,
-            "temperature": 38,
-            "rainfall": 15
-        }
-    ):
-        tests_passed += 1
-    
-    # Test 4: Acidic soil
-    tests_total += 1
-    if test_analyzer(
-        "Acidic Soil Challenge",
-        {
-            "ndvi": 0.40,
-            "soil_ph": 5.0,
-            "soil_moisture": 55,
-            "temperature": 26,
-            "rainfall": 120
-        }
-    ):
-        tests_passed += 1
-    
-    # Test 5: Waterlogged conditions
-    tests_total += 1
-    if test_analyzer(
-        "Waterlogged Conditions",
-        {
-            "ndvi": 0.30,
-            "soil_ph": 6.5,
-            "soil_moisture": 95,
-            "temperature": 24,
-            "rainfall": 450
-        }
-    ):
-        tests_passed += 1
-    
-    # Test 6: Missing fields (should use defaults)
-    tests_total += 1
-    if test_analyzer(
-        "Missing Fields (Defaults)",
-        {
-            "ndvi": 0.45,
-            "soil_ph": 6.0
-            # Missing: soil_moisture, temperature, rainfall
-        }
-    ):
-        tests_passed += 1
-    
-    # Test 7: Invalid JSON (error handling)
-    tests_total += 1
-    print(f"\n{'=' * 70}")
-    print("TEST: Invalid JSON (Error Handling)")
-    print(f"{'=' * 70}")
-    result = subprocess.run(
-        ['python', 'site_analyzer.py', '{invalid json}'],
-        capture_output=True,
-        text=True
-    )
-    print("Output:")
-    print(result.stdout)
-    if "error" in result.stdout.lower():
-        tests_passed += 1
-        print("✓ Error handled correctly")
-    
-    # Summary
+    for test in tests:
+        passed = test()
+        tests_passed += passed
+        print(f"{'✓' if passed else '✗'} {test.__doc__}")
+
     print(f"\n{'=' * 70}")
-    print(f"TEST SUMMARY: {tests_passed}/{tests_total} tests passed")
+    print(f"TEST SUMMARY: {tests_passed}/{len(tests)} tests passed")
     print(f"{'=' * 70}")
-    
-    return 0 if tests_passed == tests_total else 1
+
+    return 0 if tests_passed == len(tests) else 1
 
 
 if __name__ == "__main__":
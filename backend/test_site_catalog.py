@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test script for site_catalog.py
+Checks grid-indexed bounding-box, radius and project queries against a
+brute-force scan of the same sites.
+"""
+
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+from site_catalog import SiteCatalog, haversine_km
+
+
+def make_sites(count: int) -> list:
+    rng = random.Random(9)
+    projects = ["Western Ghats", "Aravalli Range", None]
+    return [
+        {
+            "id": i,
+            "lat": rng.uniform(-60, 60),
+            "lon": rng.uniform(-180, 180),
+            "name": f"Site {i}",
+            "project": rng.choice(projects)
+        }
+        for i in range(count)
+    ]
+
+
+def test_bbox_matches_scan() -> bool:
+    """Bounding-box queries return exactly the sites a full scan finds."""
+    sites = make_sites(20000)
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as root:
+        path = Path(root) / "catalog.bin"
+        SiteCatalog.build(path, sites, cell_size=0.5)
+        with SiteCatalog(path) as catalog:
+            for _ in range(50):
+                min_lat, min_lon = rng.uniform(-60, 50), rng.uniform(-180, 160)
+                box = (min_lat, min_lon, min_lat + rng.uniform(0, 10), min_lon + rng.uniform(0, 20))
+                found = sorted(site["id"] for site in catalog.bbox(*box))
+                expected = sorted(
+                    s["id"] for s in sites
+                    if box[0] <= s["lat"] <= box[2] and box[1] <= s["lon"] <= box[3]
+                )
+                if found != expected:
+                    return False
+            return len(catalog) == 20000
+
+
+def test_radius_across_antimeridian() -> bool:
+    """Radius queries include sites on both sides of the antimeridian."""
+    sites = [
+        {"lat": 0.0, "lon": 179.9, "name": "East"},
+        {"lat": 0.0, "lon": -179.9, "name": "West"},
+        {"lat": 0.0, "lon": 170.0, "name": "Far"}
+    ]
+    with tempfile.TemporaryDirectory() as root:
+        path = Path(root) / "catalog.bin"
+        SiteCatalog.build(path, sites)
+        with SiteCatalog(path) as catalog:
+            found = sorted(site["name"] for site in catalog.radius(0.0, 180.0, 50))
+    return found == ["East", "West"]
+
+
+def test_radius_across_pole() -> bool:
+    """A radius reaching over a pole finds sites on the far side of it."""
+    sites = [
+        {"lat": 89.95, "lon": 10.0, "name": "Near"},
+        {"lat": 89.95, "lon": -170.0, "name": "Across"},
+        {"lat": 89.97, "lon": 100.0, "name": "Side"},
+        {"lat": -89.95, "lon": -170.0, "name": "South"},
+        {"lat": 89.7, "lon": 10.0, "name": "Far"}
+    ]
+    with tempfile.TemporaryDirectory() as root:
+        path = Path(root) / "catalog.bin"
+        SiteCatalog.build(path, sites)
+        with SiteCatalog(path) as catalog:
+            found = sorted(site["name"] for site in catalog.radius(89.95, 10.0, 20))
+    expected = sorted(s["name"] for s in sites if haversine_km(89.95, 10.0, s["lat"], s["lon"]) <= 20)
+    return found == expected == ["Across", "Near", "Side"]
+
+
+def test_radius_and_project() -> bool:
+    """Radius and project queries match brute force, records round-trip."""
+    sites = make_sites(5000)
+    with tempfile.TemporaryDirectory() as root:
+        path = Path(root) / "catalog.bin"
+        SiteCatalog.build(path, sites)
+        with SiteCatalog(path) as catalog:
+            near = sorted(site["id"] for site in catalog.radius(10.0, 20.0, 800))
+            expected_near = sorted(
+                s["id"] for s in sites if haversine_km(10.0, 20.0, s["lat"], s["lon"]) <= 800
+            )
+            ghats = sorted(site["id"] for site in catalog.project("Western Ghats"))
+            expected_ghats = sorted(s["id"] for s in sites if s["project"] == "Western Ghats")
+            first = next(catalog.project("Western Ghats"))
+            original = sites[first["id"]]
+    return (
+        near == expected_near
+        and ghats == expected_ghats
+        and first["name"] == original["name"]
+        and first["lat"] == original["lat"]
+    )
+
+
+def main():
+    """Run all test cases."""
+    print("SITE CATALOG TEST SUITE")
+    print("=" * 70)
+
+    tests = [
+        test_bbox_matches_scan,
+        test_radius_across_antimeridian,
+        test_radius_across_pole,
+        test_radius_and_project
+    ]
+    tests_passed = 0
+    for test in tests:
+        passed = test()
+        tests_passed += passed
+        print(f"{'✓' if passed else '✗'} {test.__doc__}")
+
+    print(f"\n{'=' * 70}")
+    print(f"TEST SUMMARY: {tests_passed}/{len(tests)} tests passed")
+    print(f"{'=' * 70}")
+
+    return 0 if tests_passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
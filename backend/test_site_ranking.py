@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test script for site_ranking.py
+Checks the bounded top-K heap against a full sort and verifies that
+pruned candidates never reach the expensive fetches.
+"""
+
+import random
+import sys
+
+from site_analyzer import score_site_inputs
+from site_ranking import grid_candidates, rank_sites
+from site_screening import score_bounds
+
+
+def random_site(rng: random.Random, index: int) -> dict:
+    return {
+        "name": f"Site {index}",
+        "lat": index,
+        "lon": 0.0,
+        "ndvi": rng.uniform(0, 1),
+        "soil_ph": rng.uniform(4, 9),
+        "soil_moisture": rng.uniform(10, 100),
+        "temperature": rng.uniform(5, 45),
+        "rainfall": rng.uniform(0, 500)
+    }
+
+
+def test_matches_full_sort() -> bool:
+    """Top-K from the heap equals the head of a stable full sort."""
+    rng = random.Random(7)
+    sites = [random_site(rng, i) for i in range(2000)]
+    result = rank_sites(iter(sites), k=25)
+
+    scored = [(score_site_inputs(s)["site_suitability"]["final_score"], i)
+              for i, s in enumerate(sites)]
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    expected = [sites[i]["name"] for _, i in scored[:25]]
+    actual = [r["name"] for r in result["results"]]
+    return actual == expected and result["results"][0]["rank"] == 1
+
+
+def test_priority_ranking() -> bool:
+    """Ranking by priority keeps HIGH priority sites first."""
+    rng = random.Random(11)
+    sites = [random_site(rng, i) for i in range(500)]
+    result = rank_sites(sites, k=10, by="priority")
+    priorities = [r["priority"] for r in result["results"]]
+    order = {"HIGH": 2, "MEDIUM": 1, "LOW": 0}
+    return all(order[a] >= order[b] for a, b in zip(priorities, priorities[1:]))
+
+
+def test_pruning_skips_fetches() -> bool:
+    """Candidates with poor NDVI are dropped before soil/weather fetches."""
+    def ndvi(lat, lon):
+        return {"ndvi": 0.9 if lat < 3 else 0.0}
+
+    def weather(lat, lon):
+        return {"temperature": 25.0, "rainfall": 150.0}
+
+    def soil(lat, lon):
+        return {"soil_ph": 6.5, "soil_moisture": 60.0}
+
+    fetchers = {"ndvi": ndvi, "weather": weather, "soil": soil}
+    candidates = ({"lat": i, "lon": 0.0} for i in range(100))
+    result = rank_sites(candidates, k=3, fetchers=fetchers)
+
+    return (
+        [r["lat"] for r in result["results"]] == [0, 1, 2]
+        and result["pruned"] == 97
+        and result["fetch_calls"]["soil"] == 3
+        and result["fetch_calls"]["ndvi"] == 100
+    )
+
+
+def test_score_bounds() -> bool:
+    """Bounds span the full range when nothing is known and are exact when all is."""
+    sources = {
+        "ndvi": {"ndvi": 0.35},
+        "soil": {"soil_ph": 6.5, "soil_moisture": 65},
+        "weather": {"temperature": 28, "rainfall": 150}
+    }
+    return score_bounds({}) == (8.0, 100.0) and score_bounds(sources) == (84.0, 84.0)
+
+
+def test_grid_candidates() -> bool:
+    """Grid includes both region edges without floating point drift."""
+    cells = list(grid_candidates(10.0, 70.0, 11.0, 71.0, 0.1))
+    return len(cells) == 121 and cells[-1] == {"lat": 11.0, "lon": 71.0}
+
+
+def main():
+    """Run all test cases."""
+    print("SITE RANKING TEST SUITE")
+    print("=" * 70)
+
+    tests = [
+        test_matches_full_sort,
+        test_priority_ranking,
+        test_pruning_skips_fetches,
+        test_score_bounds,
+        test_grid_candidates
+    ]
+    tests_passed = 0
+    for test in tests:
+        passed = test()
+        tests_passed += passed
+        print(f"{'✓' if passed else '✗'} {test.__doc__}")
+
+    print(f"\n{'=' * 70}")
+    print(f"TEST SUMMARY: {tests_passed}/{len(tests)} tests passed")
+    print(f"{'=' * 70}")
+
+    return 0 if tests_passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Test script for site_screening.py
+Verifies that early-stopped screening always reports the same risk class
+as a full analysis, and that decided sites skip their remaining fetches.
+"""
+
+import random
+import sys
+
+from site_analyzer import score_site_inputs
+from site_screening import screen_site, screen_sites
+
+
+def make_fetchers(sites: dict) -> dict:
+    """Fake source fetchers serving fixed inputs keyed by (lat, lon)."""
+    return {
+        "ndvi": lambda lat, lon: {"ndvi": sites[(lat, lon)]["ndvi"]},
+        "weather": lambda lat, lon: {
+            "temperature": sites[(lat, lon)]["temperature"],
+            "rainfall": sites[(lat, lon)]["rainfall"]
+        },
+        "soil": lambda lat, lon: {
+            "soil_ph": sites[(lat, lon)]["soil_ph"],
+            "soil_moisture": sites[(lat, lon)]["soil_moisture"]
+        }
+    }
+
+
+def test_class_matches_full_analysis() -> bool:
+    """Screened risk class equals the full analysis for 5000 random sites."""
+    rng = random.Random(3)
+    sites = {}
+    for i in range(5000):
+        sites[(float(i), 0.0)] = {
+            "ndvi": rng.uniform(0, 1),
+            "soil_ph": rng.uniform(4, 9),
+            "soil_moisture": rng.uniform(10, 100),
+            "temperature": rng.uniform(5, 45),
+            "rainfall": rng.uniform(0, 500)
+        }
+    result = screen_sites(
+        [{"lat": lat, "lon": lon} for lat, lon in sites],
+        fetchers=make_fetchers(sites)
+    )
+    for screened in result["results"]:
+        location = screened["location"]
+        expected = score_site_inputs(sites[(location["lat"], location["lon"])])
+        if screened["risk_level"] != expected["site_suitability"]["risk_level"]:
+            return False
+    return result["total"] == 5000
+
+
+def test_decided_site_skips_soil() -> bool:
+    """A bare site under extreme drought is HIGH risk without fetching soil."""
+    sites = {(1.0, 2.0): {
+        "ndvi": 0.0, "soil_ph": 6.5, "soil_moisture": 60,
+        "temperature": 42, "rainfall": 5
+    }}
+    result = screen_site(1.0, 2.0, fetchers=make_fetchers(sites))
+    return (
+        result["risk_level"] == "HIGH"
+        and result["skipped"] == ["soil"]
+        and result["final_score"] is None
+        and result["score_bounds"] == {"min": 8.0, "max": 40.0}
+    )
+
+
+def test_cached_sources_first() -> bool:
+    """Cached sources are read before live ones."""
+    calls = []
+    sites = {(0.0, 0.0): {
+        "ndvi": 0.5, "soil_ph": 6.5, "soil_moisture": 60,
+        "temperature": 25, "rainfall": 150
+    }}
+    fetchers = {
+        name: (lambda f, n: lambda lat, lon: calls.append(n) or f(lat, lon))(fetch, name)
+        for name, fetch in make_fetchers(sites).items()
+    }
+    screen_site(0.0, 0.0, fetchers=fetchers,
+                is_cached=lambda name, lat, lon: name == "soil")
+    return calls[0] == "soil"
+
+
+def test_local_reads_not_counted() -> bool:
+    """Reads from the weather store, soil mirror or fetch cache are not counted as upstream calls."""
+    fetchers = {
+        "ndvi": lambda lat, lon: {"ndvi": 0.5, "source": "estimated"},
+        "weather": lambda lat, lon: {"temperature": 25, "rainfall": 150, "source": "weather-store"},
+        "soil": lambda lat, lon: {"soil_ph": 6.5, "soil_moisture": 60, "source": "SoilGrids",
+                                  "cache": {"status": "fresh", "age_seconds": 10}}
+    }
+    local = screen_sites([{"lat": 0.0, "lon": 0.0}], fetchers=fetchers)
+
+    fetchers["weather"] = lambda lat, lon: {"temperature": 25, "rainfall": 150, "source": "OpenWeatherMap"}
+    fetchers["soil"] = lambda lat, lon: {"soil_ph": 6.5, "soil_moisture": 60, "source": "SoilGrids",
+                                         "cache": {"status": "miss", "age_seconds": 0}}
+    live = screen_sites([{"lat": 0.0, "lon": 0.0}], fetchers=fetchers)
+    return local["upstream_calls"] == 0 and live["upstream_calls"] == 3
+
+
+def test_avoided_calls_exclude_local_sources() -> bool:
+    """Skipped sources that would have been served locally are not counted as avoided calls."""
+    sites = {(1.0, 2.0): {
+        "ndvi": 0.0, "soil_ph": 6.5, "soil_moisture": 60,
+        "temperature": 42, "rainfall": 5
+    }}
+    live = screen_sites([{"lat": 1.0, "lon": 2.0}], fetchers=make_fetchers(sites))
+    local = screen_sites([{"lat": 1.0, "lon": 2.0}], fetchers=make_fetchers(sites),
+                         is_cached=lambda name, lat, lon: True)
+    return (
+        live["results"][0]["skipped"] == ["soil"]
+        and live["avoided_upstream_calls"] == 2
+        and local["results"][0]["skipped"] == ["soil"]
+        and local["avoided_upstream_calls"] == 0
+    )
+
+
+def main():
+    """Run all test cases."""
+    print("SITE SCREENING TEST SUITE")
+    print("=" * 70)
+
+    tests = [
+        test_class_matches_full_analysis,
+        test_decided_site_skips_soil,
+        test_cached_sources_first,
+        test_local_reads_not_counted,
+        test_avoided_calls_exclude_local_sources
+    ]
+    tests_passed = 0
+    for test in tests:
+        passed = test()
+        tests_passed += passed
+        print(f"{'✓' if passed else '✗'} {test.__doc__}")
+
+    print(f"\n{'=' * 70}")
+    print(f"TEST SUMMARY: {tests_passed}/{len(tests)} tests passed")
+    print(f"{'=' * 70}")
+
+    return 0 if tests_passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
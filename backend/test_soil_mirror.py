@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Test script for soil_mirror.py
+Builds small mirrors from synthetic samplers and XYZ files and checks
+point, batch and analyzer lookups against them.
+"""
+
+import io
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import soil_mirror
+from soil_mirror import SoilMirror, default_mirror
+
+
+CELLS = 20
+
+
+def synthetic(lat: float, lon: float) -> dict:
+    """Raw SoilGrids values that vary smoothly with location."""
+    return {"phh2o": 50 + round(10 * abs(math.sin(lat + lon))), "clay": 100 + round(lat * 10) % 300}
+
+
+def cell_centre(lat: float, lon: float) -> tuple:
+    return ((math.floor(lat * CELLS) + 0.5) / CELLS, (math.floor(lon * CELLS) + 0.5) / CELLS)
+
+
+def test_point_lookup_matches_sampler() -> bool:
+    """Every point reads the value sampled at its cell centre, across tile edges."""
+    rng = random.Random(3)
+    with tempfile.TemporaryDirectory() as root:
+        mirror = SoilMirror(Path(root))
+        result = mirror.build((-1.5, 33.5, 1.5, 35.5), synthetic, CELLS)
+        if result != {"tiles": 12, "cells": 60 * 40}:
+            return False
+        for _ in range(2000):
+            lat, lon = rng.uniform(-1.5, 1.5), rng.uniform(33.5, 35.5)
+            expected = synthetic(*cell_centre(lat, lon))
+            values = mirror.sample(lat, lon)
+            if values != {"phh2o": expected["phh2o"] / 10, "clay": expected["clay"] / 10}:
+                return False
+        # Outside the region and outside any tile there is no data
+        return mirror.sample(-1.6, 34.0) is None and mirror.sample(40.0, 10.0) is None
+
+
+def test_adjacent_builds_share_tile() -> bool:
+    """A second build in the same tile keeps the cells of the first and both regions are listed."""
+    with tempfile.TemporaryDirectory() as root:
+        mirror = SoilMirror(Path(root))
+        mirror.build((12.0, 74.0, 12.5, 75.0), synthetic, CELLS)
+        mirror.build((12.5, 74.0, 13.0, 75.0), lambda lat, lon: {"phh2o": 70, "clay": 400}, CELLS)
+        mirror.build((12.0, 74.0, 12.5, 75.0), synthetic, CELLS)
+        with SoilMirror(Path(root)) as reopened:
+            south = reopened.sample(12.22, 74.52)
+            north = reopened.sample(12.7, 74.5)
+            regions = reopened.manifest["tiles"]["N12E074.tile"]["regions"]
+            stale = reopened.stale_regions(timedelta(0))
+        expected = synthetic(*cell_centre(12.22, 74.52))
+        return (
+            south == {"phh2o": expected["phh2o"] / 10, "clay": expected["clay"] / 10}
+            and north == {"phh2o": 7.0, "clay": 40.0}
+            and [region["bbox"] for region in regions] == [[12.5, 74.0, 13.0, 75.0], [12.0, 74.0, 12.5, 75.0]]
+            and len(stale) == 2
+        )
+
+
+def test_refresh_keeps_tile_resolutions() -> bool:
+    """Refresh re-samples each tile at its own resolution; a mismatched build is refused."""
+    with tempfile.TemporaryDirectory() as root:
+        mirror = SoilMirror(Path(root))
+        mirror.build((12.0, 74.0, 12.5, 75.0), synthetic, CELLS)
+        mirror.build((12.5, 74.0, 13.0, 75.0), synthetic, CELLS)
+        mirror.build((20.0, 80.0, 21.0, 81.0), synthetic, 10)
+        try:
+            mirror.build((12.0, 74.0, 13.0, 75.0), synthetic, 10)
+            refused = False
+        except ValueError:
+            refused = True
+        for entry in mirror.manifest["tiles"].values():
+            for region in entry["regions"]:
+                region["built_at"] = "2020-01-01T00:00:00"
+        mirror._save_manifest()
+        mirror.close()
+
+        saved = (sys.argv, soil_mirror.soilgrids_sample, sys.stdout)
+        sys.argv = ["soil_mirror.py", "refresh", "--max-age-days", "30"]
+        soil_mirror.soilgrids_sample = synthetic
+        sys.stdout = io.StringIO()
+        os.environ["SOIL_MIRROR_DIR"] = root
+        try:
+            soil_mirror.main()
+            report = json.loads(sys.stdout.getvalue())
+        finally:
+            sys.argv, soil_mirror.soilgrids_sample, sys.stdout = saved
+            del os.environ["SOIL_MIRROR_DIR"]
+
+        with SoilMirror(Path(root)) as reopened:
+            tiles = reopened.manifest["tiles"]
+            values = [reopened.sample(12.22, 74.52), reopened.sample(12.72, 74.52), reopened.sample(20.5, 80.5)]
+            resolutions = (reopened.resolution(12, 74), reopened.resolution(20, 80))
+
+    return (
+        refused and report["stale"] == 3 and report["tiles"] == 3
+        and None not in values and resolutions == (CELLS, 10)
+        and tiles["N12E074.tile"]["cells_per_degree"] == CELLS
+        and len(tiles["N12E074.tile"]["regions"]) == 2
+        and tiles["N20E080.tile"]["cells_per_degree"] == 10
+    )
+
+
+def test_batch_matches_points() -> bool:
+    """Batch sampling returns the point results in input order."""
+    rng = random.Random(4)
+    with tempfile.TemporaryDirectory() as root:
+        mirror = SoilMirror(Path(root))
+        mirror.build((10.0, 76.0, 12.0, 78.0), synthetic, CELLS)
+        points = [(rng.uniform(9.5, 12.5), rng.uniform(75.5, 78.5)) for _ in range(3000)]
+        return mirror.sample_many(points) == [mirror.sample(lat, lon) for lat, lon in points]
+
+
+def test_lookups_are_fast() -> bool:
+    """100k point lookups against a reopened mirror take well under a second."""
+    rng = random.Random(5)
+    with tempfile.TemporaryDirectory() as root:
+        SoilMirror(Path(root)).build((10.0, 76.0, 12.0, 78.0), synthetic, CELLS)
+        points = [(rng.uniform(10, 12), rng.uniform(76, 78)) for _ in range(100_000)]
+        with SoilMirror(Path(root)) as mirror:
+            start = time.perf_counter()
+            mirror.sample_many(points)
+            elapsed = time.perf_counter() - start
+        return elapsed < 1.0
+
+
+def test_xyz_import_averages_pixels() -> bool:
+    """XYZ exports are averaged into grid cells; missing pixels stay no data."""
+    with tempfile.TemporaryDirectory() as root:
+        ph_file = Path(root) / "ph.xyz"
+        clay_file = Path(root) / "clay.xyz"
+        # Four source pixels in the cell at (12.0-12.05, 77.0-77.05)
+        ph_file.write_text("77.01 12.01 60\n77.03 12.01 62\n77.01 12.03 64\n77.03 12.03 66\n")
+        clay_file.write_text("77.01 12.01 200\n77.03 12.01 200\n77.01 12.03 300\n77.03 12.03 300\n")
+        mirror = SoilMirror(Path(root) / "mirror")
+        mirror.import_xyz((12.0, 77.0, 12.5, 77.5), {"phh2o": ph_file, "clay": clay_file}, CELLS)
+        soil = mirror.soil_data(12.02, 77.02)
+        return (soil["soil_ph"] == 6.3 and soil["clay_content"] == 25.0
+                and soil["soil_moisture"] == 42.5 and mirror.sample(12.2, 77.2) is None)
+
+
+def test_analyzer_reads_mirror() -> bool:
+    """fetch_soil_data serves mirrored sites offline and reports the source."""
+    with tempfile.TemporaryDirectory() as root:
+        SoilMirror(Path(root)).build((14.0, 75.0, 15.0, 76.0), synthetic, CELLS)
+        os.environ["SOIL_MIRROR_DIR"] = root
+        try:
+            import site_analyzer_with_apis
+            soil = site_analyzer_with_apis.fetch_soil_data(14.51, 75.51)
+            mirror = default_mirror()
+            mirror.close()
+        finally:
+            del os.environ["SOIL_MIRROR_DIR"]
+        expected = synthetic(*cell_centre(14.51, 75.51))
+        return soil["source"] == "soil-mirror" and soil["soil_ph"] == expected["phh2o"] / 10
+
+
+def main():
+    """Run all test cases."""
+    print("SOIL MIRROR TEST SUITE")
+    print("=" * 70)
+
+    tests = [
+        test_point_lookup_matches_sampler,
+        test_adjacent_builds_share_tile,
+        test_refresh_keeps_tile_resolutions,
+        test_batch_matches_points,
+        test_lookups_are_fast,
+        test_xyz_import_averages_pixels,
+        test_analyzer_reads_mirror
+    ]
+    tests_passed = 0
+    for test in tests:
+        passed = test()
+        tests_passed += passed
+        print(f"{'✓' if passed else '✗'} {test.__doc__}")
+
+    print(f"\n{'=' * 70}")
+    print(f"TEST SUMMARY: {tests_passed}/{len(tests)} tests passed")
+    print(f"{'=' * 70}")
+
+    return 0 if tests_passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
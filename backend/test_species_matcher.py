@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Test script for species_matcher.py
+Checks the bitset-indexed matcher against scoring every species directly
+and checks it against the shipped species table.
+"""
+
+import math
+import random
+import sys
+import time
+
+from species_matcher import FACTORS, SpeciesMatcher, default_matcher, factor_score
+
+
+def random_species(rng: random.Random, index: int) -> dict:
+    ph_low = rng.uniform(4.0, 7.0)
+    temp_low = rng.uniform(0, 25)
+    rain_low = rng.uniform(100, 2000)
+    return {
+        "name": f"Species {index}",
+        "phRange": [round(ph_low, 1), round(ph_low + rng.uniform(0.5, 2.5), 1)],
+        "temperatureRange": [round(temp_low), round(temp_low + rng.uniform(5, 20))],
+        "minRainfall": round(rain_low),
+        "maxRainfall": round(rain_low * rng.uniform(1.2, 4)),
+        "droughtTolerance": rng.choice(["very_high", "high", "medium", "low"])
+    }
+
+
+def random_site(rng: random.Random) -> dict:
+    site = {
+        "soil_ph": rng.uniform(4, 9),
+        "soil_moisture": rng.uniform(10, 100),
+        "temperature": rng.uniform(5, 45),
+        "rainfall": rng.uniform(0, 300)
+    }
+    if rng.random() < 0.7:
+        site["annual_rainfall"] = rng.uniform(0, 6000)
+    return site
+
+
+def brute_force(matcher: SpeciesMatcher, site: dict, top_n: int) -> list:
+    values = matcher.site_values(site)
+    scored = []
+    for index in range(len(matcher.species)):
+        factors = [
+            factor_score(value, *bounds)
+            for value, bounds in zip(values, matcher._bounds[index])
+            if value is not None
+        ]
+        score = 100 * math.prod(factors)
+        if score > 0:
+            scored.append((-score, index))
+    scored.sort()
+    return [matcher.species[index]["name"] for _, index in scored[:top_n]]
+
+
+def test_index_matches_brute_force() -> bool:
+    """Indexed top-N equals scoring every species, for 500 sites x 3000 species."""
+    rng = random.Random(13)
+    matcher = SpeciesMatcher([random_species(rng, i) for i in range(3000)])
+    for _ in range(500):
+        site = random_site(rng)
+        if [s["name"] for s in matcher.match(site, 10)] != brute_force(matcher, site, 10):
+            return False
+    return True
+
+
+def test_degenerate_ranges_match_brute_force() -> bool:
+    """Zero-width and edge-sharing ranges give the same matches as scoring every species."""
+    rng = random.Random(21)
+    species = []
+    for i in range(400):
+        ph = rng.choice([5.5, 6.0, 6.5, 7.0])
+        temp = rng.choice([15, 20, 25])
+        rain = rng.choice([0, 500, 1000])
+        species.append({
+            "name": f"Species {i}",
+            "phRange": [ph, ph if i % 2 else ph + rng.choice([0.5, 1.0])],
+            "temperatureRange": [temp, temp if i % 3 else temp + 5],
+            "minRainfall": rain,
+            "maxRainfall": rain if i % 5 else rain * 2,
+            "moistureRange": [60, 60] if i % 7 else [40, 60]
+        })
+    matcher = SpeciesMatcher(species)
+
+    # Site values on and between the shared edges
+    for _ in range(2000):
+        site = {
+            "soil_ph": rng.choice([5.5, 6.0, 6.25, 6.5, 7.0, 7.5, 8.0]),
+            "soil_moisture": rng.choice([40, 50, 60, 65]),
+            "temperature": rng.choice([15, 17.5, 20, 25, 30]),
+            "rainfall": 0
+        }
+        if rng.random() < 0.7:
+            site["annual_rainfall"] = rng.choice([0, 250, 500, 1000, 2000])
+        for top_n in (5, 400):
+            if [s["name"] for s in matcher.match(site, top_n)] != brute_force(matcher, site, top_n):
+                return False
+    return True
+
+
+def test_large_table_is_fast() -> bool:
+    """5000 sites against 5000 species match in a few seconds."""
+    rng = random.Random(17)
+    matcher = SpeciesMatcher([random_species(rng, i) for i in range(5000)])
+    sites = [random_site(rng) for _ in range(5000)]
+    start = time.perf_counter()
+    matcher.match_many(sites, 5)
+    return time.perf_counter() - start < 5.0
+
+
+def test_shipped_table() -> bool:
+    """The frontend species catalog ranks drought-hardy species for dry sites."""
+    matcher = default_matcher()
+    dry_site = {"soil_ph": 7.0, "soil_moisture": 30, "temperature": 32,
+                "rainfall": 15, "annual_rainfall": 450}
+    names = [s["name"] for s in matcher.match(dry_site, 3)]
+    best = matcher.match(dry_site, 1)[0]
+    return "Acacia Senegal" in names and set(best["factors"]) == set(FACTORS)
+
+
+def test_rainfall_needs_annual_total() -> bool:
+    """Without annual rainfall the 14-day total is ignored rather than annualised."""
+    matcher = default_matcher()
+    site = {"soil_ph": 6.5, "soil_moisture": 65, "temperature": 28, "rainfall": 150}
+    best = matcher.match(site, 3)
+    return len(best) == 3 and all("rainfall" not in s["factors"] for s in best)
+
+
+def main():
+    """Run all test cases."""
+    print("SPECIES MATCHER TEST SUITE")
+    print("=" * 70)
+
+    tests = [
+        test_index_matches_brute_force,
+        test_degenerate_ranges_match_brute_force,
+        test_large_table_is_fast,
+        test_shipped_table,
+        test_rainfall_needs_annual_total
+    ]
+    tests_passed = 0
+    for test in tests:
+        passed = test()
+        tests_passed += passed
+        print(f"{'✓' if passed else '✗'} {test.__doc__}")
+
+    print(f"\n{'=' * 70}")
+    print(f"TEST SUMMARY: {tests_passed}/{len(tests)} tests passed")
+    print(f"{'=' * 70}")
+
+    return 0 if tests_passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test script for suitability_tiles.py
+Checks deepest-zoom scores against batch scoring, the 2 x 2 downsampling
+between levels, incremental re-tiling and the MBTiles export.
+"""
+
+import random
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+from batch_scoring import final_score, risk_level
+from suitability_tiles import TILE_CELLS, TilePyramid, cell_for, tile_bounds
+
+
+def random_points(rng: random.Random, count: int) -> list:
+    return [{
+        "lat": rng.uniform(11.0, 13.0),
+        "lon": rng.uniform(75.0, 77.0),
+        "ndvi": rng.uniform(0, 1),
+        "soil_ph": rng.uniform(4.5, 9),
+        "soil_moisture": rng.uniform(20, 95),
+        "temperature": rng.uniform(8, 42),
+        "rainfall": rng.uniform(10, 450)
+    } for _ in range(count)]
+
+
+def cell_value(pyramid: TilePyramid, z: int, col: int, row: int):
+    tile = pyramid.tile(z, col // TILE_CELLS, row // TILE_CELLS)
+    if tile is None:
+        return None
+    return tile["scores"][row % TILE_CELLS][col % TILE_CELLS]
+
+
+def score(point: dict) -> float:
+    return final_score(point["ndvi"], point["soil_ph"], point["soil_moisture"],
+                       point["temperature"], point["rainfall"])
+
+
+def test_deepest_zoom_matches_scoring() -> bool:
+    """Each deepest-zoom cell holds the mean score of its points and matching risk class."""
+    rng = random.Random(21)
+    points = random_points(rng, 3000)
+    with tempfile.TemporaryDirectory() as root:
+        pyramid = TilePyramid(Path(root))
+        pyramid.build(points, 6, 10)
+        by_cell = {}
+        for point in points:
+            by_cell.setdefault(cell_for(point["lat"], point["lon"], 10), []).append(score(point))
+        for (col, row), scores in by_cell.items():
+            tile = pyramid.tile(10, col // TILE_CELLS, row // TILE_CELLS)
+            value = tile["scores"][row % TILE_CELLS][col % TILE_CELLS]
+            if value != round(sum(scores) / len(scores), 2):
+                return False
+            if tile["risk"][row % TILE_CELLS][col % TILE_CELLS] != risk_level(value):
+                return False
+        return True
+
+
+def test_levels_are_downsampled() -> bool:
+    """Every cell below the deepest zoom is the mean of its non-empty 2 x 2 children."""
+    rng = random.Random(22)
+    with tempfile.TemporaryDirectory() as root:
+        pyramid = TilePyramid(Path(root))
+        pyramid.build(random_points(rng, 2000), 6, 9)
+        for z in range(6, 9):
+            for tile_path in Path(root, str(z)).glob("*/*.json"):
+                x, y = int(tile_path.parent.name), int(tile_path.stem)
+                tile = pyramid.tile(z, x, y)
+                for row in range(TILE_CELLS):
+                    for col in range(TILE_CELLS):
+                        gc, gr = x * TILE_CELLS + col, y * TILE_CELLS + row
+                        children = [cell_value(pyramid, z + 1, 2 * gc + dc, 2 * gr + dr)
+                                    for dc in (0, 1) for dr in (0, 1)]
+                        children = [c for c in children if c is not None]
+                        value = tile["scores"][row][col]
+                        if not children:
+                            if value is not None:
+                                return False
+                        elif value is None or abs(value - sum(children) / len(children)) > 0.0051:
+                            return False
+        south, west, north, east = tile_bounds(6, 45, 30)
+        return south < north and west < east
+
+
+def test_incremental_retiling() -> bool:
+    """Unchanged inputs write nothing; one changed point rewrites only its ancestor path."""
+    rng = random.Random(23)
+    points = random_points(rng, 1500)
+    with tempfile.TemporaryDirectory() as root:
+        pyramid = TilePyramid(Path(root))
+        first = pyramid.build(points, 6, 11)
+        unchanged = pyramid.build(points, 6, 11)
+        points[0] = {**points[0], "ndvi": 1.0 - points[0]["ndvi"]}
+        changed = pyramid.build(points, 6, 11)
+
+        fresh = TilePyramid(Path(root) / "fresh")
+        fresh.build(points, 6, 11)
+        same = all(
+            pyramid.tile(*map(int, p.relative_to(Path(root) / "fresh").with_suffix("").parts))
+            == fresh.tile(*map(int, p.relative_to(Path(root) / "fresh").with_suffix("").parts))
+            for p in (Path(root) / "fresh").glob("*/*/*.json")
+        )
+        return (first["rescored_tiles"] > 1 and unchanged["tiles_written"] == 0
+                and changed["rescored_tiles"] == 1 and changed["tiles_written"] == 6 and same)
+
+
+def test_mbtiles_export() -> bool:
+    """MBTiles export holds every tile with TMS row numbering."""
+    rng = random.Random(24)
+    with tempfile.TemporaryDirectory() as root:
+        pyramid = TilePyramid(Path(root) / "tiles")
+        pyramid.build(random_points(rng, 200), 6, 8)
+        files = list((Path(root) / "tiles").glob("*/*/*.json"))
+        count = pyramid.export_mbtiles(Path(root) / "out.mbtiles")
+        connection = sqlite3.connect(Path(root) / "out.mbtiles")
+        rows = connection.execute("SELECT zoom_level, tile_column, tile_row FROM tiles").fetchall()
+        connection.close()
+        expected = {(int(p.parts[-3]), int(p.parts[-2]), 2 ** int(p.parts[-3]) - 1 - int(p.stem)) for p in files}
+        return count == len(files) and set(rows) == expected
+
+
+def main():
+    """Run all test cases."""
+    print("SUITABILITY TILES TEST SUITE")
+    print("=" * 70)
+
+    tests = [
+        test_deepest_zoom_matches_scoring,
+        test_levels_are_downsampled,
+        test_incremental_retiling,
+        test_mbtiles_export
+    ]
+    tests_passed = 0
+    for test in tests:
+        passed = test()
+        tests_passed += passed
+        print(f"{'✓' if passed else '✗'} {test.__doc__}")
+
+    print(f"\n{'=' * 70}")
+    print(f"TEST SUMMARY: {tests_passed}/{len(tests)} tests passed")
+    print(f"{'=' * 70}")
+
+    return 0 if tests_passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
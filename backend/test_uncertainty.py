@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script for batch_scoring.py and uncertainty.py
+Checks the column-wise scorer against site_analyzer and sanity-checks the
+Monte Carlo uncertainty bands.
+"""
+
+import random
+import sys
+import time
+
+from batch_scoring import final_score_column, risk_level
+from site_analyzer import score_site_inputs
+from uncertainty import score_uncertainty
+
+
+SITE = {"ndvi": 0.35, "soil_ph": 6.5, "soil_moisture": 65, "temperature": 28, "rainfall": 150}
+
+
+def test_batch_matches_reference() -> bool:
+    """Column-wise scores equal site_analyzer for 20000 random sites."""
+    rng = random.Random(21)
+    rows = [
+        (rng.uniform(-0.1, 1.1), rng.uniform(3, 10), rng.uniform(0, 100),
+         rng.uniform(0, 50), rng.uniform(0, 500))
+        for _ in range(20000)
+    ]
+    scores = final_score_column(*zip(*rows))
+    for row, score in zip(rows, scores):
+        expected = score_site_inputs(dict(zip(
+            ("ndvi", "soil_ph", "soil_moisture", "temperature", "rainfall"), row
+        )))["site_suitability"]
+        if score != expected["final_score"] or risk_level(score) != expected["risk_level"]:
+            return False
+    return True
+
+
+def test_zero_uncertainty_is_point_score() -> bool:
+    """With no input spread every sample equals the deterministic score."""
+    spreads = {"ndvi": 0, "soil_ph": 0, "soil_moisture": 0, "temperature": 0, "rainfall": 0}
+    result = score_uncertainty(SITE, samples=200, seed=1, uncertainty=spreads)
+    return (
+        result["percentiles"]["p5"] == result["percentiles"]["p95"] == 84.0
+        and result["risk_probabilities"]["LOW"] == 1.0
+    )
+
+
+def test_borderline_site_is_split() -> bool:
+    """A site near the LOW/MEDIUM cut gets probability mass on both sides."""
+    borderline = {"ndvi": 0.5, "soil_ph": 5.9, "soil_moisture": 60, "temperature": 29, "rainfall": 110}
+    result = score_uncertainty(borderline, samples=5000, seed=2)
+    probabilities = result["risk_probabilities"]
+    total = sum(probabilities.values())
+    return (
+        0.05 < probabilities["LOW"] < 0.95
+        and 0.05 < probabilities["MEDIUM"] < 0.95
+        and abs(total - 1.0) < 1e-3
+        and result["percentiles"]["p5"] <= result["percentiles"]["p50"] <= result["percentiles"]["p95"]
+    )
+
+
+def test_samples_are_cheap() -> bool:
+    """Ten thousand samples score in well under a second."""
+    start = time.perf_counter()
+    score_uncertainty(SITE, samples=10000, seed=3)
+    return time.perf_counter() - start < 1.0
+
+
+def main():
+    """Run all test cases."""
+    print("UNCERTAINTY TEST SUITE")
+    print("=" * 70)
+
+    tests = [
+        test_batch_matches_reference,
+        test_zero_uncertainty_is_point_score,
+        test_borderline_site_is_split,
+        test_samples_are_cheap
+    ]
+    tests_passed = 0
+    for test in tests:
+        passed = test()
+        tests_passed += passed
+        print(f"{'✓' if passed else '✗'} {test.__doc__}")
+
+    print(f"\n{'=' * 70}")
+    print(f"TEST SUMMARY: {tests_passed}/{len(tests)} tests passed")
+    print(f"{'=' * 70}")
+
+    return 0 if tests_passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
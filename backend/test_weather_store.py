@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test script for weather_store.py
+Compares the incremental rolling window with a brute-force recomputation
+and checks that the analyzer reads stored windows instead of the API.
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+from weather_store import WeatherStore, ingest_fixture
+
+
+def brute_force(observations, now, window_seconds):
+    inside = [o for o in observations if o[0] > now - window_seconds]
+    return sum(o[2] for o in inside), sum(o[1] for o in inside) / len(inside)
+
+
+def test_incremental_matches_brute_force() -> bool:
+    """Running sums equal a full recomputation after every append."""
+    rng = random.Random(5)
+    with tempfile.TemporaryDirectory() as root:
+        store = WeatherStore(Path(root))
+        observations = []
+        timestamp = 1_700_000_000.0
+        for _ in range(1500):
+            timestamp += 3600
+            observation = (timestamp, rng.uniform(10, 40), rng.choice([0, 0, rng.uniform(0, 5)]), 1.0)
+            observations.append(observation)
+            store.append(14.02, 75.51, *observation)
+            window = store.window(14.02, 75.51)
+            rain, temp = brute_force(observations, timestamp, store.window_seconds)
+            if abs(window['observed_rainfall'] - round(rain, 2)) > 0.011:
+                return False
+            if abs(window['temperature'] - round(temp, 2)) > 0.011:
+                return False
+        return window['observations'] == 14 * 24
+
+
+def test_reload_from_log() -> bool:
+    """A fresh store rebuilds the same window from the log tail."""
+    with tempfile.TemporaryDirectory() as root:
+        store = WeatherStore(Path(root))
+        for hour in range(24 * 20):
+            store.append(-3.4, 29.9, 1_700_000_000 + hour * 3600, 22.0, 0.5)
+        reloaded = WeatherStore(Path(root)).window(-3.4, 29.9)
+        return reloaded == store.window(-3.4, 29.9) and reloaded['rainfall'] == 168.0
+
+
+def test_fixture_feed_is_idempotent() -> bool:
+    """Re-ingesting the same fixture feed stores nothing new."""
+    with tempfile.TemporaryDirectory() as root:
+        feed = Path(root) / 'feed.ndjson'
+        with open(feed, 'w') as f:
+            for day in range(3):
+                f.write(json.dumps({
+                    'lat': 14.0, 'lon': 75.5,
+                    'timestamp': f'2026-06-0{day + 1}T06:00:00',
+                    'temperature': 27.0, 'rain_mm': 12.0, 'hours': 24
+                }) + '\n')
+        store = WeatherStore(Path(root) / 'store')
+        first = ingest_fixture(store, feed)
+        second = ingest_fixture(store, feed)
+        window = store.window(14.0, 75.5)
+        # 36 mm observed over 72 hours scales to 168 mm over 14 days
+        return first == 3 and second == 0 and window['rainfall'] == 168.0
+
+
+def test_analyzer_reads_store() -> bool:
+    """fetch_weather_data serves the stored window without calling the API."""
+    with tempfile.TemporaryDirectory() as root:
+        os.environ['WEATHER_STORE_DIR'] = root
+        try:
+            import site_analyzer_with_apis
+            from datetime import datetime
+            store = WeatherStore(Path(root))
+            now = datetime.now().timestamp()
+            for hour in range(48, 0, -1):
+                store.append(14.0, 75.5, now - hour * 3600, 26.0, 0.25)
+            weather = site_analyzer_with_apis.fetch_weather_data(14.0, 75.5)
+        finally:
+            del os.environ['WEATHER_STORE_DIR']
+        return weather['source'] == 'weather-store' and weather['rainfall'] == 84.0
+
+
+def main():
+    """Run all test cases."""
+    print("WEATHER STORE TEST SUITE")
+    print("=" * 70)
+
+    tests = [
+        test_incremental_matches_brute_force,
+        test_reload_from_log,
+        test_fixture_feed_is_idempotent,
+        test_analyzer_reads_store
+    ]
+    tests_passed = 0
+    for test in tests:
+        passed = test()
+        tests_passed += passed
+        print(f"{'✓' if passed else '✗'} {test.__doc__}")
+
+    print(f"\n{'=' * 70}")
+    print(f"TEST SUMMARY: {tests_passed}/{len(tests)} tests passed")
+    print(f"{'=' * 70}")
+
+    return 0 if tests_passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
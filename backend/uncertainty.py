@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo Uncertainty Bands
+=============================
+Reports how confident a suitability score is, given uncertain inputs.
+
+NDVI is estimated from latitude, soil moisture is derived from clay
+content and 14-day rainfall is extrapolated, so a site at 69.9 and one
+at 70.1 are not really different. This module draws N perturbed input
+samples per site, scores all of them column-wise with batch_scoring and
+reports score percentiles and the probability of each risk class.
+
+Usage:
+    python uncertainty.py '{"ndvi": 0.35, "soil_ph": 6.5, "soil_moisture": 65,
+                            "temperature": 28, "rainfall": 150, "samples": 2000}'
+
+Author: Habitat Canopy Team
+Version: 1.0.0
+"""
+
+import json
+import math
+import random
+import sys
+from typing import Dict, Any, List, Optional
+
+from batch_scoring import RISK_LEVELS, final_score, final_score_column, risk_level
+from site_analyzer import parse_input_data
+
+
+DEFAULT_SAMPLES = 1000
+
+# Standard deviation of each input. Rainfall is relative (log-normal),
+# the others are absolute.
+DEFAULT_UNCERTAINTY = {
+    "ndvi": 0.08,
+    "soil_ph": 0.3,
+    "soil_moisture": 8.0,
+    "temperature": 1.5,
+    "rainfall": 0.35
+}
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def sample_inputs(
+    data: Dict[str, float],
+    samples: int,
+    rng: random.Random,
+    uncertainty: Dict[str, float]
+) -> List[List[float]]:
+    """
+    Draw perturbed input columns around a site's point inputs.
+
+    Returns:
+        Columns in (ndvi, soil_ph, soil_moisture, temperature, rainfall) order
+    """
+    gauss = rng.gauss
+    span = range(samples)
+
+    def normal(field: str, low: float = -math.inf, high: float = math.inf) -> List[float]:
+        mean, sd = data[field], uncertainty[field]
+        return [min(high, max(low, gauss(mean, sd))) for _ in span]
+
+    # Mean-preserving log-normal keeps rainfall positive and skewed
+    sigma = uncertainty["rainfall"]
+    rain_mean = data["rainfall"]
+    rainfall = [rain_mean * math.exp(gauss(-sigma * sigma / 2, sigma)) for _ in span]
+
+    return [
+        normal("ndvi", 0.0, 1.0),
+        normal("soil_ph", 0.0, 14.0),
+        normal("soil_moisture", 0.0, 100.0),
+        normal("temperature"),
+        rainfall
+    ]
+
+
+def percentile(sorted_scores: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of an already sorted list."""
+    position = (len(sorted_scores) - 1) * pct / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_scores) - 1)
+    fraction = position - lower
+    return round(sorted_scores[lower] + (sorted_scores[upper] - sorted_scores[lower]) * fraction, 2)
+
+
+def score_uncertainty(
+    data: Dict[str, float],
+    samples: int = DEFAULT_SAMPLES,
+    seed: Optional[int] = None,
+    uncertainty: Optional[Dict[str, float]] = None
+) -> Dict[str, Any]:
+    """
+    Score distribution of one site under input uncertainty.
+
+    Args:
+        data: Analyzer inputs (ndvi, soil_ph, soil_moisture, temperature, rainfall)
+        samples: Number of Monte Carlo draws
+        seed: Optional random seed for reproducible bands
+        uncertainty: Optional standard deviation per input field
+
+    Returns:
+        Dictionary with the point score, score percentiles and risk class
+        probabilities
+    """
+    if samples <= 0:
+        raise ValueError("samples must be positive")
+
+    rng = random.Random(seed)
+    spreads = dict(DEFAULT_UNCERTAINTY)
+    spreads.update(uncertainty or {})
+
+    scores = final_score_column(*sample_inputs(data, samples, rng, spreads))
+    scores.sort()
+
+    counts = dict.fromkeys(RISK_LEVELS, 0)
+    for score in scores:
+        counts[risk_level(score)] += 1
+
+    mean = math.fsum(scores) / samples
+    variance = math.fsum((score - mean) ** 2 for score in scores) / samples
+    point = final_score(data["ndvi"], data["soil_ph"], data["soil_moisture"],
+                        data["temperature"], data["rainfall"])
+
+    return {
+        "point_score": point,
+        "point_risk_level": risk_level(point),
+        "samples": samples,
+        "mean": round(mean, 2),
+        "std": round(math.sqrt(variance), 2),
+        "percentiles": {f"p{pct}": percentile(scores, pct) for pct in PERCENTILES},
+        "risk_probabilities": {level: round(counts[level] / samples, 4) for level in RISK_LEVELS},
+        "uncertainty": spreads
+    }
+
+
+def main():
+    """
+    Main entry point for command-line usage.
+    Reads one site (or a list of sites) as JSON from the command line or
+    stdin; optional "samples", "seed" and "uncertainty" keys per site.
+    """
+    json_input = sys.argv[1] if len(sys.argv) > 1 else sys.stdin.read()
+
+    try:
+        request = json.loads(json_input)
+    except json.JSONDecodeError as e:
+        print(json.dumps({"success": False, "error": f"Invalid JSON format: {str(e)}"}, indent=2))
+        sys.exit(1)
+
+    sites = request if isinstance(request, list) else [request]
+    results = []
+    for site in sites:
+        data = parse_input_data(json.dumps(site))
+        results.append({
+            "input_data": data,
+            "uncertainty_analysis": score_uncertainty(
+                data,
+                samples=int(site.get("samples", DEFAULT_SAMPLES)),
+                seed=site.get("seed"),
+                uncertainty=site.get("uncertainty")
+            )
+        })
+
+    output = {"success": True, "results": results}
+    if not isinstance(request, list):
+        output = {"success": True, **results[0]}
+    print(json.dumps(output, indent=2))
+
+
+if __name__ == "__main__":
+    main()
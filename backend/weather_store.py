@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Weather Time-Series Store
+=========================
+Append-only weather observations per grid cell with rolling 14-day
+rainfall and mean-temperature windows.
+
+Each cell is one CSV log (timestamp, temperature, rain_mm, hours). The
+rolling window is kept in memory with running sums, so every new
+observation updates the aggregates in O(1). Analyses read the window
+instead of extrapolating 14 days of rain from a single API call.
+
+Usage:
+    python weather_store.py ingest <lat> <lon> [--interval-hours 1]
+    python weather_store.py ingest --sites sites.json
+    python weather_store.py fixture observations.ndjson
+    python weather_store.py window <lat> <lon>
+
+Author: Habitat Canopy Team
+Version: 1.0.0
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import urllib.request
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Deque, Iterator, List, Optional, Tuple
+
+
+WINDOW_DAYS = 14
+GRID_RESOLUTION = 0.1  # degrees per cell side
+
+# Minimum observed hours before a window replaces the live weather API
+MIN_COVERAGE_HOURS = 24.0
+
+DEFAULT_STORE_DIR = Path(__file__).parent / 'data' / 'weather_store'
+
+# Observation tuple: (timestamp, temperature, rain_mm, hours)
+Observation = Tuple[float, float, float, float]
+
+
+class RollingWindow:
+    """Running sums over the observations of the last window_seconds."""
+
+    def __init__(self, window_seconds: float):
+        self.window_seconds = window_seconds
+        self.observations: Deque[Observation] = deque()
+        self.rain_sum = 0.0
+        self.temp_sum = 0.0
+        self.hours_sum = 0.0
+        self.last_timestamp: Optional[float] = None
+
+    def add(self, observation: Observation) -> bool:
+        """
+        Add an observation and evict the ones that left the window.
+
+        Returns:
+            False if the observation is not newer than the last one
+            (re-ingesting the same feed is a no-op)
+        """
+        timestamp, temperature, rain_mm, hours = observation
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            return False
+
+        self.observations.append(observation)
+        self.rain_sum += rain_mm
+        self.temp_sum += temperature
+        self.hours_sum += hours
+        self.last_timestamp = timestamp
+        self.evict(timestamp)
+        return True
+
+    def evict(self, now: float):
+        """Drop observations older than the window (amortised O(1))."""
+        cutoff = now - self.window_seconds
+        while self.observations and self.observations[0][0] <= cutoff:
+            _, temperature, rain_mm, hours = self.observations.popleft()
+            self.rain_sum -= rain_mm
+            self.temp_sum -= temperature
+            self.hours_sum -= hours
+        if not self.observations:
+            # Reset so subtraction error cannot accumulate across empty spells
+            self.rain_sum = self.temp_sum = self.hours_sum = 0.0
+
+    def aggregate(self) -> Optional[Dict[str, Any]]:
+        """
+        Summarise the current window.
+
+        Rainfall is scaled up to the full window when fewer hours than
+        the window length have been observed.
+
+        Returns:
+            Dictionary with rainfall, mean temperature and coverage, or
+            None when the window is empty
+        """
+        count = len(self.observations)
+        if count == 0:
+            return None
+
+        window_hours = self.window_seconds / 3600
+        coverage_hours = min(max(self.hours_sum, 0.0), window_hours)
+        rainfall = max(self.rain_sum, 0.0)
+        if 0 < coverage_hours < window_hours:
+            rainfall *= window_hours / coverage_hours
+
+        return {
+            'rainfall': round(rainfall, 2),
+            'temperature': round(self.temp_sum / count, 2),
+            'observed_rainfall': round(max(self.rain_sum, 0.0), 2),
+            'observations': count,
+            'coverage_hours': round(coverage_hours, 2),
+            'window_days': round(window_hours / 24, 2),
+            'first_timestamp': self.observations[0][0],
+            'last_timestamp': self.observations[-1][0]
+        }
+
+
+def _read_lines_reversed(path: Path, block_size: int = 8192) -> Iterator[str]:
+    """Yield the lines of a file from last to first without reading it all."""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b''
+        while position > 0:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            block = f.read(step) + remainder
+            lines = block.split(b'\n')
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                if line:
+                    yield line.decode()
+        if remainder:
+            yield remainder.decode()
+
+
+class WeatherStore:
+    """Append-only per-cell weather logs with incremental rolling windows."""
+
+    def __init__(
+        self,
+        root: Path = DEFAULT_STORE_DIR,
+        resolution: float = GRID_RESOLUTION,
+        window_days: float = WINDOW_DAYS
+    ):
+        self.root = Path(root)
+        self.resolution = resolution
+        self.window_seconds = window_days * 86400
+        self._windows: Dict[str, RollingWindow] = {}
+
+    def cell_id(self, lat: float, lon: float) -> str:
+        """Grid cell identifier for a location."""
+        row = math.floor(lat / self.resolution)
+        col = math.floor(lon / self.resolution)
+        return f"{row}_{col}"
+
+    def _log_path(self, cell: str) -> Path:
+        return self.root / f"{cell}.csv"
+
+    def _load_window(self, cell: str) -> RollingWindow:
+        """Rebuild a cell's window from the tail of its log."""
+        window = RollingWindow(self.window_seconds)
+        path = self._log_path(cell)
+        if path.exists():
+            tail: List[Observation] = []
+            newest = None
+            for line in _read_lines_reversed(path):
+                observation = tuple(float(value) for value in line.split(','))
+                if newest is None:
+                    newest = observation[0]
+                if observation[0] <= newest - self.window_seconds:
+                    break
+                tail.append(observation)
+            for observation in reversed(tail):
+                window.add(observation)
+        return window
+
+    def _window(self, cell: str) -> RollingWindow:
+        if cell not in self._windows:
+            self._windows[cell] = self._load_window(cell)
+        return self._windows[cell]
+
+    def append(
+        self,
+        lat: float,
+        lon: float,
+        timestamp: float,
+        temperature: float,
+        rain_mm: float,
+        hours: float = 1.0
+    ) -> bool:
+        """
+        Record one observation for the cell containing (lat, lon).
+
+        Args:
+            lat: Latitude
+            lon: Longitude
+            timestamp: Observation time (Unix seconds)
+            temperature: Air temperature in Celsius
+            rain_mm: Rain accumulated over the observation interval
+            hours: Length of the interval the observation covers
+
+        Returns:
+            True if stored, False if not newer than the cell's last record
+        """
+        cell = self.cell_id(lat, lon)
+        observation = (float(timestamp), float(temperature), float(rain_mm), float(hours))
+        if not self._window(cell).add(observation):
+            return False
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self._log_path(cell), 'a') as f:
+            f.write(','.join(repr(value) for value in observation) + '\n')
+        return True
+
+    def window(self, lat: float, lon: float, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Rolling aggregates for the cell containing (lat, lon).
+
+        Args:
+            lat: Latitude
+            lon: Longitude
+            now: Optional evaluation time; observations older than the
+                 window before it are dropped first
+
+        Returns:
+            Aggregate dictionary (see RollingWindow.aggregate) or None
+        """
+        cell = self.cell_id(lat, lon)
+        window = self._window(cell)
+        if now is not None:
+            window.evict(now)
+        aggregate = window.aggregate()
+        if aggregate is not None:
+            aggregate['cell'] = cell
+        return aggregate
+
+
+def default_store() -> Optional[WeatherStore]:
+    """
+    Store configured through WEATHER_STORE_DIR (or the default location).
+
+    Returns:
+        WeatherStore, or None if nothing has been ingested yet
+    """
+    root = Path(os.getenv('WEATHER_STORE_DIR', str(DEFAULT_STORE_DIR)))
+    if not root.is_dir():
+        return None
+    return WeatherStore(root)
+
+
+def ingest_openweather(
+    store: WeatherStore,
+    lat: float,
+    lon: float,
+    interval_hours: float = 1.0
+) -> bool:
+    """
+    Append the current OpenWeatherMap observation for a location.
+
+    Meant to run every interval_hours (e.g. from cron); the reported
+    hourly rain rate is counted for the whole interval.
+
+    Args:
+        store: Target weather store
+        lat: Latitude
+        lon: Longitude
+        interval_hours: Time between ingestion runs
+
+    Returns:
+        True if a new observation was stored
+    """
+    from site_analyzer_with_apis import OPENWEATHER_API_KEY
+
+    url = f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={OPENWEATHER_API_KEY}&units=metric"
+    with urllib.request.urlopen(url, timeout=10) as response:
+        data = json.loads(response.read().decode())
+
+    rain = data.get('rain', {})
+    rain_rate = rain.get('1h', rain.get('3h', 0) / 3)
+    return store.append(
+        lat,
+        lon,
+        data.get('dt', datetime.now().timestamp()),
+        data['main']['temp'],
+        rain_rate * interval_hours,
+        interval_hours
+    )
+
+
+def _parse_timestamp(value: Any) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(value).timestamp()
+
+
+def ingest_fixture(store: WeatherStore, path: Path) -> int:
+    """
+    Append observations from a local NDJSON feed.
+
+    Each line: {"lat", "lon", "timestamp" (Unix or ISO 8601),
+    "temperature", "rain_mm", optional "hours"}.
+
+    Args:
+        store: Target weather store
+        path: Fixture file
+
+    Returns:
+        Number of new observations stored
+    """
+    stored = 0
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            stored += store.append(
+                record['lat'],
+                record['lon'],
+                _parse_timestamp(record['timestamp']),
+                record['temperature'],
+                record.get('rain_mm', 0.0),
+                record.get('hours', 1.0)
+            )
+    return stored
+
+
+def main():
+    """Main entry point for command-line usage."""
+    parser = argparse.ArgumentParser(description="Weather time-series store")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest = commands.add_parser('ingest', help="Append current OpenWeatherMap observations")
+    ingest.add_argument('lat', type=float, nargs='?')
+    ingest.add_argument('lon', type=float, nargs='?')
+    ingest.add_argument('--sites', help="JSON file with a list of {lat, lon} sites")
+    ingest.add_argument('--interval-hours', type=float, default=1.0)
+
+    fixture = commands.add_parser('fixture', help="Append observations from an NDJSON file")
+    fixture.add_argument('path')
+
+    window = commands.add_parser('window', help="Print the rolling window for a location")
+    window.add_argument('lat', type=float)
+    window.add_argument('lon', type=float)
+
+    args = parser.parse_args()
+    store = WeatherStore(Path(os.getenv('WEATHER_STORE_DIR', str(DEFAULT_STORE_DIR))))
+
+    if args.command == 'ingest':
+        if args.sites:
+            with open(args.sites) as f:
+                sites = json.load(f)
+        elif args.lat is not None and args.lon is not None:
+            sites = [{'lat': args.lat, 'lon': args.lon}]
+        else:
+            parser.error("ingest needs <lat> <lon> or --sites")
+
+        stored = 0
+        for site in sites:
+            try:
+                stored += ingest_openweather(store, site['lat'], site['lon'], args.interval_hours)
+            except Exception as e:
+                print(f"Warning: Weather ingest failed for {site['lat']}, {site['lon']} - {str(e)}",
+                      file=sys.stderr)
+        print(json.dumps({'success': True, 'stored': stored, 'sites': len(sites)}, indent=2))
+
+    elif args.command == 'fixture':
+        stored = ingest_fixture(store, Path(args.path))
+        print(json.dumps({'success': True, 'stored': stored}, indent=2))
+
+    else:
+        aggregate = store.window(args.lat, args.lon)
+        print(json.dumps({'success': aggregate is not None, 'window': aggregate}, indent=2))
+
+
+if __name__ == "__main__":
+    main()